@@ -0,0 +1,4 @@
+from benchmarks.fakeGithub.course import Course, CourseSettings
+from benchmarks.fakeGithub.server import FakeGithubServer, ServerSettings
+
+__all__ = ["Course", "CourseSettings", "FakeGithubServer", "ServerSettings"]
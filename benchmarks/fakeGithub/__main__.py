@@ -0,0 +1,76 @@
+"""
+Runs the stand-in GitHub GraphQL server with a synthetic course.
+
+Usage:
+    poetry run python -m benchmarks.fakeGithub --teams 100 --items 20000 --seed 7 \\
+        --latency-ms 80 --write-config fakeCourseConfig.json
+
+Then, in another shell, run the pipeline end to end against it:
+    GITHUB_GRAPHQL_URL=http://127.0.0.1:8765/graphql GITHUB_API_TOKEN=fake \\
+    ORGANIZATION=fake-course poetry run python src/generateMilestoneMetricsForActions.py \\
+        fakeCourseConfig.json --no-optimize-milestone-fetch
+"""
+
+import argparse
+import json
+import time
+from benchmarks.fakeGithub import Course, CourseSettings, FakeGithubServer, ServerSettings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--organization", default="fake-course")
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--members", type=int, default=6, help="developers per team")
+    parser.add_argument("--items", type=int, default=500, help="project items per team")
+    parser.add_argument("--milestones", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--points-per-hour", type=int, default=5000)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--timeout-nodes",
+        type=int,
+        help="fail queries asking for more possible nodes than this with a timeout",
+    )
+    parser.add_argument(
+        "--write-config",
+        metavar="PATH",
+        help="write a v2 Actions config for the first team to PATH",
+    )
+    args = parser.parse_args()
+
+    course = Course(
+        CourseSettings(
+            seed=args.seed,
+            organization=args.organization,
+            teams=args.teams,
+            membersPerTeam=args.members,
+            itemsPerProject=args.items,
+            milestones=args.milestones,
+        )
+    )
+    if args.write_config:
+        with open(args.write_config, mode="w") as config:
+            json.dump(course.actionsConfig(0), config, indent=2)
+    settings = ServerSettings(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        pointsPerWindow=args.points_per_hour,
+        failureRate=args.failure_rate,
+        timeoutNodes=args.timeout_nodes,
+    )
+    with FakeGithubServer(course, settings, host=args.host, port=args.port) as server:
+        print(f"Serving {args.teams} teams of {args.organization} at {server.url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Seeded generator of synthetic courses served by the stand-in GitHub server.
+
+A course is one organization with a number of teams. Every team has members, a
+manager, one repository with the course milestones and weekly Scrum Prep discussions,
+and a project whose items are issues with Urgency/Difficulty/Modifier fields, assignees,
+labels, reactions, comments and timeline events. Project items are generated on demand
+from the seed, so a 20,000 item project doesn't have to sit in memory.
+"""
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import random
+import re
+from benchmarks.fakeGithub.graphql import Connection, GraphqlError, paginate
+
+timeline_item_types = {
+    "CLOSED_EVENT": "ClosedEvent",
+    "ASSIGNED_EVENT": "AssignedEvent",
+    "CROSS_REFERENCED_EVENT": "CrossReferencedEvent",
+}
+label_names = ["bug", "enhancement", "documentation", "frontend", "backend"]
+
+
+@dataclass(kw_only=True)
+class CourseSettings:
+    seed: int = 0
+    organization: str = "fake-course"
+    teams: int = 10
+    membersPerTeam: int = 6
+    itemsPerProject: int = 500
+    milestones: int = 3
+    milestoneWeeks: int = 4
+    discussionsPerWeek: int = 3
+    startDate: datetime = datetime(2024, 1, 15, 12, tzinfo=timezone.utc)
+
+
+def isoformat(date: datetime) -> str:
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def user(login: str) -> dict:
+    return {"__typename": "User", "login": login}
+
+
+class LazyItems(Sequence):
+    """A sequence whose elements are built by a function of their index when read."""
+
+    def __init__(self, length: int, build: Callable[[int], dict]):
+        self.length = length
+        self.build = build
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.build(i) for i in range(*index.indices(self.length))]
+        if not -self.length <= index < self.length:
+            raise IndexError(index)
+        return self.build(index % self.length)
+
+
+class Course:
+    """
+    The organization, teams, projects and repositories of one synthetic course.
+
+    Args:
+        settings (CourseSettings): Size and seed of the course.
+    """
+
+    def __init__(self, settings: CourseSettings):
+        self.settings = settings
+        self.milestones = [
+            {
+                "title": f"Milestone #{index + 1}",
+                "start": settings.startDate
+                + timedelta(weeks=index * settings.milestoneWeeks),
+                "end": settings.startDate
+                + timedelta(weeks=(index + 1) * settings.milestoneWeeks, days=-3),
+            }
+            for index in range(settings.milestones)
+        ]
+        self.teams = [self._buildTeam(index) for index in range(settings.teams)]
+
+    @property
+    def organization(self) -> str:
+        return self.settings.organization
+
+    def teamName(self, index: int) -> str:
+        return f"Team {index + 1:03d}"
+
+    def _buildTeam(self, index: int) -> dict:
+        name = self.teamName(index)
+        slug = name.lower().replace(" ", "-")
+        members = [f"{slug}-dev{m + 1}" for m in range(self.settings.membersPerTeam)]
+        manager = f"{slug}-manager"
+        repository = {
+            "__typename": "Repository",
+            "name": f"{slug}-repo",
+            "nameWithOwner": f"{self.organization}/{slug}-repo",
+            "milestones": Connection(
+                [
+                    {
+                        "__typename": "Milestone",
+                        "title": milestone["title"],
+                        "url": f"https://github.com/{self.organization}/{slug}-repo/milestone/{m + 1}",
+                        "dueOn": isoformat(milestone["end"]),
+                    }
+                    for m, milestone in enumerate(self.milestones)
+                ]
+            ),
+        }
+        discussions = self._buildDiscussions(slug=slug, members=members)
+        repository["discussions"] = lambda arguments: Connection(
+            [
+                discussion
+                for discussion in discussions
+                if arguments.get("categoryId") is None
+                or discussion["category"]["id"] == arguments["categoryId"]
+            ]
+        )
+        project = {
+            "__typename": "ProjectV2",
+            "title": name,
+            "number": index + 1,
+            "public": True,
+            "url": f"https://github.com/orgs/{self.organization}/projects/{index + 1}",
+            "updatedAt": isoformat(self.milestones[-1]["end"]) if self.milestones else None,
+        }
+        project["items"] = Connection(
+            LazyItems(
+                self.settings.itemsPerProject,
+                lambda itemIndex: self._buildItem(
+                    slug=slug,
+                    members=members,
+                    manager=manager,
+                    project=project,
+                    index=itemIndex,
+                ),
+            )
+        )
+        return {
+            "__typename": "Team",
+            "name": name,
+            "slug": slug,
+            "memberLogins": members + [manager],
+            "maintainerLogins": ["github-classroom"],
+            "managers": [manager],
+            "members": Connection([user(login) for login in members + [manager]]),
+            "repositories": Connection([repository]),
+            "project": project,
+        }
+
+    def _buildDiscussions(self, *, slug: str, members: list[str]) -> list[dict]:
+        rng = random.Random(f"{self.settings.seed}-{slug}-discussions")
+        category = {"__typename": "DiscussionCategory", "id": "DIC_scrum", "name": "Scrum Prep"}
+        discussions = []
+        for milestone in self.milestones:
+            for week in range(self.settings.milestoneWeeks):
+                published = milestone["start"] + timedelta(weeks=week, hours=1)
+                for _ in range(self.settings.discussionsPerWeek):
+                    author = rng.choice(members)
+                    discussions.append(
+                        {
+                            "__typename": "Discussion",
+                            "author": user(author),
+                            "title": f"Scrum Prep {milestone['title']} - Week {week + 1}",
+                            "body": f"Progress update from {author}",
+                            "category": category,
+                            "publishedAt": isoformat(published),
+                            "updatedAt": isoformat(published),
+                            "comments": Connection(
+                                [
+                                    {
+                                        "__typename": "DiscussionComment",
+                                        "author": user(rng.choice(members)),
+                                        "body": "Thanks for the update!",
+                                        "publishedAt": isoformat(
+                                            published + timedelta(hours=rng.randint(1, 48))
+                                        ),
+                                    }
+                                    for _ in range(rng.randint(0, 3))
+                                ]
+                            ),
+                        }
+                    )
+        return discussions
+
+    def _buildItem(
+        self, *, slug: str, members: list[str], manager: str, project: dict, index: int
+    ) -> dict:
+        rng = random.Random(f"{self.settings.seed}-{slug}-item-{index}")
+        milestone = rng.choice(self.milestones)
+        span = (milestone["end"] - milestone["start"]).total_seconds()
+        createdAt = milestone["start"] + timedelta(seconds=rng.uniform(0, span * 0.8))
+        closed = rng.random() < 0.8
+        closedAt = createdAt + timedelta(hours=rng.uniform(2, 24 * 7)) if closed else None
+        assignees = rng.sample(members, k=rng.choice([1, 1, 1, 2]))
+        isLectureTopicTask = rng.random() < 0.05
+        title = f"{'[Lecture Topic Task] ' if isLectureTopicTask else ''}Task {index + 1}"
+        url = f"https://github.com/{self.organization}/{slug}-repo/issues/{index + 1}"
+
+        timeline = [
+            {
+                "__typename": "AssignedEvent",
+                "actor": user(manager),
+                "assignee": user(assignee),
+                "createdAt": isoformat(createdAt + timedelta(minutes=5)),
+            }
+            for assignee in assignees
+        ]
+        if closed and rng.random() < 0.5:
+            timeline.append(
+                {
+                    "__typename": "CrossReferencedEvent",
+                    "actor": user(assignees[0]),
+                    "createdAt": isoformat(closedAt - timedelta(hours=1)),
+                    "source": {
+                        "__typename": "PullRequest",
+                        "number": 10_000 + index,
+                        "title": f"Implement task {index + 1}",
+                        "state": "MERGED",
+                        "merged": True,
+                        "url": f"https://github.com/{self.organization}/{slug}-repo/pull/{10_000 + index}",
+                    },
+                }
+            )
+        if closed:
+            # Most issues are closed by the team's manager, as the scoring rules require
+            closer = manager if rng.random() < 0.9 else assignees[0]
+            timeline.append(
+                {"__typename": "ClosedEvent", "actor": user(closer), "createdAt": isoformat(closedAt)}
+            )
+
+        reactions = [
+            {"__typename": "Reaction", "content": "HOORAY", "user": user(login)}
+            for login in rng.sample(members, k=rng.randint(0, 2))
+        ]
+        comments = []
+        for commentIndex in range(rng.randint(0, 4)):
+            commentReactions = [
+                {"__typename": "Reaction", "content": "HOORAY", "user": user(login)}
+                for login in rng.sample(members, k=rng.randint(0, 1))
+            ]
+            comments.append(
+                {
+                    "__typename": "IssueComment",
+                    "id": f"IC_{slug}_{index}_{commentIndex}",
+                    "author": user(rng.choice(members + [manager])),
+                    "body": "Looks good",
+                    "reactions": lambda arguments, r=commentReactions: filterReactions(
+                        r, arguments
+                    ),
+                }
+            )
+        issue = {
+            "__typename": "Issue",
+            "id": f"I_{slug}_{index}",
+            "url": url,
+            "number": index + 1,
+            "title": title,
+            "author": user(rng.choice(members + [manager])),
+            "createdAt": isoformat(createdAt),
+            "closedAt": isoformat(closedAt) if closedAt else None,
+            "closed": closed,
+            "updatedAt": isoformat(closedAt or createdAt),
+            "repository": {
+                "__typename": "Repository",
+                "nameWithOwner": f"{self.organization}/{slug}-repo",
+            },
+            "milestone": {"__typename": "Milestone", "title": milestone["title"]},
+            "assignees": Connection([user(login) for login in assignees]),
+            "labels": Connection(
+                [
+                    {"__typename": "Label", "name": name}
+                    for name in rng.sample(label_names, k=rng.randint(0, 2))
+                ]
+                + ([{"__typename": "Label", "name": "Lecture Topic Task"}] if isLectureTopicTask else [])
+            ),
+            "reactions": lambda arguments: filterReactions(reactions, arguments),
+            "comments": Connection(comments),
+            "timelineItems": lambda arguments: Connection(
+                [
+                    event
+                    for event in timeline
+                    if not arguments.get("itemTypes")
+                    or event["__typename"]
+                    in {timeline_item_types.get(t) for t in arguments["itemTypes"]}
+                ]
+            ),
+        }
+        fields = {
+            "Urgency": None if rng.random() < 0.05 else rng.randint(1, 5),
+            "Difficulty": None if rng.random() < 0.05 else rng.randint(1, 5),
+            "Modifier": rng.choice([None] * 9 + [rng.randint(-2, 2)]),
+        }
+        # A few items are drafts, which the real API returns without Issue content
+        content = (
+            {"__typename": "DraftIssue", "title": title} if rng.random() < 0.02 else issue
+        )
+        item = {
+            "__typename": "ProjectV2Item",
+            "id": f"PVTI_{slug}_{index}",
+            "updatedAt": issue["updatedAt"],
+            "project": project,
+            "content": content,
+            "fieldValueByName": lambda arguments: numberField(fields.get(arguments.get("name"))),
+        }
+        issue["projectItems"] = Connection([item])
+        return item
+
+    def organizationObject(self, login: str) -> dict:
+        if login != self.organization:
+            raise GraphqlError(
+                f"Could not resolve to an Organization with the login of '{login}'.",
+                type="NOT_FOUND",
+            )
+        return {
+            "__typename": "Organization",
+            "login": login,
+            "teams": lambda arguments: Connection(self.findTeams(arguments)),
+            "projectsV2": lambda arguments: Connection(
+                [
+                    team["project"]
+                    for team in self.teams
+                    if (arguments.get("query") or "") in team["project"]["title"]
+                ]
+            ),
+            "projectV2": lambda arguments: self.findProject(arguments["number"]),
+        }
+
+    def findTeams(self, arguments: dict) -> list[dict]:
+        teams = self.teams
+        if arguments.get("query"):
+            query = arguments["query"].lower()
+            teams = [
+                team for team in teams if query in team["name"].lower() or query in team["slug"]
+            ]
+        if arguments.get("userLogins"):
+            logins = set(arguments["userLogins"])
+            teams = [
+                team
+                for team in teams
+                if logins & set(team["memberLogins"] + team["maintainerLogins"])
+            ]
+        return teams
+
+    def findProject(self, number: int) -> dict:
+        if not 1 <= number <= len(self.teams):
+            raise GraphqlError(
+                f"Could not resolve to a ProjectV2 with the number {number}.",
+                type="NOT_FOUND",
+            )
+        return self.teams[number - 1]["project"]
+
+    def findNode(self, nodeId: str) -> dict | None:
+        """
+        Resolves the id of a project item, an issue or an issue comment, like the root
+        `node(id:)` and `nodes(ids:)` fields do.
+        """
+        kind, _, rest = nodeId.partition("_")
+        comment = None
+        if kind == "IC":
+            rest, _, comment = rest.rpartition("_")
+        slug, _, index = rest.rpartition("_")
+        if not index.isdigit() or int(index) >= self.settings.itemsPerProject:
+            return None
+        for team in self.teams:
+            if team["slug"] != slug:
+                continue
+            item = team["project"]["items"].items[int(index)]
+            if kind == "PVTI":
+                return item
+            issue = item["content"]
+            if issue["__typename"] != "Issue":
+                return None
+            if kind == "I":
+                return issue
+            if kind == "IC" and comment.isdigit():
+                comments = issue["comments"].items
+                return comments[int(comment)] if int(comment) < len(comments) else None
+        return None
+
+    def search(self, arguments: dict) -> dict:
+        """
+        Resolves the root `search` field for the issue searches the scripts make:
+        `repo:`, `milestone:"..."` and `no:milestone` qualifiers, with GitHub's cap of
+        1000 reachable results.
+        """
+        query = arguments.get("query") or ""
+        repositories = set(re.findall(r"\brepo:(\S+)", query))
+        milestone = re.search(r'\bmilestone:"([^"]*)"', query)
+        withoutMilestone = "no:milestone" in query
+        matches = []
+        for team in self.teams:
+            if team["repositories"].items[0]["nameWithOwner"] not in repositories:
+                continue
+            for item in team["project"]["items"].items:
+                issue = item["content"]
+                if issue["__typename"] != "Issue":
+                    continue
+                title = (issue["milestone"] or {}).get("title")
+                if withoutMilestone and title is not None:
+                    continue
+                if milestone is not None and title != milestone.group(1):
+                    continue
+                matches.append(issue)
+        return {
+            "__typename": "SearchResultItemConnection",
+            "issueCount": len(matches),
+            **paginate(Connection(matches[:1000]), arguments),
+        }
+
+    def actionsConfig(self, teamIndex: int) -> dict:
+        """A v2 Actions config for one team, like exampleActionsConfig.json."""
+        team = self.teams[teamIndex]
+        return {
+            "version": "2.0",
+            "projectName": team["name"],
+            "managers": team["managers"],
+            "milestones": {
+                milestone["title"]: {
+                    "startDate": milestone["start"].date().isoformat(),
+                    "endDate": milestone["end"].date().isoformat(),
+                    "projectedGroupGrade": 100.0,
+                }
+                for milestone in self.milestones
+            },
+            "lectureTopicTaskQuota": 0,
+            "countOpenIssues": False,
+        }
+
+
+def filterReactions(reactions: list[dict], arguments: dict) -> Connection:
+    content = arguments.get("content")
+    return Connection(
+        [reaction for reaction in reactions if content is None or reaction["content"] == content]
+    )
+
+
+def numberField(value: int | None) -> dict | None:
+    if value is None:
+        return None
+    return {"__typename": "ProjectV2ItemFieldNumberValue", "number": value}
@@ -0,0 +1,367 @@
+"""
+A small GraphQL parser and executor covering the subset of the language our queries use:
+named operations with variables, aliases, arguments, inline fragments and `__typename`.
+
+Data is served from plain dictionaries. A field's value may be a callable, which is
+called with the field's arguments, and list values wrapped in Connection are paginated
+with GitHub's `first`/`last`/`after`/`before` cursor arguments.
+"""
+
+import base64
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+import re
+
+# GitHub's limits on a single call
+max_page_size = 100
+max_nodes_per_query = 500_000
+
+
+class GraphqlError(Exception):
+    """An error reported in the `errors` list of a response."""
+
+    def __init__(self, message: str, *, type: str | None = None):
+        super().__init__(message)
+        self.type = type
+
+    def toDict(self, path: list[str] | None = None) -> dict:
+        error: dict = {"message": str(self)}
+        if self.type is not None:
+            error["type"] = self.type
+        if path:
+            error["path"] = path
+        return error
+
+
+@dataclass
+class Variable:
+    name: str
+
+
+@dataclass
+class Field:
+    name: str
+    alias: str | None = None
+    arguments: dict = field(default_factory=dict)
+    selections: list | None = None
+
+    @property
+    def key(self) -> str:
+        return self.alias or self.name
+
+
+@dataclass
+class InlineFragment:
+    typeCondition: str
+    selections: list
+
+
+@dataclass
+class Operation:
+    name: str | None
+    variableNames: list[str]
+    selections: list
+    # Default values of the variables that declare one
+    variableDefaults: dict = field(default_factory=dict)
+
+
+class Connection:
+    """A paginated list field. `items` may be any sequence, including lazily built ones."""
+
+    def __init__(self, items: Sequence):
+        self.items = items
+
+
+_token_pattern = re.compile(
+    r"""
+    (?P<ignored>[\s,]+|\#[^\n]*)
+    | (?P<spread>\.\.\.)
+    | (?P<punctuator>[!$():=@\[\]{}|])
+    | (?P<string>"(?:[^"\\]|\\.)*")
+    | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+    """,
+    re.VERBOSE,
+)
+
+
+def tokenize(source: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = _token_pattern.match(source, position)
+        if match is None:
+            raise GraphqlError(f"Parse error on {source[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind != "ignored":
+            tokens.append((kind, match.group()))
+    return tokens
+
+
+class Parser:
+    def __init__(self, source: str):
+        self.tokens = tokenize(source)
+        self.position = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise GraphqlError("Parse error: unexpected end of document")
+        self.position += 1
+        return token
+
+    def expect(self, value: str) -> None:
+        _, text = self.next()
+        if text != value:
+            raise GraphqlError(f"Parse error: expected {value!r}, got {text!r}")
+
+    def accept(self, value: str) -> bool:
+        token = self.peek()
+        if token is not None and token[1] == value:
+            self.position += 1
+            return True
+        return False
+
+    def name(self) -> str:
+        kind, text = self.next()
+        if kind != "name":
+            raise GraphqlError(f"Parse error: expected a name, got {text!r}")
+        return text
+
+    def operation(self) -> Operation:
+        name = None
+        variableNames = []
+        variableDefaults = {}
+        if self.accept("query"):
+            token = self.peek()
+            if token is not None and token[0] == "name":
+                name = self.name()
+            if self.accept("("):
+                while not self.accept(")"):
+                    self.expect("$")
+                    variable = self.name()
+                    variableNames.append(variable)
+                    self.expect(":")
+                    self.type()
+                    if self.accept("="):
+                        variableDefaults[variable] = self.value()
+        selections = self.selectionSet()
+        if self.peek() is not None:
+            raise GraphqlError("Only single operation documents are supported")
+        return Operation(
+            name=name,
+            variableNames=variableNames,
+            selections=selections,
+            variableDefaults=variableDefaults,
+        )
+
+    def type(self) -> None:
+        if self.accept("["):
+            self.type()
+            self.expect("]")
+        else:
+            self.name()
+        self.accept("!")
+
+    def selectionSet(self) -> list:
+        self.expect("{")
+        selections: list = []
+        while not self.accept("}"):
+            if self.accept("..."):
+                self.expect("on")
+                typeCondition = self.name()
+                selections.append(InlineFragment(typeCondition, self.selectionSet()))
+                continue
+            alias = None
+            name = self.name()
+            if self.accept(":"):
+                alias, name = name, self.name()
+            arguments = {}
+            if self.accept("("):
+                while not self.accept(")"):
+                    argument = self.name()
+                    self.expect(":")
+                    arguments[argument] = self.value()
+            subselections = None
+            token = self.peek()
+            if token is not None and token[1] == "{":
+                subselections = self.selectionSet()
+            selections.append(Field(name, alias, arguments, subselections))
+        return selections
+
+    def value(self):
+        kind, text = self.next()
+        if text == "$":
+            return Variable(self.name())
+        if text == "[":
+            values = []
+            while not self.accept("]"):
+                values.append(self.value())
+            return values
+        if text == "{":
+            values = {}
+            while not self.accept("}"):
+                key = self.name()
+                self.expect(":")
+                values[key] = self.value()
+            return values
+        if kind == "string":
+            return bytes(text[1:-1], "utf-8").decode("unicode_escape")
+        if kind == "number":
+            return float(text) if re.search(r"[.eE]", text) else int(text)
+        if kind == "name":
+            return {"true": True, "false": False, "null": None}.get(text, text)
+        raise GraphqlError(f"Parse error: unexpected {text!r}")
+
+
+def parse(source: str) -> Operation:
+    return Parser(source).operation()
+
+
+def resolveValue(value, variables: dict):
+    if isinstance(value, Variable):
+        return variables.get(value.name)
+    if isinstance(value, list):
+        return [resolveValue(v, variables) for v in value]
+    if isinstance(value, dict):
+        return {k: resolveValue(v, variables) for k, v in value.items()}
+    return value
+
+
+def encodeCursor(index: int) -> str:
+    return base64.b64encode(f"cursor:{index}".encode()).decode()
+
+
+def decodeCursor(cursor: str) -> int:
+    try:
+        return int(base64.b64decode(cursor).decode().removeprefix("cursor:"))
+    except ValueError:
+        raise GraphqlError(f"`{cursor}` does not appear to be a valid cursor.")
+
+
+def paginate(connection: Connection, arguments: dict) -> dict:
+    """Slices a connection with the cursor arguments and wraps it like GitHub does."""
+    for limit in ("first", "last"):
+        count = arguments.get(limit)
+        if count is not None and not 0 <= count <= max_page_size:
+            raise GraphqlError(
+                f"Requesting {count} records on the connection exceeds the `{limit}` limit of {max_page_size} records."
+            )
+    total = len(connection.items)
+    start = 0
+    end = total
+    if arguments.get("after") is not None:
+        start = min(total, decodeCursor(arguments["after"]) + 1)
+    if arguments.get("before") is not None:
+        end = max(start, decodeCursor(arguments["before"]))
+    if arguments.get("first") is not None:
+        end = min(end, start + arguments["first"])
+    if arguments.get("last") is not None:
+        start = max(start, end - arguments["last"])
+    nodes = connection.items[start:end]
+    return {
+        "nodes": list(nodes),
+        "totalCount": total,
+        "pageInfo": {
+            "startCursor": encodeCursor(start) if end > start else None,
+            "endCursor": encodeCursor(end - 1) if end > start else None,
+            "hasNextPage": end < total,
+            "hasPreviousPage": start > 0,
+        },
+    }
+
+
+def estimateCost(selections: list, variables: dict) -> tuple[int, int]:
+    """
+    Estimates a query's rate limit cost and node count the way GitHub documents it.
+
+    Every connection needs as many requests as its parent connections can return
+    nodes; the cost is the total of those requests divided by 100 (at least 1), and the
+    node count is the total number of nodes every connection could return.
+
+    Returns:
+        tuple[int, int]: The cost in points and the number of nodes.
+    """
+    requests = 0
+    nodes = 0
+
+    def walk(selections: list, multiplier: int):
+        nonlocal requests, nodes
+        for selection in selections:
+            if isinstance(selection, InlineFragment):
+                walk(selection.selections, multiplier)
+                continue
+            if selection.selections is None:
+                continue
+            arguments = resolveValue(selection.arguments, variables)
+            pageSize = arguments.get("first") or arguments.get("last")
+            if pageSize is None:
+                walk(selection.selections, multiplier)
+                continue
+            requests += multiplier
+            nodes += multiplier * pageSize
+            walk(selection.selections, multiplier * pageSize)
+
+    walk(selections, 1)
+    return max(1, round(requests / 100)), nodes
+
+
+def execute(
+    operation: Operation, *, root: dict, variables: dict | None = None
+) -> tuple[dict, list[dict]]:
+    """
+    Executes a parsed operation against a root object.
+
+    Returns:
+        tuple[dict, list[dict]]: The response data and the list of errors.
+    """
+    variables = operation.variableDefaults | (variables or {})
+    errors: list[dict] = []
+
+    def executeSelections(selections: list, value: dict, path: list[str]) -> dict:
+        result: dict = {}
+        for selection in selections:
+            if isinstance(selection, InlineFragment):
+                if value.get("__typename") == selection.typeCondition:
+                    result.update(executeSelections(selection.selections, value, path))
+                continue
+            fieldPath = path + [selection.key]
+            if selection.name == "__typename":
+                result[selection.key] = value.get("__typename")
+                continue
+            if selection.name not in value:
+                errors.append(
+                    GraphqlError(
+                        f"Field '{selection.name}' doesn't exist on type '{value.get('__typename')}'"
+                    ).toDict(fieldPath)
+                )
+                result[selection.key] = None
+                continue
+            arguments = resolveValue(selection.arguments, variables)
+            try:
+                fieldValue = value[selection.name]
+                if callable(fieldValue):
+                    fieldValue = fieldValue(arguments)
+                if isinstance(fieldValue, Connection):
+                    fieldValue = paginate(fieldValue, arguments)
+            except GraphqlError as e:
+                errors.append(e.toDict(fieldPath))
+                result[selection.key] = None
+                continue
+            result[selection.key] = complete(fieldValue, selection, fieldPath)
+        return result
+
+    def complete(value, selection: Field, path: list[str]):
+        if value is None or selection.selections is None:
+            return value
+        if isinstance(value, dict):
+            return executeSelections(selection.selections, value, path)
+        if isinstance(value, (list, tuple)):
+            return [complete(item, selection, path) for item in value]
+        return value
+
+    return executeSelections(operation.selections, root, []), errors
@@ -0,0 +1,245 @@
+"""
+Local HTTP stand-in for GitHub's GraphQL endpoint, serving a synthetic Course.
+
+Point runGraphqlQuery at it with `GITHUB_GRAPHQL_URL=http://host:port/graphql`. Any
+bearer token is accepted; each token gets its own simulated rate limit budget.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import functools
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.fakeGithub.course import Course, isoformat
+from benchmarks.fakeGithub.graphql import (
+    GraphqlError,
+    estimateCost,
+    execute,
+    max_nodes_per_query,
+    parse,
+)
+
+
+@dataclass(kw_only=True)
+class ServerSettings:
+    # Seconds every request takes, plus up to `jitter` more
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Primary limit: points per token per window, like GitHub's 5,000 points per hour
+    pointsPerWindow: int = 5000
+    windowSeconds: float = 3600.0
+    # Fraction of requests answered with a 502, to exercise retries
+    failureRate: float = 0.0
+    # Queries asking for more possible nodes than this fail with GitHub's timeout error,
+    # to exercise adaptive page sizes. None never times out.
+    timeoutNodes: int | None = None
+
+
+class RateLimitBudget:
+    """Per token point budgets that reset every window, like GitHub's primary limit."""
+
+    def __init__(self, *, points: int, windowSeconds: float, clock=time.time):
+        self.points = points
+        self.windowSeconds = windowSeconds
+        self.clock = clock
+        self._used: dict[str, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def spend(self, token: str, cost: int) -> tuple[bool, int, float]:
+        """
+        Spends `cost` points of a token's budget if it has them.
+
+        Returns:
+            tuple[bool, int, float]: Whether the points were spent, the points left and
+                the unix time the budget resets at.
+        """
+        with self._lock:
+            now = self.clock()
+            resetAt, used = self._used.get(token, (now + self.windowSeconds, 0))
+            if now >= resetAt:
+                resetAt, used = now + self.windowSeconds, 0
+            allowed = used + cost <= self.points
+            if allowed:
+                used += cost
+            self._used[token] = (resetAt, used)
+            return allowed, self.points - used, resetAt
+
+
+@functools.lru_cache(maxsize=256)
+def parseCached(query: str):
+    return parse(query)
+
+
+def makeHandler(course: Course, settings: ServerSettings, budget: RateLimitBudget):
+    class FakeGithubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if settings.latency or settings.jitter:
+                time.sleep(settings.latency + random.uniform(0, settings.jitter))
+            authorization = self.headers.get("Authorization", "")
+            if not authorization.lower().startswith("bearer ") or not authorization[7:].strip():
+                self.respond(401, {"message": "Bad credentials"})
+                return
+            if settings.failureRate and random.random() < settings.failureRate:
+                self.respond(502, {"message": "Server Error"})
+                return
+            try:
+                request = json.loads(body)
+                operation = parseCached(request["query"])
+            except (ValueError, KeyError, GraphqlError) as e:
+                self.respond(200, {"errors": [{"message": str(e)}]})
+                return
+            variables = operation.variableDefaults | (request.get("variables") or {})
+            cost, nodes = estimateCost(operation.selections, variables)
+            if settings.timeoutNodes is not None and nodes > settings.timeoutNodes:
+                self.respond(
+                    200,
+                    {
+                        "data": None,
+                        "errors": [
+                            {
+                                "message": "Something went wrong while executing your query. This may be the result of a timeout, or it could be a GitHub bug. Please include `FAKE` when reporting this issue."
+                            }
+                        ],
+                    },
+                )
+                return
+            if nodes > max_nodes_per_query:
+                self.respond(
+                    200,
+                    {
+                        "errors": [
+                            {
+                                "type": "MAX_NODE_LIMIT_EXCEEDED",
+                                "message": f"This query requests up to {nodes} possible nodes which exceeds the maximum limit of {max_nodes_per_query}.",
+                            }
+                        ]
+                    },
+                )
+                return
+            allowed, remaining, resetAt = budget.spend(authorization[7:].strip(), cost)
+            headers = {
+                "X-RateLimit-Limit": str(budget.points),
+                "X-RateLimit-Remaining": str(max(0, remaining)),
+                "X-RateLimit-Used": str(budget.points - remaining),
+                "X-RateLimit-Reset": str(int(resetAt)),
+            }
+            if not allowed:
+                self.respond(
+                    200,
+                    {
+                        "errors": [
+                            {
+                                "type": "RATE_LIMITED",
+                                "message": "API rate limit exceeded for user.",
+                            }
+                        ]
+                    },
+                    headers,
+                )
+                return
+            root = {
+                "organization": lambda arguments: course.organizationObject(
+                    arguments.get("login")
+                ),
+                "search": course.search,
+                "node": lambda arguments: course.findNode(arguments.get("id") or ""),
+                "nodes": lambda arguments: [
+                    course.findNode(nodeId) for nodeId in arguments.get("ids") or []
+                ],
+                "rateLimit": {
+                    "__typename": "RateLimit",
+                    "cost": cost,
+                    "limit": budget.points,
+                    "remaining": remaining,
+                    "used": budget.points - remaining,
+                    "nodeCount": nodes,
+                    "resetAt": isoformat(datetime.fromtimestamp(resetAt, tz=timezone.utc)),
+                },
+            }
+            data, errors = execute(operation, root=root, variables=variables)
+            response: dict = {"data": data}
+            if errors:
+                response["errors"] = errors
+            self.respond(200, response, headers)
+
+        def respond(self, status: int, body: dict, headers: dict | None = None):
+            payload = json.dumps(body).encode()
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                payload = gzip.compress(payload, compresslevel=1)
+                encoding = "gzip"
+            else:
+                encoding = None
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return FakeGithubHandler
+
+
+class FakeGithubServer:
+    """
+    Serves a course over HTTP from a background thread.
+
+    Args:
+        course (Course): The synthetic course to serve.
+        settings (ServerSettings): Latency, rate limit and failure simulation.
+        host (str): Interface to listen on.
+        port (int): Port to listen on. 0 picks a free port.
+    """
+
+    def __init__(
+        self,
+        course: Course,
+        settings: ServerSettings | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.course = course
+        self.settings = settings if settings is not None else ServerSettings()
+        self.budget = RateLimitBudget(
+            points=self.settings.pointsPerWindow,
+            windowSeconds=self.settings.windowSeconds,
+        )
+        self.httpServer = ThreadingHTTPServer(
+            (host, port), makeHandler(course, self.settings, self.budget)
+        )
+        self.httpServer.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpServer.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def start(self) -> "FakeGithubServer":
+        self._thread = threading.Thread(target=self.httpServer.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpServer.shutdown()
+        self.httpServer.server_close()
+
+    def __enter__(self) -> "FakeGithubServer":
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
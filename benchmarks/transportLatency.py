@@ -0,0 +1,201 @@
+"""
+Compares per-page latency of the old one-connection-per-request behavior of
+runGraphqlQuery against the pooled transport, using a local stand-in server.
+
+The stand-in server answers every POST with the same project items page and can
+simulate the cost of opening a connection (TCP + TLS handshake round trips) and the
+server's processing time per page.
+
+Usage:
+    poetry run python -m benchmarks.transportLatency --pages 200 --handshake-ms 40
+    poetry run python -m benchmarks.transportLatency --tls  # requires the openssl CLI
+"""
+
+import argparse
+import gzip
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.utils.queryRunner import runGraphqlQuery
+from src.utils.transport import GraphqlTransport, setTransport
+
+
+def buildItemsPage(items: int) -> dict:
+    node = {
+        "content": {
+            "url": "https://github.com/org/repo/issues/1",
+            "number": 1,
+            "title": "Benchmark Issue",
+            "author": {"login": "dev1"},
+            "createdAt": "2024-01-01T00:00:00Z",
+            "closedAt": "2024-01-02T00:00:00Z",
+            "closed": True,
+            "milestone": {"title": "Milestone #1"},
+            "assignees": {"nodes": [{"login": "dev1"}]},
+            "labels": {"nodes": [{"name": "bug"}]},
+            "reactions": {"nodes": []},
+            "comments": {"nodes": [{"author": {"login": "dev2"}, "reactions": {"nodes": []}}] * 5},
+            "timelineItems": {"nodes": [{"actor": {"login": "manager1"}, "createdAt": "2024-01-02T00:00:00Z"}]},
+        },
+        "Urgency": {"number": 3},
+        "Difficulty": {"number": 2},
+        "Modifier": None,
+    }
+    return {
+        "data": {
+            "organization": {
+                "projectV2": {
+                    "title": "Benchmark",
+                    "items": {
+                        "pageInfo": {"endCursor": "cursor", "hasNextPage": True},
+                        "nodes": [node] * items,
+                    },
+                }
+            }
+        }
+    }
+
+
+def makeHandler(*, body: bytes, handshakeDelay: float, pageDelay: float):
+    gzippedBody = gzip.compress(body)
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, so Nagle would add delayed-ACK stalls
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Called once per accepted connection, so this models the handshake cost
+            time.sleep(handshakeDelay)
+            super().setup()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(pageDelay)
+            payload = body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                payload = gzippedBody
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def makeSelfSignedCert(directory: str) -> tuple[str, str]:
+    certPath = os.path.join(directory, "cert.pem")
+    keyPath = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", keyPath, "-out", certPath, "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certPath, keyPath
+
+
+def summarize(label: str, latencies: list[float]):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<24} mean {statistics.mean(ordered) * 1000:7.2f} ms"
+        f" | median {statistics.median(ordered) * 1000:7.2f} ms"
+        f" | p95 {p95 * 1000:7.2f} ms"
+        f" | total {sum(ordered):6.2f} s"
+    )
+
+
+def runBenchmark(*, pages: int, items: int, handshakeMs: float, pageMs: float, tls: bool):
+    body = json.dumps(buildItemsPage(items)).encode()
+    handler = makeHandler(
+        body=body, handshakeDelay=handshakeMs / 1000, pageDelay=pageMs / 1000
+    )
+    server = ThreadingHTTPServer(("localhost", 0), handler)
+    scheme = "http"
+    verify: bool | str = True
+    with tempfile.TemporaryDirectory() as certDir:
+        if tls:
+            certPath, keyPath = makeSelfSignedCert(certDir)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certPath, keyPath)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+            scheme = "https"
+            verify = certPath
+        url = f"{scheme}://localhost:{server.server_address[1]}/graphql"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ.setdefault("GITHUB_API_TOKEN", "benchmark-token")
+        print(
+            f"{pages} pages of {items} items ({len(body) / 1024:.0f} KiB) from {url},"
+            f" {handshakeMs} ms per handshake, {pageMs} ms per page"
+        )
+
+        # Before: a brand new session and connection for every page, as requests.post does
+        before = []
+        for _ in range(pages):
+            start = time.perf_counter()
+            session = requests.Session()
+            session.trust_env = False
+            response = session.post(
+                url,
+                headers={"Authorization": "bearer benchmark-token"},
+                json={"query": "query { benchmark }", "variables": {}},
+                verify=verify,
+            )
+            response.json()
+            session.close()
+            before.append(time.perf_counter() - start)
+
+        # After: every page goes through runGraphqlQuery and the pooled transport
+        transport = GraphqlTransport(url=url, poolSize=4, timeout=30)
+        transport.session.verify = verify
+        # Keep REQUESTS_CA_BUNDLE and proxy settings from overriding the local certificate
+        transport.session.trust_env = False
+        previous = setTransport(transport)
+        after = []
+        try:
+            for _ in range(pages):
+                start = time.perf_counter()
+                runGraphqlQuery(query="query { benchmark }", variables={})
+                after.append(time.perf_counter() - start)
+        finally:
+            setTransport(previous)
+            transport.close()
+            server.shutdown()
+
+    summarize("requests.post per page", before)
+    summarize("pooled transport", after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    parser.add_argument("--page-ms", type=float, default=5.0)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+    runBenchmark(
+        pages=args.pages,
+        items=args.items,
+        handshakeMs=args.handshake_ms,
+        pageMs=args.page_ms,
+        tls=args.tls,
+    )
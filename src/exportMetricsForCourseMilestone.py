@@ -4,12 +4,15 @@ import logging
 from datetime import datetime
 
 from dotenv import load_dotenv
-from src.utils.constants import pr_tz
+from src.utils.constants import getTeamWorkers, pr_tz
 from src.generateTeamMetrics import getTeamMetricsForMilestone
-from src.getTeamMembers import getTeamMembers
+from src.getMilestones import getMilestonesBatch
+from src.getProject import getProject, getProjectsBatch
+from src.getTeamMembers import getTeamMembers, getTeamMembersBatch
 
-from src.utils.models import MilestoneData
+from src.utils.models import IssueFields, MilestoneData
 from src.utils.parseDateTime import get_milestone_start, get_milestone_end
+from src.utils.teamExecutor import runForTeams
 
 
 def writeMilestoneToCsv(milestone_data: MilestoneData, csv_file_path: str):
@@ -74,22 +77,34 @@ if __name__ == "__main__":
 
         print("Organization: ", organization)
 
-        team_metrics = {}
-        for team, teamdata in teams_and_teamdata.items():
-            print("Team: ", team)
-            print("Managers: ", teamdata["managers"])
+        # One aliased request per lookup kind instead of three round trips per team.
+        # They only fill the run's metadata cache: each team reads its own entries in
+        # exportTeam, so a team whose lookups fail only fails that team's export
+        teams = list(teams_and_teamdata)
+        try:
+            getTeamMembersBatch(organization, teams)
+            getProjectsBatch(organization=organization, project_names=teams)
+            getMilestonesBatch(organization=organization, teams=teams)
+        except Exception as e:
+            print(f"Batched lookups failed, looking teams up one at a time: {e}")
+
+        def exportTeam(team: str) -> MilestoneData:
+            teamdata = teams_and_teamdata[team]
             milestone = teamdata["milestone"]
-            print("Milestone: ", milestone)
-            members = getTeamMembers(organization, team)
+            # Teams run in parallel, so their console lines are tagged with the team
+            print(
+                f"[{team}] Managers: {teamdata['managers']}, Milestone: {milestone}"
+            )
             loggingLevels = [logging.ERROR, logging.INFO, logging.DEBUG]
             configVerbosity = int(teamdata.get("verbosity", 1))
             if configVerbosity < 0 or configVerbosity >= len(loggingLevels):
                 print(
-                    f"Verbosity value must be within [0, {len(loggingLevels)}). Default value 1 will be used."
+                    f"[{team}] Verbosity value must be within [0, {len(loggingLevels)}). Default value 1 will be used."
                 )
                 configVerbosity = 1
             verbosity = loggingLevels[configVerbosity]
-            logger = logging.getLogger(milestone)
+            # One logger per team, so each team's log file only gets that team's messages
+            logger = logging.getLogger(f"{milestone}.{team}")
             logger.setLevel(verbosity)
             logFileName = f"{milestone}-{team}-{organization}.log"
             logFileHandler = logging.FileHandler(logFileName)
@@ -97,24 +112,48 @@ if __name__ == "__main__":
             logFileHandler.setFormatter(formatter)
             logger.addHandler(logFileHandler)
 
-            team_metrics[team] = getTeamMetricsForMilestone(
-                org=organization,
-                team=team,
-                milestone=teamdata["milestone"],
-                milestoneGrade=teamdata["milestoneGrade"],
-                members=members,
-                managers=[manager["name"] for manager in teamdata["managers"]],
-                startDate=startDate,
-                endDate=endDate,
-                useDecay=useDecay,
-                sprints=config_dict.get("sprints", 2),
-                minTasksPerSprint=config_dict.get("minTasksPerSprint", 1),
-                shouldCountOpenIssues=config_dict.get("countOpenIssues", False),
-                issuePreProcessingHooks=teamdata.get("issuePreProcessingHooks", []),
-                logger=logger,
-            )
-            os.makedirs(metricsDirectory, exist_ok=True)
-            writeMilestoneToCsv(
-                team_metrics[team],
-                f"{metricsDirectory}/{teamdata['milestone']}-{team}-{organization}.csv",
-            )
+            hooks = teamdata.get("issuePreProcessingHooks", [])
+            try:
+                milestone_data = getTeamMetricsForMilestone(
+                    org=organization,
+                    team=team,
+                    milestone=teamdata["milestone"],
+                    milestoneGrade=teamdata["milestoneGrade"],
+                    members=getTeamMembers(organization, team),
+                    managers=[manager["name"] for manager in teamdata["managers"]],
+                    startDate=startDate,
+                    endDate=endDate,
+                    useDecay=useDecay,
+                    sprints=config_dict.get("sprints", 2),
+                    minTasksPerSprint=config_dict.get("minTasksPerSprint", 1),
+                    shouldCountOpenIssues=config_dict.get("countOpenIssues", False),
+                    issuePreProcessingHooks=hooks,
+                    logger=logger,
+                    project=getProject(organization=organization, project_name=team),
+                    # The CSV only has the scores, but hooks may read any field
+                    issueFields=IssueFields.FULL if hooks else IssueFields.SCORING,
+                )
+                os.makedirs(metricsDirectory, exist_ok=True)
+                writeMilestoneToCsv(
+                    milestone_data,
+                    f"{metricsDirectory}/{teamdata['milestone']}-{team}-{organization}.csv",
+                )
+            except Exception as e:
+                logger.exception(e)
+                raise
+            finally:
+                logger.removeHandler(logFileHandler)
+                logFileHandler.close()
+            return milestone_data
+
+        outcome = runForTeams(
+            teams,
+            exportTeam,
+            maxWorkers=config_dict.get("teamWorkers", getTeamWorkers()),
+        )
+        team_metrics = outcome.results
+        print(f"Exported {len(outcome.results)} of {len(teams)} teams")
+        for team, error in outcome.errors.items():
+            print(f"[{team}] Failed: {type(error).__name__}: {error}")
+        if outcome.errors:
+            exit(1)
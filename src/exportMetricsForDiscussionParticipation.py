@@ -3,7 +3,7 @@ from datetime import datetime
 import json
 
 from dotenv import load_dotenv
-from src.getTeamMembers import getTeamMembers
+from src.getTeamMembers import getTeamMembers, getTeamMembersBatch
 
 from src.utils.discussions import (
     calculateWeeklyDiscussionPenalties,
@@ -49,10 +49,15 @@ if __name__ == "__main__":
     endDate = get_milestone_end(course_data["milestoneEndsOn"])
     teams = course_data["teams"]
     print("Organization: ", course_data["organization"])
+    members_by_team = getTeamMembersBatch(organization, list(teams))
     for team, team_data in teams.items():
         print("Team: ", team)
         print("Managers: ", team_data["managers"])
-        members = getTeamMembers(organization, team)
+        if team in members_by_team:
+            members = members_by_team[team]
+        else:
+            # Left out of the batch because it failed; raises why for this team
+            members = getTeamMembers(organization, team)
         milestone = team_data["milestone"]
         discussionParticipation = findWeeklyDiscussionParticipation(
             members=set(members),
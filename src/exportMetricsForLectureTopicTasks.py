@@ -4,7 +4,8 @@ import logging
 
 from dotenv import load_dotenv
 from src.generateLectureTopicTaskMetrics import getLectureTopicTaskMetrics
-from src.getTeamMembers import getTeamMembers
+from src.getProject import getProjectsBatch
+from src.getTeamMembers import getTeamMembers, getTeamMembersBatch
 
 from src.utils.models import LectureTopicTaskData
 
@@ -54,12 +55,18 @@ if __name__ == "__main__":
     teams = course_data["teams"]
     lecture_topic_task_quota = course_data["lectureTopicTaskQuota"]
     print("Organization: ", course_data["organization"])
+    members_by_team = getTeamMembersBatch(organization, list(teams))
+    projects_by_team = getProjectsBatch(organization=organization, project_names=list(teams))
     lecture_topic_task_metrics_by_team = {}
     for team, team_data in teams.items():
         print("Team: ", team)
         managers = [manager["name"] for manager in team_data["managers"]]
         print("Managers: ", managers)
-        members = getTeamMembers(organization, team)
+        if team in members_by_team:
+            members = members_by_team[team]
+        else:
+            # Left out of the batch because it failed; raises why for this team
+            members = getTeamMembers(organization, team)
         milestone = team_data["milestone"]
         print("Milestone: ", milestone)
         loggingLevels = [logging.ERROR, logging.INFO, logging.DEBUG]
@@ -84,6 +91,8 @@ if __name__ == "__main__":
             managers=managers,
             shouldCountOpenIssues=course_data.get("countOpenIssues", False),
             logger=logger,
+            # Looked up by getLectureTopicTaskMetrics if it was left out of the batch
+            project=projects_by_team.get(team),
         )
         os.makedirs(metricsDirectory, exist_ok=True)
         write_lecture_topic_task_data_to_csv(
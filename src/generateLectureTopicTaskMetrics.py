@@ -3,7 +3,7 @@ from src.generateTeamMetrics import (
     fetchProcessedIssues,
     getLectureTopicTaskMetricsFromIssues,
 )
-from src.utils.models import LectureTopicTaskData
+from src.utils.models import IssueFields, LectureTopicTaskData, Project
 
 
 def getLectureTopicTaskMetrics(
@@ -13,6 +13,7 @@ def getLectureTopicTaskMetrics(
     managers: list[str],
     logger: logging.Logger | None = None,
     shouldCountOpenIssues: bool = False,
+    project: Project | None = None,
 ) -> LectureTopicTaskData:
     if logger is None:
         logger = logging.getLogger(__name__)
@@ -23,6 +24,8 @@ def getLectureTopicTaskMetrics(
             logger=logger,
             managers=managers,
             shouldCountOpenIssues=shouldCountOpenIssues,
+            project=project,
+            issueFields=IssueFields.LECTURE_TOPIC_TASKS,
         ),
         members=members,
         logger=logger,
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 import json
 import os
@@ -5,7 +6,11 @@ import logging
 import sys
 from typing import Any
 from dotenv import load_dotenv
-from src.generateTeamMetrics import getTeamMetricsForMilestone
+from src.generateTeamMetrics import (
+    fetchProjectSnapshotAsync,
+    getTeamMetricsForMilestones,
+    validateMilestoneParameters,
+)
 from src.io.markdown import (
     writeLogsToMarkdown,
     writeMilestoneToMarkdown,
@@ -15,14 +20,17 @@ from src.io.markdown import (
 )
 from src.io.charts import writeCycleLeadTimeChart, writeIndexPage, getChartUrl, writeCumulativeTimelineChart
 from src.legacy.generateMilestoneMetricsForActions import generateMetricsFromV1Config
+from src.utils.changeProbe import RunState, probeTeamActivity, sprintMarkers
 from src.utils.constants import pr_tz
 from src.getTeamMembers import getTeamMembers
-from src.utils.discussions import (
-    findWeeklyDiscussionParticipation,
-    getDiscussions,
-    getWeeks,
+from src.utils.discussions import findWeeklyDiscussionParticipation, getWeeks
+from src.utils.models import (
+    IssueFields,
+    MilestoneConfig,
+    MilestoneData,
+    ProjectSnapshot,
 )
-from src.utils.models import MilestoneData
+from src.utils.responseCache import getResponseCache
 from src.utils.parseDateTime import (
     get_milestone_start,
     get_milestone_end,
@@ -33,7 +41,7 @@ import argparse
 
 
 def generateMetricsFromV2Config(
-    config: dict[str, Any], optimize_milestone_fetch: bool = False
+    config: dict[str, Any], optimize_milestone_fetch: bool = False, force: bool = False
 ):
     team = config["projectName"]
     organization = os.environ["ORGANIZATION"]
@@ -58,6 +66,8 @@ def generateMetricsFromV2Config(
         configVerbosity = 1
     verbosity = loggingLevels[configVerbosity]
 
+    # Set when only the current milestone is scored, so only its issues are fetched
+    searchedMilestone: str | None = None
     if optimize_milestone_fetch:
         milestone = auto_extract_milestone(
             datetime.now(tz=pr_tz).date(),
@@ -68,9 +78,13 @@ def generateMetricsFromV2Config(
         )
         if milestone is not None:
             milestones = {milestone: milestones[milestone]}
+            searchedMilestone = milestone
 
     print("Milestones: ", ", ".join(milestones.keys()))
     chart_files: list[tuple[str, str]] = []
+    outputs: list[str] = []
+    loggers: dict[str, logging.Logger] = {}
+    milestoneConfigs: dict[str, MilestoneConfig] = {}
     for milestone, mData in milestones.items():
         logger = logging.getLogger(milestone)
         logger.setLevel(verbosity)
@@ -79,6 +93,7 @@ def generateMetricsFromV2Config(
         formatter = logging.Formatter("%(levelname)s: %(message)s")
         logFileHandler.setFormatter(formatter)
         logger.addHandler(logFileHandler)
+        loggers[milestone] = logger
 
         try:
             startDate = get_milestone_start(mData.get("startDate"))
@@ -96,34 +111,108 @@ def generateMetricsFromV2Config(
             startDate = datetime.now(tz=pr_tz)
             endDate = datetime.now(tz=pr_tz)
             useDecay = False
-        team_metrics = MilestoneData()
-        discussionParticipation = {}
+        milestoneConfigs[milestone] = MilestoneConfig(
+            startDate=startDate,
+            endDate=endDate,
+            milestoneGrade=mData.get("projectedGroupGrade", 100.0),
+            useDecay=useDecay,
+        )
+
+    # A cheap probe of the project and discussions tells whether anything the reports are
+    # built from moved since the last successful run
+    runState = RunState.forTeam(org=organization, team=team)
+    fingerprint: dict | None = None
+    if runState is not None:
         try:
-            team_metrics = getTeamMetricsForMilestone(
+            fingerprint = {
+                "activity": probeTeamActivity(org=organization, team=team),
+                "config": config,
+                "members": sorted(members),
+                "milestones": list(milestones),
+                "sprints": sprintMarkers(
+                    milestoneConfigs,
+                    sprints=config.get("sprints", 2),
+                    now=datetime.now(tz=pr_tz),
+                ),
+            }
+        except Exception as e:
+            print(f"Warning: change probe failed, generating every report: {e}")
+        if fingerprint is not None and not force and runState.matches(fingerprint):
+            restored = runState.restoreOutputs()
+            print(
+                f"Nothing changed since the last run, reusing its {len(restored)} outputs"
+            )
+            return
+
+    # Fetch the project, milestones and discussions once; every milestone is scored from
+    # this snapshot so the API cost doesn't grow with the number of milestones
+    snapshot: ProjectSnapshot | None = None
+    snapshotError: Exception | None = None
+    try:
+        snapshot = asyncio.run(
+            fetchProjectSnapshotAsync(
                 org=organization,
                 team=team,
-                milestone=milestone,
-                milestoneGrade=mData.get("projectedGroupGrade", 100.0),
-                members=members,
-                managers=managers,
-                startDate=startDate,
-                endDate=endDate,
-                useDecay=useDecay,
-                sprints=config.get("sprints", 2),
-                minTasksPerSprint=config.get("minTasksPerSprint", 1),
-                shouldCountOpenIssues=config.get("countOpenIssues", False),
-                logger=logger,
+                includeDiscussions=True,
+                milestone=searchedMilestone,
+                # The reports chart cycle times, but not the referencing pull requests
+                issueFields=IssueFields.CYCLE_TIME,
             )
-            discussionParticipation = findWeeklyDiscussionParticipation(
-                members=set(members),
-                discussions=getDiscussions(org=organization, team=team),
-                milestone=milestone,
-                milestoneStart=startDate,
-                milestoneEnd=endDate,
-                logger=logger,
+        )
+    except Exception as e:
+        snapshotError = e
+
+    # Score every milestone in a single pass over the project's issues
+    scoredConfigs: dict[str, MilestoneConfig] = {}
+    for milestone, milestoneConfig in milestoneConfigs.items():
+        try:
+            validateMilestoneParameters(
+                sprints=config.get("sprints", 2),
+                startDate=milestoneConfig.startDate,
+                endDate=milestoneConfig.endDate,
             )
+            scoredConfigs[milestone] = milestoneConfig
         except Exception as e:
-            logger.exception(e)
+            loggers[milestone].exception(e)
+    metricsByMilestone: dict[str, MilestoneData] = {}
+    try:
+        if snapshot is None:
+            raise snapshotError
+        metricsByMilestone = getTeamMetricsForMilestones(
+            org=organization,
+            team=team,
+            milestones=scoredConfigs,
+            members=members,
+            managers=managers,
+            sprints=config.get("sprints", 2),
+            minTasksPerSprint=config.get("minTasksPerSprint", 1),
+            shouldCountOpenIssues=config.get("countOpenIssues", False),
+            loggers=loggers,
+            snapshot=snapshot,
+        )
+    except Exception as e:
+        for milestone in scoredConfigs:
+            loggers[milestone].exception(e)
+
+    for milestone, milestoneConfig in milestoneConfigs.items():
+        logger = loggers[milestone]
+        logFileName = f"{milestone}-{team}-{organization}.log"
+        startDate = milestoneConfig.startDate
+        endDate = milestoneConfig.endDate
+        team_metrics = metricsByMilestone.get(milestone, MilestoneData())
+        discussionParticipation = {}
+        if milestone in metricsByMilestone and snapshot is not None:
+            try:
+                discussionParticipation = findWeeklyDiscussionParticipation(
+                    members=set(members),
+                    discussions=snapshot.discussions,
+                    milestone=milestone,
+                    milestoneStart=startDate,
+                    milestoneEnd=endDate,
+                    logger=logger,
+                )
+            except Exception as e:
+                logger.exception(e)
         strippedMilestoneName = milestone.replace(" ", "")
         output_markdown_path = f"{strippedMilestoneName}-{team}-{organization}.md"
         writeMilestoneToMarkdown(
@@ -174,6 +263,7 @@ def generateMetricsFromV2Config(
             logger.info(f"Timeline chart link added to Markdown report: {timeline_url}")
         chart_files.append((milestone, output_chart_path))
         chart_files.append((f"{milestone} - Timeline", output_timeline_path))
+        outputs.extend([output_markdown_path, output_chart_path, output_timeline_path])
 
     # Generate index page listing all chart files
     if chart_files:
@@ -182,6 +272,16 @@ def generateMetricsFromV2Config(
             index_file_path="index.html",
             logger=logging.getLogger(__name__),
         )
+        outputs.append("index.html")
+
+    # Only complete reports are worth reusing
+    if (
+        runState is not None
+        and fingerprint is not None
+        and snapshot is not None
+        and len(metricsByMilestone) == len(milestoneConfigs)
+    ):
+        runState.record(fingerprint, outputs)
 
 
 if __name__ == "__main__":
@@ -194,6 +294,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--no-optimize-milestone-fetch", action="store_false", default=True
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="generate the reports even if nothing changed since the last run",
+    )
     args = parser.parse_args()
     course_config_file = args.course_config_file
     with open(course_config_file) as course_config:
@@ -205,4 +310,8 @@ if __name__ == "__main__":
         generateMetricsFromV2Config(
             config=course_data,
             optimize_milestone_fetch=args.no_optimize_milestone_fetch,
+            force=args.force,
         )
+    responseCache = getResponseCache()
+    if responseCache is not None:
+        print(responseCache.summary())
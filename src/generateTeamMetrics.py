@@ -1,46 +1,55 @@
-from collections.abc import Iterator, ValuesView
+import asyncio
+import copy
+import functools
+from collections.abc import AsyncIterator, Iterable, Iterator, ValuesView
 import logging
 from datetime import datetime
-from queue import Queue
-from threading import Thread
-from src.getMilestones import getMilestones
-from src.getProject import getProject
-from src.utils.constants import pr_tz
+from src.getMilestones import getMilestones, getMilestonesAsync
+from src.getProject import getProject, getProjectAsync
+from src.getTeamMembers import getTeamMembersAsync
+from src.getTeamRepositories import getTeamRepositories, getTeamRepositoriesAsync
+from src.utils.asyncQueryRunner import runGraphqlQueryAsync
+from src.utils.checkpoints import PageCheckpoint
+from src.utils.constants import getIncrementalSyncEnabled, pr_tz
+from src.utils.discussions import getDiscussionsAsync
 from src.utils.issues import (
     applyIssuePreProcessingHooks,
     calculateIssueScores,
     parseIssue,
     shouldCountIssue,
 )
+from src.utils.issueStore import IssueStore, getIssueStore
+from src.utils.itemStore import ProjectItemStore, itemVersion
 from src.utils.models import (
     DeveloperMetrics,
+    Discussion,
     Issue,
+    IssueContribution,
+    IssueFields,
     LectureTopicTaskData,
+    Milestone,
+    MilestoneConfig,
     MilestoneData,
     ParsingError,
+    Project,
+    ProjectSnapshot,
 )
+from src.utils.pageSizes import AdaptivePageSize
+from src.utils.parsedIssues import ParsedIssueCache, rawItemFingerprint
+from src.utils.pagination import (
+    paginateConnection,
+    paginateConnectionAsync,
+    prefetchNodes,
+)
+from src.utils.queryBatcher import runBatchedQuery
 from src.utils.queryRunner import runGraphqlQuery
-from concurrent.futures import ThreadPoolExecutor
+from src.utils.scoreLedger import ScoreLedger, ScoringLogRecorder, issueFingerprint
 
 # Check out https://docs.github.com/en/graphql/guides/introduction-to-graphql#schema to understand this query better
-get_team_issues = """
-query QueryProjectItemsForTeam(
-  $owner: String!
-  $projectNumber: Int!
-  $nextPage: String
-) {
-    organization(login: $owner) {
-        projectV2(number: $projectNumber
-        ) {
-            title
-            items(first: 100, after: $nextPage) {
-                pageInfo {
-                    endCursor
-                    hasNextPage
-                }
-                nodes {
-                    content {
-                    ... on Issue {
+# Fields of the issue behind every project item, whatever the field profile. Nested
+# connections carry their pageInfo so the few that get truncated can be completed later
+issue_core_fields = """
+                        id
                         url
                         number
                         title
@@ -50,48 +59,89 @@ query QueryProjectItemsForTeam(
                         createdAt
                         closedAt
                         closed
+                        updatedAt
                         milestone {
                         title
                         }
                         assignees(first: 20) {
+                        pageInfo {
+                            hasNextPage
+                            endCursor
+                        }
                         nodes {
                             login
                         }
                         }
                         labels(first: 10) {
+                        pageInfo {
+                            hasNextPage
+                            endCursor
+                        }
                         nodes {
                             name
                         }
                         }
-                        reactions(first: 10, content: HOORAY) {
-                        nodes {
+"""
+
+reaction_node_fields = """
                             user {
                             login
                             }
-                        }
-                        }
-                        comments(first: 30) {
-                        nodes {
+"""
+
+comment_node_fields = (
+    """
+                            id
                             author {
                             login
                             }
                             reactions(first: 10, content: HOORAY) {
-                            nodes {
-                                user {
-                                login
-                                }
+                            pageInfo {
+                                hasNextPage
+                                endCursor
                             }
+                            nodes {"""
+    + reaction_node_fields
+    + """                            }
                             }
+"""
+)
+
+issue_reaction_fields = (
+    """
+                        reactions(first: 10, content: HOORAY) {
+                        totalCount
+                        pageInfo {
+                            hasNextPage
+                            endCursor
                         }
+                        nodes {"""
+    + reaction_node_fields
+    + """                        }
                         }
-                        timelineItems(last: 50, itemTypes : [CLOSED_EVENT, ASSIGNED_EVENT, CROSS_REFERENCED_EVENT]) {
-                            nodes {
+                        comments(first: 30) {
+                        totalCount
+                        pageInfo {
+                            hasNextPage
+                            endCursor
+                        }
+                        nodes {"""
+    + comment_node_fields
+    + """                        }
+                        }
+"""
+)
+
+closed_event_fields = """
                                 ... on ClosedEvent {
                                     actor {
                                         login
                                     }
                                     createdAt
                                 }
+"""
+
+assigned_event_fields = """
                                 ... on AssignedEvent {
                                     actor {
                                         login
@@ -102,6 +152,9 @@ query QueryProjectItemsForTeam(
                                     }
                                     createdAt
                                 }
+"""
+
+cross_referenced_event_fields = """
                                 ... on CrossReferencedEvent {
                                     actor {
                                         login
@@ -118,11 +171,9 @@ query QueryProjectItemsForTeam(
                                         }
                                     }
                                 }
-                            }
-                        }
-                        }
-                    }
+"""
 
+project_field_values = """
                     Urgency: fieldValueByName(name: "Urgency") {
                         ... on ProjectV2ItemFieldNumberValue {
                             number
@@ -138,6 +189,247 @@ query QueryProjectItemsForTeam(
                             number
                         }
                     }
+"""
+
+
+def timelineEventFields(issueFields: IssueFields, /) -> tuple[str, str]:
+    """The timeline item types a field profile reads, and the fragments selecting them."""
+    timelineEvents = [("CLOSED_EVENT", closed_event_fields)]
+    if issueFields.includes(IssueFields.CYCLE_TIME):
+        timelineEvents.append(("ASSIGNED_EVENT", assigned_event_fields))
+    if issueFields.includes(IssueFields.FULL):
+        timelineEvents.append(("CROSS_REFERENCED_EVENT", cross_referenced_event_fields))
+    return (
+        ", ".join(itemType for itemType, _ in timelineEvents),
+        "".join(fragment for _, fragment in timelineEvents),
+    )
+
+
+def projectItemFields(issueFields: IssueFields, /) -> str:
+    """
+    The fields read from every project item for a field profile, shared by the
+    paginated and by-id item queries. Nested connections the profile doesn't need are
+    left out, as they make up most of a query's rate limit cost.
+    """
+    itemTypes, eventFields = timelineEventFields(issueFields)
+    return (
+        """
+                    id
+                    updatedAt
+                    content {
+                    ... on Issue {"""
+        + issue_core_fields
+        + (issue_reaction_fields if issueFields.includes(IssueFields.SCORING) else "")
+        + f"""                        timelineItems(last: 50, itemTypes : [{itemTypes}]) {{
+                            pageInfo {{
+                                hasPreviousPage
+                                startCursor
+                            }}
+                            nodes {{"""
+        + eventFields
+        + """                            }
+                        }
+                        }
+                    }
+"""
+        + project_field_values
+    )
+
+
+def teamIssuesQuery(issueFields: IssueFields, /) -> str:
+    return (
+        """
+query QueryProjectItemsForTeam(
+  $owner: String!
+  $projectNumber: Int!
+  $nextPage: String
+  $pageSize: Int = 100
+) {
+    organization(login: $owner) {
+        projectV2(number: $projectNumber
+        ) {
+            title
+            items(first: $pageSize, after: $nextPage) {
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                }
+                nodes {"""
+        + projectItemFields(issueFields)
+        + """                }
+            }
+        }
+    }
+}
+"""
+    )
+
+
+def projectItemsByIdQuery(issueFields: IssueFields, /) -> str:
+    return (
+        """
+query QueryProjectItemsById($ids: [ID!]!) {
+    nodes(ids: $ids) {
+        ... on ProjectV2Item {"""
+        + projectItemFields(issueFields)
+        + """        }
+    }
+}
+"""
+    )
+
+
+get_team_issues = teamIssuesQuery(IssueFields.FULL)
+get_project_items_by_id = projectItemsByIdQuery(IssueFields.FULL)
+
+# Nested connections that can be completed with follow-up pages: the types holding
+# them, the field with its paging arguments and the fields of their nodes
+nested_connections = {
+    "assignees": (["Issue"], "assignees(first: 100, after: $cursor)", "login"),
+    "labels": (["Issue"], "labels(first: 100, after: $cursor)", "name"),
+    "reactions": (
+        ["Issue", "IssueComment"],
+        "reactions(first: 100, after: $cursor, content: HOORAY)",
+        reaction_node_fields,
+    ),
+    "comments": (["Issue"], "comments(first: 100, after: $cursor)", comment_node_fields),
+}
+
+
+def nestedConnectionPageQuery(connection: str, issueFields: IssueFields, /) -> str:
+    """
+    Query for the next page of a truncated nested connection of an issue (or, for
+    reactions, of a comment too), looked up by the id of the node holding it. Timeline
+    items are paged backwards, as the item queries read the most recent ones.
+    """
+    if connection == "timelineItems":
+        itemTypes, nodeFields = timelineEventFields(issueFields)
+        typeNames = ["Issue"]
+        field = f"timelineItems(last: 100, before: $cursor, itemTypes: [{itemTypes}])"
+        pageInfo = "hasPreviousPage startCursor"
+    else:
+        typeNames, field, nodeFields = nested_connections[connection]
+        pageInfo = "hasNextPage endCursor"
+    fragments = "".join(
+        f"""
+        ... on {typeName} {{
+            {field} {{
+                pageInfo {{ {pageInfo} }}
+                nodes {{{nodeFields}                }}
+            }}
+        }}"""
+        for typeName in typeNames
+    )
+    operation = f"QueryIssue{connection[0].upper()}{connection[1:]}Page"
+    return f"""
+query {operation}($id: ID!, $cursor: String) {{
+    node(id: $id) {{{fragments}
+    }}
+}}
+"""
+
+# The counts that make up an item's version along with the updatedAt (see itemVersion),
+# for profiles that score reactions
+issue_reaction_counts = """
+                            reactions(first: 0, content: HOORAY) {
+                                totalCount
+                            }
+                            comments(first: 0) {
+                                totalCount
+                            }
+"""
+
+
+def projectItemVersionsQuery(issueFields: IssueFields, /) -> str:
+    """
+    Lists only what tells whether an item changed, so listing a whole project costs a
+    point or two a page.
+    """
+    return (
+        """
+query QueryProjectItemVersions(
+  $owner: String!
+  $projectNumber: Int!
+  $nextPage: String
+) {
+    organization(login: $owner) {
+        projectV2(number: $projectNumber) {
+            items(first: 100, after: $nextPage) {
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                }
+                nodes {
+                    id
+                    updatedAt
+                    content {
+                        ... on Issue {
+                            updatedAt"""
+        + (issue_reaction_counts if issueFields.includes(IssueFields.SCORING) else "\n")
+        + """                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+    )
+
+
+# Lists the project items of the issues an issue search finds, so they can be fetched by id
+search_issue_project_items = """
+query SearchIssueProjectItems($search: String!, $nextPage: String) {
+    search(query: $search, type: ISSUE, first: 100, after: $nextPage) {
+        issueCount
+        pageInfo {
+            endCursor
+            hasNextPage
+        }
+        nodes {
+            ... on Issue {
+                projectItems(first: 20) {
+                    nodes {
+                        id
+                        project {
+                            url
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+
+# Lists the repository and milestone of every project item's issue, so the items a
+# search of the team's repositories can't find are noticed. A point or so a page
+project_item_repositories_query = """
+query QueryProjectItemRepositories(
+  $owner: String!
+  $projectNumber: Int!
+  $nextPage: String
+) {
+    organization(login: $owner) {
+        projectV2(number: $projectNumber) {
+            items(first: 100, after: $nextPage) {
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                }
+                nodes {
+                    id
+                    content {
+                        ... on Issue {
+                            repository {
+                                nameWithOwner
+                            }
+                            milestone {
+                                title
+                            }
+                        }
+                    }
                 }
             }
         }
@@ -192,117 +484,1111 @@ def generateSprintCutoffs(
     return cutoffs
 
 
+project_items_stream_path = ("organization", "projectV2", "items", "nodes")
+# The most ids GitHub resolves in one nodes(ids:) lookup
+items_by_id_batch_size = 100
+# Items fetched ahead of the one being processed, two full pages
+prefetched_items = 200
+# Truncated nested connections looked up in one follow-up request
+nested_pages_per_request = 50
+# GitHub rejects longer search queries, and never returns more results than this for one
+search_query_max_length = 256
+search_result_limit = 1000
+
+
 def fetchIssuesFromGithub(
-    *, org: str, team: str, logger: logging.Logger | None = None
+    *,
+    org: str,
+    team: str,
+    logger: logging.Logger | None = None,
+    project: Project | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
 ) -> Iterator[dict]:
+    """
+    Yields the raw items of a team's project, with the fields of the `issueFields`
+    profile (see projectItemFields).
+
+    With incremental sync enabled (see getIncrementalSyncEnabled), the items are kept in
+    a ProjectItemStore: the first run downloads them in full, later runs only list the
+    item versions and download the items that changed since the previous sync.
+    """
     if not logger:
         logger = logging.getLogger()
 
-    project = getProject(organization=org, project_name=team)
-    logger.info(f"Found {project}")
-    if not project.public:
-        logger.warning(
-            "Project visibility is set to private. This can lead to"
-            " issues not being found if the Personal Access Token doesn't"
-            " have permissions for viewing private projects."
-        )
+    if project is None:
+        project = getProject(organization=org, project_name=team)
+    reportProjectVisibility(project, logger=logger)
 
     params = {"owner": org, "team": team, "projectNumber": project.number}
-    hasAnotherPage = True
-    while hasAnotherPage:
-        response: dict = runGraphqlQuery(query=get_team_issues, variables=params)
-        project_dict_with_issues: dict = response["organization"]["projectV2"]
-        issues = project_dict_with_issues["items"]["nodes"]
-        yield from issues
-
-        hasAnotherPage = project_dict_with_issues["items"]["pageInfo"]["hasNextPage"]
-        if hasAnotherPage:
-            params["nextPage"] = project_dict_with_issues["items"]["pageInfo"][
-                "endCursor"
-            ]
+    query = teamIssuesQuery(issueFields)
+    store = getProjectItemStore(
+        org=org, team=team, project=project, issueFields=issueFields
+    )
+    if store is not None and not store.isEmpty:
+        yield from syncIssuesFromGithub(
+            store=store, params=params, logger=logger, issueFields=issueFields
+        )
+        return
+    pages = paginateConnection(
+        # Items are decoded and handed on while the rest of their page is downloading
+        runQuery=functools.partial(runGraphqlQuery, streamPath=project_items_stream_path),
+        query=query,
+        variables=params,
+        cursorVariable="nextPage",
+        getConnection=getProjectItemsConnection,
+        checkpoint=PageCheckpoint.forQuery(
+            name=f"{org}-{team}", query=query, variables=params
+        ),
+        pageSize=AdaptivePageSize.forQuery(
+            name=f"{org}-{team}", query=query, variable="pageSize"
+        ),
+        logger=logger,
+    )
+    # Pages are downloaded and completed on a background thread while the items of the
+    # previous ones are being parsed and scored
+    items = prefetchNodes(
+        completeTruncatedItems(pages, issueFields=issueFields, logger=logger),
+        maxBuffered=prefetched_items,
+    )
+    if store is None:
+        yield from items
+        return
+    fetched = []
+    for item in items:
+        fetched.append(item)
+        yield item
+    store.merge(listedIds=[item["id"] for item in fetched], changedItems=fetched)
+    store.save()
 
 
-def fetchProcessedIssues(
+async def fetchIssuesFromGithubAsync(
     *,
     org: str,
     team: str,
-    logger: logging.Logger,
-    hooks: list[str] | None = None,
-    milestone: str | None = None,
-    startDate: datetime | None = None,
-    endDate: datetime | None = None,
-    managers: list[str],
-    shouldCountOpenIssues: bool = False,
-) -> Iterator[Issue]:
-    """
-    This function will fetch all team issues from Github and process them accordingly
-    by applying specified hooks and filtering issues that should not be counted.
+    logger: logging.Logger | None = None,
+    project: Project | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> AsyncIterator[dict]:
+    """Async counterpart of fetchIssuesFromGithub, run through the shared async GraphQL client."""
+    if not logger:
+        logger = logging.getLogger()
 
-    Args:
-        org : str
-            Organization name
-        team : str
-            Team name
-        logger : Logger
-            Logger to use
-        hooks : List[str]
-            List of hooks to apply per issue before filtering them
-        milestone : str
-            Milestone name. Will ignore milestone filtering if left null
-        startDate : datetime
-            Date of milestone start
-        endDate : datetime
-            Date of milestone end
-        managers : List[str]
-            List of manager names
-        shouldCountOpenIssues : bool
-            Determines whether to filter open issues or not
-    """
-    for issue_dict in fetchIssuesFromGithub(org=org, team=team, logger=logger):
-        try:
-            issue = parseIssue(issue_dict=issue_dict)
-        except ParsingError:
-            # don't log since the root cause can be hard to identify without manual review
-            continue
-        except KeyError as e:
-            logger.exception(
-                f"{e}. GH GraphQL API Issue type may have changed. This requires updating the code. Please contact the maintainers."
-            )
-            continue
-        except ValueError as e:
-            logger.exception(
-                f"{e}. GH GraphQL API Issue type may have changed. This requires updating the code. Please contact the maintainers."
-            )
-            continue
+    if project is None:
+        project = await getProjectAsync(organization=org, project_name=team)
+    reportProjectVisibility(project, logger=logger)
 
-        # Apply any overrides prior to counting or discarding the issue
-        if (
-            hooks is not None
-            and milestone is not None
-            and startDate is not None
-            and endDate is not None
+    params = {"owner": org, "team": team, "projectNumber": project.number}
+    query = teamIssuesQuery(issueFields)
+    store = getProjectItemStore(
+        org=org, team=team, project=project, issueFields=issueFields
+    )
+    if store is not None and not store.isEmpty:
+        for issue_dict in await syncIssuesFromGithubAsync(
+            store=store, params=params, logger=logger, issueFields=issueFields
         ):
-            issue = applyIssuePreProcessingHooks(
-                hooks=hooks,
-                issue=issue,
-                milestone=milestone,
-                startDate=startDate,
-                endDate=endDate,
-            )
+            yield issue_dict
+        return
+    fetched = []
+    # Items are handed on in the same order as completeTruncatedItems does
+    truncated: list[dict] = []
 
-        if not shouldCountIssue(
-            issue=issue,
+    async def completeTruncated() -> list[dict]:
+        # Follow-ups are rare, so they go through the sync client on a worker thread
+        await asyncio.to_thread(
+            completeTruncatedConnections,
+            truncated,
+            issueFields=issueFields,
             logger=logger,
-            currentMilestone=milestone,
-            managers=managers,
-            shouldCountOpenIssues=shouldCountOpenIssues,
-        ):
+        )
+        if store is not None:
+            fetched.extend(truncated)
+        return truncated
+
+    async for issue_dict in paginateConnectionAsync(
+        runQuery=runGraphqlQueryAsync,
+        query=query,
+        variables=params,
+        cursorVariable="nextPage",
+        getConnection=getProjectItemsConnection,
+        checkpoint=PageCheckpoint.forQuery(
+            name=f"{org}-{team}", query=query, variables=params
+        ),
+        pageSize=AdaptivePageSize.forQuery(
+            name=f"{org}-{team}", query=query, variable="pageSize"
+        ),
+        logger=logger,
+    ):
+        if not findTruncatedConnections([issue_dict]):
+            if store is not None:
+                fetched.append(issue_dict)
+            yield issue_dict
             continue
+        truncated.append(issue_dict)
+        if len(truncated) == items_by_id_batch_size:
+            for completed in await completeTruncated():
+                yield completed
+            truncated = []
+    for completed in await completeTruncated():
+        yield completed
+    if store is not None:
+        store.merge(listedIds=[item["id"] for item in fetched], changedItems=fetched)
+        store.save()
 
-        print(f"Successfully validated Issue #{issue.number}")
+
+def getProjectItemStore(
+    *,
+    org: str,
+    team: str,
+    project: Project,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> ProjectItemStore | None:
+    if not getIncrementalSyncEnabled():
+        return None
+    return ProjectItemStore.forProject(
+        name=f"{org}-{team}",
+        projectNumber=project.number,
+        query=teamIssuesQuery(issueFields),
+    )
+
+
+def syncIssuesFromGithub(
+    *,
+    store: ProjectItemStore,
+    params: dict,
+    logger: logging.Logger,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> list[dict]:
+    """
+    Brings a project's item store up to date and returns its items.
+
+    Every item's version is listed (a point or two a page), then only the new and changed
+    items, and those fetched too long ago (see ProjectItemStore), are fetched by id, a
+    hundred at a time. Items missing from the listing become tombstones in the store.
+    """
+    listing = list(
+        paginateConnection(
+            runQuery=runGraphqlQuery,
+            query=projectItemVersionsQuery(issueFields),
+            variables=params,
+            cursorVariable="nextPage",
+            getConnection=getProjectItemsConnection,
+            logger=logger,
+        )
+    )
+    changedIds = findChangedItemIds(
+        listing, versions=store.versions(), refetch=store.staleIds()
+    )
+    changedItems = fetchProjectItemsById(changedIds, issueFields=issueFields)
+    return finishSync(
+        store=store, listing=listing, changedItems=changedItems, logger=logger
+    )
+
+
+async def syncIssuesFromGithubAsync(
+    *,
+    store: ProjectItemStore,
+    params: dict,
+    logger: logging.Logger,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> list[dict]:
+    """Async counterpart of syncIssuesFromGithub; the changed items are fetched concurrently."""
+    listing = [
+        node
+        async for node in paginateConnectionAsync(
+            runQuery=runGraphqlQueryAsync,
+            query=projectItemVersionsQuery(issueFields),
+            variables=params,
+            cursorVariable="nextPage",
+            getConnection=getProjectItemsConnection,
+            logger=logger,
+        )
+    ]
+    changedIds = findChangedItemIds(
+        listing, versions=store.versions(), refetch=store.staleIds()
+    )
+    changedItems = await fetchProjectItemsByIdAsync(
+        changedIds, issueFields=issueFields
+    )
+    return finishSync(
+        store=store, listing=listing, changedItems=changedItems, logger=logger
+    )
+
+
+def fetchProjectItemsById(
+    itemIds: list[str], /, *, issueFields: IssueFields = IssueFields.FULL
+) -> list[dict]:
+    """Fetches raw project items by id, a hundred at a time."""
+    query = projectItemsByIdQuery(issueFields)
+    items = []
+    for start in range(0, len(itemIds), items_by_id_batch_size):
+        response = runGraphqlQuery(
+            query=query,
+            variables={"ids": itemIds[start : start + items_by_id_batch_size]},
+        )
+        items.extend(node for node in response["nodes"] if node is not None)
+    completeTruncatedConnections(items, issueFields=issueFields, logger=logging.getLogger())
+    return items
+
+
+async def fetchProjectItemsByIdAsync(
+    itemIds: list[str], /, *, issueFields: IssueFields = IssueFields.FULL
+) -> list[dict]:
+    """Async counterpart of fetchProjectItemsById; the batches are fetched concurrently."""
+    query = projectItemsByIdQuery(issueFields)
+    responses = await asyncio.gather(
+        *(
+            runGraphqlQueryAsync(
+                query=query,
+                variables={"ids": itemIds[start : start + items_by_id_batch_size]},
+            )
+            for start in range(0, len(itemIds), items_by_id_batch_size)
+        )
+    )
+    items = [
+        node for response in responses for node in response["nodes"] if node is not None
+    ]
+    await asyncio.to_thread(
+        completeTruncatedConnections,
+        items,
+        issueFields=issueFields,
+        logger=logging.getLogger(),
+    )
+    return items
+
+
+def completeTruncatedItems(
+    items: Iterable[dict],
+    /,
+    *,
+    issueFields: IssueFields = IssueFields.FULL,
+    logger: logging.Logger,
+) -> Iterator[dict]:
+    """
+    Yields raw project items with their truncated nested connections completed (see
+    completeTruncatedConnections).
+
+    Items with nothing truncated are yielded as soon as they come in, so a streamed
+    page is parsed while it downloads. The others are held back and completed a hundred
+    at a time, so their follow-up requests are shared; they are yielded after the items
+    that came in meanwhile.
+    """
+    truncated: list[dict] = []
+    for item in items:
+        if not findTruncatedConnections([item]):
+            yield item
+            continue
+        truncated.append(item)
+        if len(truncated) == items_by_id_batch_size:
+            completeTruncatedConnections(truncated, issueFields=issueFields, logger=logger)
+            yield from truncated
+            truncated = []
+    completeTruncatedConnections(truncated, issueFields=issueFields, logger=logger)
+    yield from truncated
+
+
+def completeTruncatedConnections(
+    items: list[dict],
+    /,
+    *,
+    issueFields: IssueFields = IssueFields.FULL,
+    logger: logging.Logger,
+) -> None:
+    """
+    Fetches the nodes that the item queries' page sizes cut off from the nested
+    connections of raw project items (assignees, labels, reactions, comments and their
+    reactions, and older timeline events), and adds them to the items in place so
+    parseIssue sees every node.
+
+    Only the few truncated connections are fetched, many per request through aliased
+    node(id:) lookups, in rounds until none is left truncated. A connection whose
+    follow-up fails keeps the nodes it has and is logged.
+    """
+    while truncated := findTruncatedConnections(items):
+        byConnection: dict[str, list[tuple[str, dict]]] = {}
+        for name, nodeId, connection in truncated:
+            byConnection.setdefault(name, []).append((nodeId, connection))
+        for name, entries in byConnection.items():
+            # Every comment brings its first 10 reactions along
+            nodesPerLookup = 1_100 if name == "comments" else 100
+            responses = runBatchedQuery(
+                runQuery=runGraphqlQuery,
+                query=nestedConnectionPageQuery(name, issueFields),
+                lookups={
+                    str(index): {"id": nodeId, "cursor": pageCursor(name, connection)}
+                    for index, (nodeId, connection) in enumerate(entries)
+                },
+                nodesPerLookup=nodesPerLookup,
+                maxNodesPerDocument=nodesPerLookup * nested_pages_per_request,
+                logger=logger,
+            )
+            for index, (nodeId, connection) in enumerate(entries):
+                node = (responses.get(str(index)) or {}).get("node") or {}
+                page = node.get(name)
+                if page is None:
+                    logger.warning(f"Couldn't fetch the remaining {name} of {nodeId}")
+                    connection["pageInfo"] = {}
+                    continue
+                if name == "timelineItems":
+                    connection["nodes"] = page["nodes"] + connection["nodes"]
+                else:
+                    connection["nodes"] = connection["nodes"] + page["nodes"]
+                connection["pageInfo"] = page["pageInfo"]
+
+
+def findTruncatedConnections(items: Iterable[dict], /) -> list[tuple[str, str, dict]]:
+    """
+    The nested connections of raw project items that have more nodes than were fetched,
+    as (connection name, id of the issue or comment holding it, connection) tuples.
+    """
+    truncated = []
+    for item in items:
+        issue = item.get("content") or {}
+        comments = (issue.get("comments") or {}).get("nodes") or []
+        holders = [(issue, [*nested_connections, "timelineItems"])] + [
+            (comment, ["reactions"]) for comment in comments
+        ]
+        for holder, names in holders:
+            if "id" not in holder:
+                continue
+            for name in names:
+                connection = holder.get(name)
+                if connection is None:
+                    continue
+                pageInfo = connection.get("pageInfo") or {}
+                if pageInfo.get("hasNextPage") or pageInfo.get("hasPreviousPage"):
+                    truncated.append((name, holder["id"], connection))
+    return truncated
+
+
+def pageCursor(name: str, connection: dict, /) -> str | None:
+    if name == "timelineItems":
+        return connection["pageInfo"].get("startCursor")
+    return connection["pageInfo"].get("endCursor")
+
+
+def findChangedItemIds(
+    listing: list[dict], /, *, versions: dict[str, str], refetch: set[str]
+) -> list[str]:
+    """Ids of the listed items that are new, changed or due for a refetch."""
+    return [
+        node["id"]
+        for node in listing
+        if node["id"] in refetch or versions.get(node["id"]) != itemVersion(node)
+    ]
+
+
+def finishSync(
+    *,
+    store: ProjectItemStore,
+    listing: list[dict],
+    changedItems: list[dict],
+    logger: logging.Logger,
+) -> list[dict]:
+    previousSync = store.syncedAt
+    removed = store.merge(
+        listedIds=[node["id"] for node in listing], changedItems=changedItems
+    )
+    store.save()
+    logger.info(
+        f"Synced {len(listing)} project items since {previousSync}: "
+        f"{len(changedItems)} new or changed, {removed} removed"
+    )
+    return store.items()
+
+
+def getProjectItemsConnection(response: dict, /) -> dict:
+    return response["organization"]["projectV2"]["items"]
+
+
+def fetchMilestoneIssuesFromGithub(
+    *,
+    org: str,
+    team: str,
+    milestone: str,
+    logger: logging.Logger | None = None,
+    project: Project | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> list[dict] | None:
+    """
+    Fetches the raw items of a team's project whose issue is in `milestone` or has no
+    milestone, without downloading the rest of the project.
+
+    The team's repositories are searched for those issues (see milestoneSearchQueries),
+    then the items the issues have on the team's project are fetched by id, a hundred at
+    a time. Issues from repositories the team doesn't have can't be searched for, so
+    the project's items are also listed with their issue's repository and milestone (a
+    point or so per hundred items), and those of the milestone from other repositories
+    are fetched too, with a warning.
+
+    Returns:
+        list[dict] | None: The raw items, or None when the milestone can't be searched
+            for or a search finds more issues than GitHub returns. The whole project has
+            to be fetched instead then.
+    """
+    if not logger:
+        logger = logging.getLogger()
+
+    if project is None:
+        project = getProject(organization=org, project_name=team)
+    repositories = getTeamRepositories(organization=org, team=team)
+    searches = milestoneSearchQueries(milestone=milestone, repositories=repositories)
+    if searches is None:
+        logger.info(f"Can't search for the issues of {milestone}, fetching all issues")
+        return None
+    try:
+        searchResults = [
+            node
+            for search in searches
+            for node in paginateConnection(
+                runQuery=runGraphqlQuery,
+                query=search_issue_project_items,
+                variables={"search": search},
+                cursorVariable="nextPage",
+                getConnection=getSearchConnection,
+                logger=logger,
+            )
+        ]
+    except SearchResultLimitExceeded as e:
+        logger.info(f"{e}, fetching all issues")
+        return None
+    reportProjectVisibility(project, logger=logger)
+    itemIds = findProjectItemIds(searchResults, projectUrl=project.url)
+    logger.info(f"Search found {len(itemIds)} project items for {milestone}")
+    listing = paginateConnection(
+        runQuery=runGraphqlQuery,
+        query=project_item_repositories_query,
+        variables={"owner": org, "projectNumber": project.number},
+        cursorVariable="nextPage",
+        getConnection=getProjectItemsConnection,
+        logger=logger,
+    )
+    itemIds += findItemsOutsideRepositories(
+        listing, milestone=milestone, repositories=repositories, logger=logger
+    )
+    return fetchProjectItemsById(itemIds, issueFields=issueFields)
+
+
+async def fetchMilestoneIssuesFromGithubAsync(
+    *,
+    org: str,
+    team: str,
+    milestone: str,
+    logger: logging.Logger | None = None,
+    project: Project | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> list[dict] | None:
+    """Async counterpart of fetchMilestoneIssuesFromGithub; the searches run concurrently."""
+    if not logger:
+        logger = logging.getLogger()
+
+    if project is None:
+        project = await getProjectAsync(organization=org, project_name=team)
+    repositories = await getTeamRepositoriesAsync(organization=org, team=team)
+    searches = milestoneSearchQueries(milestone=milestone, repositories=repositories)
+    if searches is None:
+        logger.info(f"Can't search for the issues of {milestone}, fetching all issues")
+        return None
+
+    async def runSearch(search: str) -> list[dict]:
+        return [
+            node
+            async for node in paginateConnectionAsync(
+                runQuery=runGraphqlQueryAsync,
+                query=search_issue_project_items,
+                variables={"search": search},
+                cursorVariable="nextPage",
+                getConnection=getSearchConnection,
+                logger=logger,
+            )
+        ]
+
+    async def listItems() -> list[dict]:
+        return [
+            node
+            async for node in paginateConnectionAsync(
+                runQuery=runGraphqlQueryAsync,
+                query=project_item_repositories_query,
+                variables={"owner": org, "projectNumber": project.number},
+                cursorVariable="nextPage",
+                getConnection=getProjectItemsConnection,
+                logger=logger,
+            )
+        ]
+
+    try:
+        listing, *searchPages = await asyncio.gather(
+            listItems(), *(runSearch(search) for search in searches)
+        )
+    except SearchResultLimitExceeded as e:
+        logger.info(f"{e}, fetching all issues")
+        return None
+    searchResults = [node for nodes in searchPages for node in nodes]
+    reportProjectVisibility(project, logger=logger)
+    itemIds = findProjectItemIds(searchResults, projectUrl=project.url)
+    logger.info(f"Search found {len(itemIds)} project items for {milestone}")
+    itemIds += findItemsOutsideRepositories(
+        listing, milestone=milestone, repositories=repositories, logger=logger
+    )
+    return await fetchProjectItemsByIdAsync(itemIds, issueFields=issueFields)
+
+
+def milestoneSearchQueries(*, milestone: str, repositories: list[str]) -> list[str] | None:
+    """
+    Issue searches that together find every issue of `repositories` that is in
+    `milestone` or has no milestone (which scoring reports), with as many repositories
+    per search as fit in GitHub's query length limit.
+
+    Returns:
+        list[str] | None: The search queries, or None when the milestone can't be
+            searched for: its title has a double quote, which search can't escape, or
+            the team has no repositories.
+    """
+    if '"' in milestone or not repositories:
+        return None
+    searches = []
+    for milestoneFilter in (f'milestone:"{milestone}"', "no:milestone"):
+        prefix = f"is:issue {milestoneFilter}"
+        search = prefix
+        for repository in repositories:
+            qualifier = f" repo:{repository}"
+            if len(prefix) + len(qualifier) > search_query_max_length:
+                return None
+            if len(search) + len(qualifier) > search_query_max_length:
+                searches.append(search)
+                search = prefix
+            search += qualifier
+        searches.append(search)
+    return searches
+
+
+class SearchResultLimitExceeded(Exception):
+    """An issue search found more issues than GitHub returns for one search."""
+
+
+def getSearchConnection(response: dict, /) -> dict:
+    connection = response["search"]
+    if connection["issueCount"] > search_result_limit:
+        raise SearchResultLimitExceeded(
+            f"Search found {connection['issueCount']} issues, more than the"
+            f" {search_result_limit} GitHub returns"
+        )
+    return connection
+
+
+def findProjectItemIds(searchResults: list[dict], /, *, projectUrl: str) -> list[str]:
+    """The ids of the items the searched issues have on the project, without repeats."""
+    itemIds: dict[str, None] = {}
+    for issue in searchResults:
+        for item in (issue.get("projectItems") or {}).get("nodes") or []:
+            if item["project"]["url"] == projectUrl:
+                itemIds[item["id"]] = None
+    return list(itemIds)
+
+
+def findItemsOutsideRepositories(
+    listing: Iterable[dict],
+    /,
+    *,
+    milestone: str,
+    repositories: list[str],
+    logger: logging.Logger,
+) -> list[str]:
+    """
+    The ids of the listed project items whose issue is in `milestone` or has no
+    milestone but belongs to none of `repositories`, so searching them missed it.
+    """
+    searched = set(repositories)
+    itemIds = []
+    for item in listing:
+        content = item.get("content") or {}
+        if "repository" not in content:
+            # Drafts and pull requests aren't scored
+            continue
+        if content["repository"]["nameWithOwner"] in searched:
+            continue
+        if (content.get("milestone") or {}).get("title", milestone) == milestone:
+            itemIds.append(item["id"])
+    if itemIds:
+        logger.warning(
+            f"{len(itemIds)} project items of {milestone} are issues of repositories"
+            " outside the team, fetching them as well. Add the repositories to the team"
+            " so searches find them"
+        )
+    return itemIds
+
+
+def reportProjectVisibility(project: Project, /, *, logger: logging.Logger):
+    logger.info(f"Found {project}")
+    if not project.public:
+        logger.warning(
+            "Project visibility is set to private. This can lead to"
+            " issues not being found if the Personal Access Token doesn't"
+            " have permissions for viewing private projects."
+        )
+
+
+def fetchProcessedIssues(
+    *,
+    org: str,
+    team: str,
+    logger: logging.Logger,
+    hooks: list[str] | None = None,
+    milestone: str | None = None,
+    startDate: datetime | None = None,
+    endDate: datetime | None = None,
+    managers: list[str],
+    shouldCountOpenIssues: bool = False,
+    project: Project | None = None,
+    searchMilestone: bool = False,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> Iterator[Issue]:
+    """
+    This function will fetch all team issues from Github and process them accordingly
+    by applying specified hooks and filtering issues that should not be counted.
+
+    Args:
+        org : str
+            Organization name
+        team : str
+            Team name
+        logger : Logger
+            Logger to use
+        hooks : List[str]
+            List of hooks to apply per issue before filtering them
+        milestone : str
+            Milestone name. Will ignore milestone filtering if left null
+        startDate : datetime
+            Date of milestone start
+        endDate : datetime
+            Date of milestone end
+        managers : List[str]
+            List of manager names
+        shouldCountOpenIssues : bool
+            Determines whether to filter open issues or not
+        project : Project
+            The team's project, if already looked up. Fetched by team name otherwise
+        searchMilestone : bool
+            Only fetch the milestone's issues, through issue search, instead of every
+            item on the project. Ignored when there are hooks
+        issueFields : IssueFields
+            How much of each issue the caller needs (see projectItemFields)
+    """
+    # Hooks may move issues between milestones, so they need to see all of them
+    hooksSeeAllIssues = bool(hooks)
+    yield from processIssues(
+        issues=fetchParsedIssues(
+            org=org,
+            team=team,
+            logger=logger,
+            project=project,
+            milestone=None if hooksSeeAllIssues else milestone,
+            searchMilestone=searchMilestone and not hooksSeeAllIssues,
+            issueFields=issueFields,
+        ),
+        logger=logger,
+        hooks=hooks,
+        milestone=milestone,
+        startDate=startDate,
+        endDate=endDate,
+        managers=managers,
+        shouldCountOpenIssues=shouldCountOpenIssues,
+    )
+
+
+def fetchParsedIssues(
+    *,
+    org: str,
+    team: str,
+    logger: logging.Logger,
+    project: Project | None = None,
+    milestone: str | None = None,
+    searchMilestone: bool = False,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> Iterator[Issue]:
+    """
+    Yields a team's parsed issues, from the issue store (see getIssueStore) while it
+    holds a fresh copy of them and from Github otherwise. Issues fetched from Github are
+    written to the store once they have all been read.
+
+    Args:
+        milestone : str
+            When served from the store, only read this milestone's issues (and those
+            without a milestone, which scoring reports). Github always returns them all,
+            unless searchMilestone is set
+        searchMilestone : bool
+            Only fetch the milestone's issues from Github, through issue search (see
+            fetchMilestoneIssuesFromGithub). They are not written to the store, which
+            holds whole projects
+        issueFields : IssueFields
+            How much of each issue to fetch. Stored issues fetched with a profile that
+            includes it are served as well
+    """
+    store = getIssueStore()
+    if store is not None:
+        freshKey = findFreshIssueStoreKey(
+            store, org=org, team=team, issueFields=issueFields
+        )
+        if freshKey is not None:
+            logger.info(f"Reading the issues of {team} from the issue store")
+            yield from store.issues(
+                freshKey, milestone=milestone, includeWithoutMilestone=True
+            )
+            return
+    parsedIssues = ParsedIssueCache.forTeam(org=org, team=team, issueFields=issueFields)
+    if searchMilestone and milestone is not None:
+        issueDicts = fetchMilestoneIssuesFromGithub(
+            org=org,
+            team=team,
+            milestone=milestone,
+            logger=logger,
+            project=project,
+            issueFields=issueFields,
+        )
+        if issueDicts is not None:
+            yield from parseIssueDicts(
+                issueDicts, logger=logger, parsedIssues=parsedIssues
+            )
+            if parsedIssues is not None:
+                parsedIssues.save()
+            return
+    issues = parseIssueDicts(
+        fetchIssuesFromGithub(
+            org=org,
+            team=team,
+            logger=logger,
+            project=project,
+            issueFields=issueFields,
+        ),
+        logger=logger,
+        parsedIssues=parsedIssues,
+    )
+    fetched = []
+    for issue in issues:
+        if store is not None:
+            # Copied before the caller's hooks change the issue in place
+            fetched.append(copy.deepcopy(issue))
+        yield issue
+    if parsedIssues is not None:
+        parsedIssues.save(dropUnused=True)
+    if store is not None:
+        store.replaceIssues(
+            issueStoreKey(org=org, team=team, issueFields=issueFields), fetched
+        )
+
+
+def issueStoreKey(*, org: str, team: str, issueFields: IssueFields) -> str:
+    """Key in the issue store of a team's issues fetched with a field profile."""
+    if issueFields is IssueFields.FULL:
+        return f"{org}/{team}"
+    return f"{org}/{team}#{issueFields}"
+
+
+def findFreshIssueStoreKey(
+    store: IssueStore, /, *, org: str, team: str, issueFields: IssueFields
+) -> str | None:
+    """The key of a team's fresh stored issues that have every field of `issueFields`."""
+    for profile in IssueFields:
+        if not profile.includes(issueFields):
+            continue
+        key = issueStoreKey(org=org, team=team, issueFields=profile)
+        if store.isFresh(key):
+            return key
+    return None
+
+
+def processIssueDicts(
+    *,
+    issueDicts: Iterable[dict],
+    logger: logging.Logger,
+    hooks: list[str] | None = None,
+    milestone: str | None = None,
+    startDate: datetime | None = None,
+    endDate: datetime | None = None,
+    managers: list[str],
+    shouldCountOpenIssues: bool = False,
+    parsedIssues: ParsedIssueCache | None = None,
+) -> Iterator[Issue]:
+    """
+    Parses raw project item dictionaries into Issues, applies the preprocessing hooks and
+    drops the issues that should not be counted. Shared by the sync and async fetch paths.
+
+    Args:
+        issueDicts : Iterable[dict]
+            Raw project items as returned by the GraphQL API
+        parsedIssues : ParsedIssueCache
+            Cache to rebuild unchanged items from (see parseIssueDicts)
+        (remaining arguments match fetchProcessedIssues)
+    """
+    yield from processIssues(
+        issues=parseIssueDicts(issueDicts, logger=logger, parsedIssues=parsedIssues),
+        logger=logger,
+        hooks=hooks,
+        milestone=milestone,
+        startDate=startDate,
+        endDate=endDate,
+        managers=managers,
+        shouldCountOpenIssues=shouldCountOpenIssues,
+    )
+
+
+def parseIssueDicts(
+    issueDicts: Iterable[dict],
+    /,
+    *,
+    logger: logging.Logger,
+    parsedIssues: ParsedIssueCache | None = None,
+) -> Iterator[Issue]:
+    """
+    Parses raw project items into Issues, skipping the items that aren't valid issues.
+
+    With `parsedIssues`, items that haven't changed since they were last parsed are
+    rebuilt from the cache, and the others are added to it. Saving it is up to the caller.
+    """
+    for issue_dict in issueDicts:
+        itemId = issue_dict.get("id") if parsedIssues is not None else None
+        if itemId is not None:
+            fingerprint = rawItemFingerprint(issue_dict)
+            found, issue = parsedIssues.lookup(itemId, fingerprint)
+            if found:
+                if issue is not None:
+                    yield issue
+                continue
+        try:
+            issue = parseIssue(issue_dict=issue_dict)
+        except ParsingError:
+            # don't log since the root cause can be hard to identify without manual review
+            if itemId is not None:
+                parsedIssues.store(itemId, fingerprint, None)
+            continue
+        except KeyError as e:
+            logger.exception(
+                f"{e}. GH GraphQL API Issue type may have changed. This requires updating the code. Please contact the maintainers."
+            )
+            continue
+        except ValueError as e:
+            logger.exception(
+                f"{e}. GH GraphQL API Issue type may have changed. This requires updating the code. Please contact the maintainers."
+            )
+            continue
+        if itemId is not None:
+            parsedIssues.store(itemId, fingerprint, issue)
         yield issue
 
 
+def processIssues(
+    *,
+    issues: Iterable[Issue],
+    logger: logging.Logger,
+    hooks: list[str] | None = None,
+    milestone: str | None = None,
+    startDate: datetime | None = None,
+    endDate: datetime | None = None,
+    managers: list[str],
+    shouldCountOpenIssues: bool = False,
+) -> Iterator[Issue]:
+    """
+    Applies the preprocessing hooks to parsed Issues and drops the issues that should
+    not be counted.
+
+    Args:
+        issues : Iterable[Issue]
+            Parsed issues. They are modified in place by the hooks
+        (remaining arguments match fetchProcessedIssues)
+    """
+    for issue in issues:
+        # Apply any overrides prior to counting or discarding the issue
+        if (
+            hooks is not None
+            and milestone is not None
+            and startDate is not None
+            and endDate is not None
+        ):
+            issue = applyIssuePreProcessingHooks(
+                hooks=hooks,
+                issue=issue,
+                milestone=milestone,
+                startDate=startDate,
+                endDate=endDate,
+            )
+
+        if not shouldCountIssue(
+            issue=issue,
+            logger=logger,
+            currentMilestone=milestone,
+            managers=managers,
+            shouldCountOpenIssues=shouldCountOpenIssues,
+        ):
+            continue
+
+        print(f"Successfully validated Issue #{issue.number}")
+        yield issue
+
+
+async def fetchProjectSnapshotAsync(
+    *,
+    org: str,
+    team: str,
+    project: Project | None = None,
+    includeDiscussions: bool = False,
+    milestone: str | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> ProjectSnapshot:
+    """
+    Fetches and parses a team's project items, milestones and (optionally) discussions
+    once, so every milestone scored during a run can read them from memory instead of
+    downloading the whole project again.
+
+    Everything logged while fetching and parsing is kept in the snapshot and replayed to
+    the logger of each milestone that uses it, so every milestone report still shows it.
+
+    Args:
+        org : str
+            Organization name
+        team : str
+            Team name
+        project : Project
+            The team's project, if already looked up. Fetched by team name otherwise
+        includeDiscussions : bool
+            Whether to also fetch the team's discussions
+        milestone : str
+            Only fetch this milestone's issues (and those without a milestone), through
+            issue search (see fetchMilestoneIssuesFromGithub), instead of every item on
+            the project. For runs that score a single milestone
+        issueFields : IssueFields
+            How much of each issue the milestones scored from the snapshot need (see
+            projectItemFields)
+
+    Raises:
+        Exception: Whatever the project item or discussion fetches raised. A failed
+            milestone lookup is only logged, as it is when scoring a single milestone.
+    """
+    collector = _LogRecordCollector()
+    logger = logging.getLogger(f"{__name__}.snapshot.{org}.{team}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(collector)
+    try:
+
+        async def collectIssues() -> tuple[Project, list[Issue]]:
+            teamProject = project
+            if teamProject is None:
+                teamProject = await getProjectAsync(organization=org, project_name=team)
+            store = getIssueStore()
+            freshKey = None
+            if store is not None:
+                freshKey = findFreshIssueStoreKey(
+                    store, org=org, team=team, issueFields=issueFields
+                )
+            if freshKey is not None:
+                logger.info(f"Reading the issues of {team} from the issue store")
+                return teamProject, store.issues(
+                    freshKey, milestone=milestone, includeWithoutMilestone=True
+                )
+            parsedIssues = ParsedIssueCache.forTeam(
+                org=org, team=team, issueFields=issueFields
+            )
+            if milestone is not None:
+                milestoneIssueDicts = await fetchMilestoneIssuesFromGithubAsync(
+                    org=org,
+                    team=team,
+                    milestone=milestone,
+                    logger=logger,
+                    project=teamProject,
+                    issueFields=issueFields,
+                )
+                if milestoneIssueDicts is not None:
+                    # Not stored, as the store holds whole projects
+                    issues = list(
+                        parseIssueDicts(
+                            milestoneIssueDicts, logger=logger, parsedIssues=parsedIssues
+                        )
+                    )
+                    if parsedIssues is not None:
+                        parsedIssues.save()
+                    return teamProject, issues
+            issueDicts = [
+                issue_dict
+                async for issue_dict in fetchIssuesFromGithubAsync(
+                    org=org,
+                    team=team,
+                    logger=logger,
+                    project=teamProject,
+                    issueFields=issueFields,
+                )
+            ]
+            issues = list(
+                parseIssueDicts(issueDicts, logger=logger, parsedIssues=parsedIssues)
+            )
+            if parsedIssues is not None:
+                parsedIssues.save(dropUnused=True)
+            if store is not None:
+                store.replaceIssues(
+                    issueStoreKey(org=org, team=team, issueFields=issueFields), issues
+                )
+            return teamProject, issues
+
+        async def fetchDiscussions() -> list[Discussion] | None:
+            if not includeDiscussions:
+                return None
+            return await getDiscussionsAsync(org=org, team=team)
+
+        milestones, projectIssues, discussions = await asyncio.gather(
+            getMilestonesAsync(organization=org, team=team),
+            collectIssues(),
+            fetchDiscussions(),
+            return_exceptions=True,
+        )
+        if isinstance(milestones, BaseException):
+            logger.warning(milestones)
+            milestones = None
+        if isinstance(projectIssues, BaseException):
+            raise projectIssues
+        if isinstance(discussions, BaseException):
+            raise discussions
+    finally:
+        logger.removeHandler(collector)
+    snapshotProject, issues = projectIssues
+    return ProjectSnapshot(
+        project=snapshotProject,
+        issues=issues,
+        milestones=milestones,
+        discussions=discussions,
+        logRecords=collector.records,
+    )
+
+
+class _LogRecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+
+def replaySnapshotLogRecords(snapshot: ProjectSnapshot, /, *, logger: logging.Logger):
+    for record in snapshot.logRecords:
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+def issuesFromSnapshot(
+    snapshot: ProjectSnapshot,
+    /,
+    *,
+    logger: logging.Logger,
+    hooks: list[str] | None,
+) -> list[Issue]:
+    """
+    Replays the snapshot's log records to a milestone's logger and returns its issues,
+    copied when hooks will modify them so other milestones still see the originals.
+    """
+    replaySnapshotLogRecords(snapshot, logger=logger)
+    if hooks:
+        return copy.deepcopy(snapshot.issues)
+    return snapshot.issues
+
+
 def getLectureTopicTaskMetricsFromIssues(
     issues: Iterator[Issue], members: list[str], logger: logging.Logger
 ) -> LectureTopicTaskData:
@@ -326,92 +1612,158 @@ def getLectureTopicTaskMetricsFromIssues(
     }
 
     for issue in issues:
-        # Skip issue if no milestone is assigned
-        if issue.milestone is None:
-            logger.warning(
-                f"[Issue #{issue.number}]({issue.url}) does not have a milestone assigned so lecture topic task points were ignored"
-            )
-            continue
-        # Add milestone before isLectureTopicTask filtering so it includes milestones where no one did any LTTs
-        lectureTopicTaskData.totalMilestones.add(issue.milestone)
-
-        # Skip issue if it is not a lecture topic task
-        if not issue.isLectureTopicTask:
-            continue
-
-        # Skip issue if it does not have only one assignee
-        if len(issue.assignees) != 1:
-            logger.warning(
-                f"[Issue #{issue.number}]({issue.url}) does not have only 1 assigned developer so lecture topic task points for this issue will be ignored"
-            )
-            continue
-
-        # Track metrics
-        tasks_by_milestone = (
-            lectureTopicTaskData.lectureTopicTasksByDeveloperByMilestone[
-                issue.assignees[0]
-            ]
-        )
-        if tasks_by_milestone.get(issue.milestone) is None:
-            tasks_by_milestone[issue.milestone] = 0
-        tasks_by_milestone[issue.milestone] += 1
-        lectureTopicTaskData.totalLectureTopicTasks += 1
-        logger.debug(
-            f"Issue #{issue.number} was marked as a lecture topic task for {issue.assignees[0]} in {issue.milestone}"
-        )
+        recordLectureTopicTask(lectureTopicTaskData, issue, logger=logger)
 
     return lectureTopicTaskData
 
 
-def iteratorSplitter(iterator: Iterator[Issue], queues: list[Queue[Issue | None]]):
-    """
-    Add values received from the iterator to 2 individual queues, essentially splitting
-    the iterator into 2.
-
-    Args:
-        iterator : Iterator
-            Data source
-        queue1 : Queue
-            One of the queues to add iterator data to
-        queue2 : Queue
-            The other queue to add iterator data to
-    """
+def recordLectureTopicTask(
+    lectureTopicTaskData: LectureTopicTaskData,
+    issue: Issue,
+    /,
+    *,
+    logger: logging.Logger,
+):
+    """Adds an issue to the lecture topic task counts if it is a valid lecture topic task."""
+    # Skip issue if no milestone is assigned
+    if issue.milestone is None:
+        logger.warning(
+            f"[Issue #{issue.number}]({issue.url}) does not have a milestone assigned so lecture topic task points were ignored"
+        )
+        return
+    # Add milestone before isLectureTopicTask filtering so it includes milestones where no one did any LTTs
+    lectureTopicTaskData.totalMilestones.add(issue.milestone)
 
-    def add_to_queues(item):
-        for queue in queues:
-            queue.put(item)
+    # Skip issue if it is not a lecture topic task
+    if not issue.isLectureTopicTask:
+        return
 
-    try:
-        for item in iterator:
-            add_to_queues(item)
-        add_to_queues(None)
+    # Skip issue if it does not have only one assignee
+    if len(issue.assignees) != 1:
+        logger.warning(
+            f"[Issue #{issue.number}]({issue.url}) does not have only 1 assigned developer so lecture topic task points for this issue will be ignored"
+        )
+        return
 
-    except Exception as e:
-        add_to_queues(e)
+    # Track metrics
+    tasks_by_milestone = (
+        lectureTopicTaskData.lectureTopicTasksByDeveloperByMilestone[
+            issue.assignees[0]
+        ]
+    )
+    if tasks_by_milestone.get(issue.milestone) is None:
+        tasks_by_milestone[issue.milestone] = 0
+    tasks_by_milestone[issue.milestone] += 1
+    lectureTopicTaskData.totalLectureTopicTasks += 1
+    logger.debug(
+        f"Issue #{issue.number} was marked as a lecture topic task for {issue.assignees[0]} in {issue.milestone}"
+    )
 
 
-def getIteratorFromQueue(queue: Queue[Issue]) -> Iterator[Issue]:
+def getTeamMetricsForMilestone(
+    *,
+    org: str,
+    team: str,
+    milestone: str,
+    members: list[str],
+    managers: list[str],
+    startDate: datetime,
+    endDate: datetime,
+    sprints: int,
+    minTasksPerSprint: int,
+    useDecay: bool,
+    milestoneGrade: float,
+    shouldCountOpenIssues: bool = False,
+    issuePreProcessingHooks: list[str] | None = None,
+    logger: logging.Logger | None = None,
+    project: Project | None = None,
+    milestones: list[Milestone] | None = None,
+    snapshot: ProjectSnapshot | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> MilestoneData:
     """
-    Convert queue to an iterator.
+    Scores a team's project items for one milestone.
 
-    End is marked when value is null.
+    When a snapshot (see fetchProjectSnapshotAsync) is given, the issues and milestones
+    are read from it and nothing is fetched from Github. Otherwise the issues are
+    fetched with the `issueFields` profile: IssueFields.SCORING is enough for the
+    scores, IssueFields.CYCLE_TIME also fills in the cycle times.
     """
+    if issuePreProcessingHooks is None:
+        issuePreProcessingHooks = []
+    if logger is None:
+        logger = logging.getLogger(__name__)
 
-    def queueIteratorNext():
-        value = queue.get()
-        if isinstance(value, Exception):
-            raise value
-        return value
+    validateMilestoneParameters(sprints=sprints, startDate=startDate, endDate=endDate)
+    if snapshot is not None:
+        issues = processIssues(
+            issues=issuesFromSnapshot(
+                snapshot, logger=logger, hooks=issuePreProcessingHooks
+            ),
+            logger=logger,
+            hooks=issuePreProcessingHooks,
+            milestone=milestone,
+            startDate=startDate,
+            endDate=endDate,
+            managers=managers,
+            shouldCountOpenIssues=shouldCountOpenIssues,
+        )
+        if snapshot.milestones is not None:
+            reportMilestoneOnGithub(
+                milestones=snapshot.milestones,
+                milestone=milestone,
+                endDate=endDate,
+                logger=logger,
+            )
+    else:
+        try:
+            if milestones is None:
+                milestones = getMilestones(organization=org, team=team)
+            reportMilestoneOnGithub(
+                milestones=milestones,
+                milestone=milestone,
+                endDate=endDate,
+                logger=logger,
+            )
+        except Exception as e:
+            logger.warning(e)
 
-    return iter(queueIteratorNext, None)
+        issues = fetchProcessedIssues(
+            org=org,
+            team=team,
+            logger=logger,
+            hooks=issuePreProcessingHooks,
+            milestone=milestone,
+            startDate=startDate,
+            endDate=endDate,
+            managers=managers,
+            shouldCountOpenIssues=shouldCountOpenIssues,
+            project=project,
+            issueFields=issueFields,
+        )
+    return getMilestoneDataFromIssues(
+        issues=issues,
+        milestone=milestone,
+        members=members,
+        managers=managers,
+        startDate=startDate,
+        endDate=endDate,
+        sprints=sprints,
+        minTasksPerSprint=minTasksPerSprint,
+        useDecay=useDecay,
+        milestoneGrade=milestoneGrade,
+        shouldCountOpenIssues=shouldCountOpenIssues,
+        logger=logger,
+        ledgerScope=f"{org}-{team}",
+    )
 
 
-def getTeamMetricsForMilestone(
+async def getTeamMetricsForMilestoneAsync(
     *,
     org: str,
     team: str,
     milestone: str,
-    members: list[str],
+    members: list[str] | None = None,
     managers: list[str],
     startDate: datetime,
     endDate: datetime,
@@ -422,58 +1774,91 @@ def getTeamMetricsForMilestone(
     shouldCountOpenIssues: bool = False,
     issuePreProcessingHooks: list[str] | None = None,
     logger: logging.Logger | None = None,
+    project: Project | None = None,
+    milestones: list[Milestone] | None = None,
+    snapshot: ProjectSnapshot | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
 ) -> MilestoneData:
+    """
+    Async counterpart of getTeamMetricsForMilestone.
+
+    The milestone lookup, the team member lookup (when members isn't given) and the
+    project item pages are fetched at the same time through the shared async GraphQL
+    client, so the wall time is that of the longest chain (project lookup, then items)
+    instead of the sum of every call. Lookups whose results are passed in (members,
+    project, milestones, snapshot) are skipped. Scoring is identical to the sync version.
+    """
     if issuePreProcessingHooks is None:
         issuePreProcessingHooks = []
     if logger is None:
         logger = logging.getLogger(__name__)
-
-    # Do some sanity checks on the passed in parameters
-    if sprints < 1:
-        raise ValueError(
-            "Each milestone must contain at least 1 sprint. Revise the config file."
+    validateMilestoneParameters(sprints=sprints, startDate=startDate, endDate=endDate)
+    if snapshot is not None:
+        if members is None:
+            members = await getTeamMembersAsync(org, team)
+        return getTeamMetricsForMilestone(
+            org=org,
+            team=team,
+            milestone=milestone,
+            members=members,
+            managers=managers,
+            startDate=startDate,
+            endDate=endDate,
+            sprints=sprints,
+            minTasksPerSprint=minTasksPerSprint,
+            useDecay=useDecay,
+            milestoneGrade=milestoneGrade,
+            shouldCountOpenIssues=shouldCountOpenIssues,
+            issuePreProcessingHooks=issuePreProcessingHooks,
+            logger=logger,
+            snapshot=snapshot,
         )
-    if endDate < startDate:
-        raise ValueError("Milestone end date must be after start date.")
-    try:
-        milestones = getMilestones(organization=org, team=team)
-        logger.debug(f"Milestones found: {[m.title for m in milestones]}")
-        matchingMilestone = next(
-            filter(lambda m: m.title == milestone, milestones), None
-        )
-        if matchingMilestone is None:
-            logger.warning(
-                f'Milestone "{milestone}" not found in any repo associated with the team'
-            )
-        elif (
-            matchingMilestone.dueOn is not None
-            and matchingMilestone.dueOn.date() != endDate.date()
-        ):
-            logger.warning(
-                f"Milestone due date in config doesn't match milestone due date on Github"
+
+    async def collectIssueDicts() -> list[dict]:
+        return [
+            issue_dict
+            async for issue_dict in fetchIssuesFromGithubAsync(
+                org=org,
+                team=team,
+                logger=logger,
+                project=project,
+                issueFields=issueFields,
             )
-        else:
-            print(f"Fetching issues associated with milestone {matchingMilestone}")
-    except Exception as e:
-        logger.warning(e)
-
-    print(members)
-    developers = [member for member in members if member not in managers]
-    logger.debug(f"Developers: {developers}, Managers: {managers}")
-    devPointsClosed = {dev: 0.0 for dev in developers}
-    devTasksCompleted = {dev: [0 for _ in range(sprints)] for dev in developers}
-    totalPointsClosed = 0.0
-    milestoneData = MilestoneData(sprints=sprints, startDate=startDate, endDate=endDate)
-    sprintCutoffs = generateSprintCutoffs(
-        startDate=startDate, endDate=endDate, sprints=sprints
-    )
-    logger.debug(f"Sprint cutoffs: {sprintCutoffs}")
-    devPointsByLabel = {dev: {} for dev in developers}
-    milestoneLabels = set()
-
-    issues = fetchProcessedIssues(
-        org=org,
-        team=team,
+        ]
+
+    async def fetchMembers() -> list[str]:
+        if members is not None:
+            return members
+        return await getTeamMembersAsync(org, team)
+
+    async def fetchMilestones() -> list[Milestone]:
+        if milestones is not None:
+            return milestones
+        return await getMilestonesAsync(organization=org, team=team)
+
+    milestonesResult, issueDicts, teamMembers = await asyncio.gather(
+        fetchMilestones(),
+        collectIssueDicts(),
+        fetchMembers(),
+        return_exceptions=True,
+    )
+    if isinstance(milestonesResult, BaseException):
+        logger.warning(milestonesResult)
+    else:
+        reportMilestoneOnGithub(
+            milestones=milestonesResult,
+            milestone=milestone,
+            endDate=endDate,
+            logger=logger,
+        )
+    if isinstance(issueDicts, BaseException):
+        raise issueDicts
+    if isinstance(teamMembers, BaseException):
+        raise teamMembers
+
+    parsedIssues = ParsedIssueCache.forTeam(org=org, team=team, issueFields=issueFields)
+    issues = processIssueDicts(
+        issueDicts=issueDicts,
         logger=logger,
         hooks=issuePreProcessingHooks,
         milestone=milestone,
@@ -481,147 +1866,477 @@ def getTeamMetricsForMilestone(
         endDate=endDate,
         managers=managers,
         shouldCountOpenIssues=shouldCountOpenIssues,
+        parsedIssues=parsedIssues,
+    )
+    milestoneData = getMilestoneDataFromIssues(
+        issues=issues,
+        milestone=milestone,
+        members=teamMembers,
+        managers=managers,
+        startDate=startDate,
+        endDate=endDate,
+        sprints=sprints,
+        minTasksPerSprint=minTasksPerSprint,
+        useDecay=useDecay,
+        milestoneGrade=milestoneGrade,
+        shouldCountOpenIssues=shouldCountOpenIssues,
+        logger=logger,
+        ledgerScope=f"{org}-{team}",
     )
+    if parsedIssues is not None:
+        parsedIssues.save(dropUnused=True)
+    return milestoneData
+
+
+def getTeamMetricsForMilestones(
+    *,
+    org: str,
+    team: str,
+    milestones: dict[str, MilestoneConfig],
+    members: list[str],
+    managers: list[str],
+    sprints: int,
+    minTasksPerSprint: int,
+    shouldCountOpenIssues: bool = False,
+    issuePreProcessingHooks: list[str] | None = None,
+    loggers: dict[str, logging.Logger] | None = None,
+    project: Project | None = None,
+    snapshot: ProjectSnapshot | None = None,
+    issueFields: IssueFields = IssueFields.FULL,
+) -> dict[str, MilestoneData]:
+    """
+    Scores a team's project items for several milestones in a single pass.
+
+    Each issue is routed to the accumulator of the milestone it belongs to instead of
+    every milestone walking every issue, so scoring a whole course is linear in the
+    number of issues. The result for each milestone is the same as calling
+    getTeamMetricsForMilestone for it. With preprocessing hooks, which may move an
+    issue between milestones, each issue is run through the hooks once per milestone
+    on its own copy.
+
+    Args:
+        milestones : dict[str, MilestoneConfig]
+            Dates, grade and decay of every milestone to score, by milestone title
+        loggers : dict[str, Logger]
+            Logger of each milestone. Milestones without one use this module's logger
+        snapshot : ProjectSnapshot
+            Issues and milestones fetched earlier in the run (see
+            fetchProjectSnapshotAsync). Fetched from Github otherwise
+        (remaining arguments match getTeamMetricsForMilestone)
+
+    Returns:
+        dict[str, MilestoneData]: The scores of each milestone, by milestone title.
+    """
+    if issuePreProcessingHooks is None:
+        issuePreProcessingHooks = []
+    milestoneLoggers = {
+        milestone: (loggers or {}).get(milestone) or logging.getLogger(__name__)
+        for milestone in milestones
+    }
+    for config in milestones.values():
+        validateMilestoneParameters(
+            sprints=sprints, startDate=config.startDate, endDate=config.endDate
+        )
+
+    if snapshot is not None:
+        for logger in milestoneLoggers.values():
+            replaySnapshotLogRecords(snapshot, logger=logger)
+        githubMilestones = snapshot.milestones
+        issues: Iterable[Issue] = snapshot.issues
+    else:
+        try:
+            githubMilestones = getMilestones(organization=org, team=team)
+        except Exception as e:
+            for logger in milestoneLoggers.values():
+                logger.warning(e)
+            githubMilestones = None
+        # Fetch and parse once; parsing messages go to the logger of the first milestone
+        firstLogger = next(iter(milestoneLoggers.values()), logging.getLogger(__name__))
+        issues = fetchParsedIssues(
+            org=org,
+            team=team,
+            logger=firstLogger,
+            project=project,
+            issueFields=issueFields,
+        )
+    if githubMilestones is not None:
+        for milestone, config in milestones.items():
+            reportMilestoneOnGithub(
+                milestones=githubMilestones,
+                milestone=milestone,
+                endDate=config.endDate,
+                logger=milestoneLoggers[milestone],
+            )
 
-    devIssueTimings: dict[str, list[tuple[int | None, float, float]]] = {
-        dev: [] for dev in developers
+    accumulators = {
+        milestone: MilestoneAccumulator(
+            milestone=milestone,
+            members=members,
+            managers=managers,
+            startDate=config.startDate,
+            endDate=config.endDate,
+            sprints=sprints,
+            minTasksPerSprint=minTasksPerSprint,
+            useDecay=config.useDecay,
+            milestoneGrade=config.milestoneGrade,
+            shouldCountOpenIssues=shouldCountOpenIssues,
+            logger=milestoneLoggers[milestone],
+            ledgerScope=f"{org}-{team}",
+        )
+        for milestone, config in milestones.items()
     }
-    devPointsTimeline: dict[str, list[tuple[str, float]]] = {
-        dev: [] for dev in developers
+    for issue in issues:
+        if issuePreProcessingHooks:
+            candidates = [
+                (
+                    milestone,
+                    applyIssuePreProcessingHooks(
+                        hooks=issuePreProcessingHooks,
+                        issue=copy.deepcopy(issue),
+                        milestone=milestone,
+                        startDate=config.startDate,
+                        endDate=config.endDate,
+                    ),
+                )
+                for milestone, config in milestones.items()
+            ]
+        elif issue.milestone is None:
+            # Reported by shouldCountIssue in every milestone's log
+            candidates = [(milestone, issue) for milestone in milestones]
+        elif issue.milestone in milestones:
+            candidates = [(issue.milestone, issue)]
+        else:
+            continue
+        for milestone, candidate in candidates:
+            if not shouldCountIssue(
+                issue=candidate,
+                logger=milestoneLoggers[milestone],
+                currentMilestone=milestone,
+                managers=managers,
+                shouldCountOpenIssues=shouldCountOpenIssues,
+            ):
+                continue
+            print(f"Successfully validated Issue #{candidate.number}")
+            accumulators[milestone].addIssue(candidate)
+
+    return {
+        milestone: accumulator.result()
+        for milestone, accumulator in accumulators.items()
     }
 
-    # Split issues iterator to read for both issue metrics and lecture topic task metrics
-    issueMetricsQueue, lectureTopicTaskQueue = Queue(), Queue()
-    thread = Thread(
-        target=iteratorSplitter,
-        args=(issues, [issueMetricsQueue, lectureTopicTaskQueue]),
+
+def validateMilestoneParameters(*, sprints: int, startDate: datetime, endDate: datetime):
+    # Do some sanity checks on the passed in parameters
+    if sprints < 1:
+        raise ValueError(
+            "Each milestone must contain at least 1 sprint. Revise the config file."
+        )
+    if endDate < startDate:
+        raise ValueError("Milestone end date must be after start date.")
+
+
+def reportMilestoneOnGithub(
+    *,
+    milestones: list[Milestone],
+    milestone: str,
+    endDate: datetime,
+    logger: logging.Logger,
+):
+    """Warns when the configured milestone is missing on Github or its due date disagrees."""
+    logger.debug(f"Milestones found: {[m.title for m in milestones]}")
+    matchingMilestone = next(filter(lambda m: m.title == milestone, milestones), None)
+    if matchingMilestone is None:
+        logger.warning(
+            f'Milestone "{milestone}" not found in any repo associated with the team'
+        )
+    elif (
+        matchingMilestone.dueOn is not None
+        and matchingMilestone.dueOn.date() != endDate.date()
+    ):
+        logger.warning(
+            f"Milestone due date in config doesn't match milestone due date on Github"
+        )
+    else:
+        print(f"Fetching issues associated with milestone {matchingMilestone}")
+
+
+def getMilestoneDataFromIssues(
+    *,
+    issues: Iterator[Issue],
+    milestone: str,
+    members: list[str],
+    managers: list[str],
+    startDate: datetime,
+    endDate: datetime,
+    sprints: int,
+    minTasksPerSprint: int,
+    useDecay: bool,
+    milestoneGrade: float,
+    shouldCountOpenIssues: bool,
+    logger: logging.Logger,
+    ledgerScope: str | None = None,
+) -> MilestoneData:
+    """
+    Scores an iterator of already processed issues into the milestone's MilestoneData.
+
+    Args:
+        issues : Iterator[Issue]
+            Issues that passed processIssueDicts for this milestone
+        ledgerScope : str
+            Prefix of the milestone's score ledger (see MilestoneAccumulator)
+        (remaining arguments match getTeamMetricsForMilestone)
+    """
+    accumulator = MilestoneAccumulator(
+        milestone=milestone,
+        members=members,
+        managers=managers,
+        startDate=startDate,
+        endDate=endDate,
+        sprints=sprints,
+        minTasksPerSprint=minTasksPerSprint,
+        useDecay=useDecay,
+        milestoneGrade=milestoneGrade,
+        shouldCountOpenIssues=shouldCountOpenIssues,
+        logger=logger,
+        ledgerScope=ledgerScope,
     )
-    thread.start()
+    for issue in issues:
+        accumulator.addIssue(issue)
+    return accumulator.result()
+
+
+class MilestoneAccumulator:
+    """
+    Running totals for one milestone: points, sprint tasks, labels, issue timings and
+    lecture topic tasks. Issues that were already processed for the milestone are added
+    one at a time and result() turns the totals into the milestone's MilestoneData.
+
+    With a `ledgerScope`, what every issue contributes is kept in a ScoreLedger, so the
+    next run only scores the issues that changed and adds up the stored contributions
+    of the others. The totals are still summed in the order the issues come in, so they
+    match a full rescoring exactly.
+
+    Args match getTeamMetricsForMilestone, plus:
+        ledgerScope (str | None): Prefix of the milestone's score ledger (e.g. the org
+            and team). No ledger is kept without it.
+    """
+
+    def __init__(
+        self,
+        *,
+        milestone: str,
+        members: list[str],
+        managers: list[str],
+        startDate: datetime,
+        endDate: datetime,
+        sprints: int,
+        minTasksPerSprint: int,
+        useDecay: bool,
+        milestoneGrade: float,
+        shouldCountOpenIssues: bool,
+        logger: logging.Logger,
+        ledgerScope: str | None = None,
+    ):
+        self.milestone = milestone
+        self.members = members
+        self.managers = managers
+        self.startDate = startDate
+        self.endDate = endDate
+        self.sprints = sprints
+        self.minTasksPerSprint = minTasksPerSprint
+        self.useDecay = useDecay
+        self.milestoneGrade = milestoneGrade
+        self.shouldCountOpenIssues = shouldCountOpenIssues
+        self.logger = logger
+
+        print(members)
+        self.developers = [member for member in members if member not in managers]
+        logger.debug(f"Developers: {self.developers}, Managers: {managers}")
+        self.devPointsClosed = {dev: 0.0 for dev in self.developers}
+        self.devTasksCompleted = {
+            dev: [0 for _ in range(sprints)] for dev in self.developers
+        }
+        self.totalPointsClosed = 0.0
+        self.sprintCutoffs = generateSprintCutoffs(
+            startDate=startDate, endDate=endDate, sprints=sprints
+        )
+        logger.debug(f"Sprint cutoffs: {self.sprintCutoffs}")
+        self.devPointsByLabel: dict[str, dict[str, float]] = {
+            dev: {} for dev in self.developers
+        }
+        self.milestoneLabels: set[str] = set()
+        self.devIssueTimings: dict[str, list[tuple[int | None, float, float]]] = {
+            dev: [] for dev in self.developers
+        }
+        self.devPointsTimeline: dict[str, list[tuple[str, float]]] = {
+            dev: [] for dev in self.developers
+        }
+        self.lectureTopicTaskData = LectureTopicTaskData()
+        self.lectureTopicTaskData.lectureTopicTasksByDeveloperByMilestone = {
+            member: {} for member in members
+        }
+        self.ledger = None
+        if ledgerScope is not None:
+            self.ledger = ScoreLedger.forMilestone(
+                scope=ledgerScope,
+                milestone=milestone,
+                inputs={
+                    "startDate": startDate,
+                    "endDate": endDate,
+                    "sprints": sprints,
+                    "useDecay": useDecay,
+                    "developers": self.developers,
+                    "managers": managers,
+                },
+            )
+
+    def addIssue(self, issue: Issue):
+        logger = self.logger
+        recordLectureTopicTask(self.lectureTopicTaskData, issue, logger=logger)
 
-    with ThreadPoolExecutor() as executor:
-        # Run concurrently to obtain lecture topic task data in parallel with issue metrics data
-        future = executor.submit(
-            getLectureTopicTaskMetricsFromIssues,
-            getIteratorFromQueue(lectureTopicTaskQueue),
-            members,
-            logger,
+        logger.debug(f"Calculating scores for issue #{issue.number}")
+        contribution = None
+        if self.ledger is not None:
+            fingerprint = issueFingerprint(issue)
+            contribution = self.ledger.lookup(fingerprint)
+            if contribution is not None:
+                for level, message in contribution.logMessages:
+                    logger.log(level, message)
+        if contribution is None:
+            contribution = self.scoreIssue(issue)
+            if self.ledger is not None:
+                self.ledger.store(fingerprint, contribution)
+        self.addContribution(contribution)
+
+    def scoreIssue(self, issue: Issue) -> IssueContribution:
+        """Scores an issue and works out what it adds to the milestone's totals."""
+        recorder = ScoringLogRecorder(self.logger)
+        issueMetrics = calculateIssueScores(
+            issue=issue,
+            managers=self.managers,
+            developers=self.developers,
+            startDate=self.startDate,
+            endDate=self.endDate,
+            useDecay=self.useDecay,
+            logger=recorder,
+        )
+        # Calculate cycle time and lead time for this issue
+        lead_time_hours = 0.0
+        cycle_time_hours = 0.0
+        if issue.closedAt is not None:
+            lead_time_hours = (issue.closedAt - issue.createdAt).total_seconds() / 3600.0
+            # Find the first assignment event for the developer(s) who closed the issue
+            first_assigned_at = None
+            for event in issue.timeline:
+                if event.event_type == "assigned" and event.created_at is not None:
+                    if first_assigned_at is None or event.created_at < first_assigned_at:
+                        first_assigned_at = event.created_at
+            if first_assigned_at is not None:
+                cycle_time_hours = (issue.closedAt - first_assigned_at).total_seconds() / 3600.0
+            else:
+                # Fallback: use createdAt if no assignment event found
+                cycle_time_hours = lead_time_hours
+        # attribute task completion to appropriate sprint
+        taskCompletionDate = (
+            issue.closedAt if issue.closedAt is not None else issue.createdAt
+        )
+        return IssueContribution(
+            pointsByDeveloper=dict(issueMetrics.pointsByDeveloper),
+            bonusesByDeveloper=dict(issueMetrics.bonusesByDeveloper),
+            sprintIndex=getCurrentSprintIndex(
+                date=taskCompletionDate, cutoffs=self.sprintCutoffs
+            ),
+            labels=list(issue.labels),
+            timing=(issue.number, cycle_time_hours, lead_time_hours),
+            closedDate=taskCompletionDate.isoformat(),
+            logMessages=recorder.messages,
         )
 
-        # Fetch all issues for the team, drop invalid ones, and apply their points to the correct developers
-        for issue in getIteratorFromQueue(issueMetricsQueue):
-            logger.debug(f"Calculating scores for issue #{issue.number}")
-            issueMetrics = calculateIssueScores(
-                issue=issue,
-                managers=managers,
-                developers=developers,
-                startDate=startDate,
-                endDate=endDate,
-                useDecay=useDecay,
-                logger=logger,
+    def addContribution(self, contribution: IssueContribution):
+        logger = self.logger
+        # attribute base issue points to developer alongside giving them credit for the completed task
+        for dev, score in contribution.pointsByDeveloper.items():
+            self.devPointsClosed[dev] += score
+            logger.debug(
+                f"{dev} now has closed {round(self.devPointsClosed[dev], 1)} points total"
             )
-            # Calculate cycle time and lead time for this issue
-            lead_time_hours = 0.0
-            cycle_time_hours = 0.0
-            if issue.closedAt is not None:
-                lead_time_hours = (issue.closedAt - issue.createdAt).total_seconds() / 3600.0
-                # Find the first assignment event for the developer(s) who closed the issue
-                first_assigned_at = None
-                for event in issue.timeline:
-                    if event.event_type == "assigned" and event.created_at is not None:
-                        if first_assigned_at is None or event.created_at < first_assigned_at:
-                            first_assigned_at = event.created_at
-                if first_assigned_at is not None:
-                    cycle_time_hours = (issue.closedAt - first_assigned_at).total_seconds() / 3600.0
-                else:
-                    # Fallback: use createdAt if no assignment event found
-                    cycle_time_hours = lead_time_hours
-
-            # attribute base issue points to developer alongside giving them credit for the completed task
-            for dev, score in issueMetrics.pointsByDeveloper.items():
-                devPointsClosed[dev] += score
-                logger.debug(
-                    f"{dev} now has closed {round(devPointsClosed[dev], 1)} points total"
-                )
-                # attribute task completion to appropriate sprint
-                taskCompletionDate = (
-                    issue.closedAt if issue.closedAt is not None else issue.createdAt
-                )
-                sprintIndex = getCurrentSprintIndex(
-                    date=taskCompletionDate, cutoffs=sprintCutoffs
-                )
-                devTasksCompleted[dev][sprintIndex] += 1
-                # update total points closed metric
-                totalPointsClosed += score
-                # track cycle/lead time per developer
-                devIssueTimings[dev].append(
-                    (issue.number, cycle_time_hours, lead_time_hours)
-                )
-                # track cumulative points timeline (closed date, points earned)
-                closed_date = (issue.closedAt or issue.createdAt).isoformat()
-                devPointsTimeline[dev].append((closed_date, score))
-
-                # assign issue score to labels per developer
-                for label in issue.labels:
-                    devPointsByLabel[dev][label] = (
-                        devPointsByLabel[dev].get(label, 0) + score
-                    )
-                    milestoneLabels.add(label)
-
-            # attribute bonuses for developers
-            for dev, bonus in issueMetrics.bonusesByDeveloper.items():
-                devPointsClosed[dev] += bonus
-                # Note that bonus do not increase the total points closed such as to not "raise the bar"
-
-        # Obtain lecture topic task metrics result
-        lectureTopicTaskData = future.result()
-
-    untrimmedAverage = totalPointsClosed / max(1, len(devPointsClosed))
-    trimmedAverage = outliersRemovedAverage(devPointsClosed.values())
-    devBenchmark = max(
-        1, min(untrimmedAverage, trimmedAverage) / (milestoneGrade / 100)
-    )
-    logger.debug(f"Dev benchmark: {devBenchmark}")
-
-    milestoneData.totalPointsClosed = totalPointsClosed
-    for dev in developers:
-        contribution = devPointsClosed[dev] / max(totalPointsClosed, 1)
-        # check if the developer has completed the minimum tasks up until the current sprint
-        # If they haven't thats an automatic zero for that milestone
-        currentSprint = getCurrentSprintIndex(
-            date=pr_tz.localize(datetime.today()), cutoffs=sprintCutoffs
-        )
-        individualGrade = min(devPointsClosed[dev] / devBenchmark * 100, 100.0)
-        for sprintIdx in range(currentSprint + 1):
-            if devTasksCompleted[dev][sprintIdx] < minTasksPerSprint:
-                sprintDateRange = getFormattedSprintDateRange(
-                    startDate=startDate,
-                    endDate=endDate,
-                    cutoffs=sprintCutoffs,
-                    sprintIndex=sprintIdx,
-                )
-                logger.warning(
-                    f"{dev} hasn't completed the minimum {minTasksPerSprint} task(s) required for sprint {sprintDateRange}"
+            self.devTasksCompleted[dev][contribution.sprintIndex] += 1
+            # update total points closed metric
+            self.totalPointsClosed += score
+            # track cycle/lead time per developer
+            self.devIssueTimings[dev].append(contribution.timing)
+            # track cumulative points timeline (closed date, points earned)
+            self.devPointsTimeline[dev].append((contribution.closedDate, score))
+
+            # assign issue score to labels per developer
+            for label in contribution.labels:
+                self.devPointsByLabel[dev][label] = (
+                    self.devPointsByLabel[dev].get(label, 0) + score
                 )
-                if not shouldCountOpenIssues:
-                    individualGrade = 0.0
-        milestoneData.devMetrics[dev] = DeveloperMetrics(
-            tasksBySprint=devTasksCompleted[dev],
-            pointsClosed=devPointsClosed[dev],
-            percentContribution=contribution * 100.0,
-            individualGrade=individualGrade,
-            milestoneGrade=milestoneGrade * 0.4 + individualGrade * 0.6,
-            lectureTopicTasksClosed=lectureTopicTaskData.lectureTopicTasksByDeveloperByMilestone[
-                dev
-            ].get(
-                milestone, 0
-            ),
-            pointPercentByLabel={
-                label: devPointsByLabel[dev].get(label, 0)
-                / max(1, devPointsClosed[dev])
-                * 100
-                for label in milestoneLabels
-            },
-            issueTimings=devIssueTimings.get(dev, []),
-            pointsTimeline=devPointsTimeline.get(dev, []),
+                self.milestoneLabels.add(label)
+
+        # attribute bonuses for developers
+        for dev, bonus in contribution.bonusesByDeveloper.items():
+            self.devPointsClosed[dev] += bonus
+            # Note that bonus do not increase the total points closed such as to not "raise the bar"
+
+    def result(self) -> MilestoneData:
+        logger = self.logger
+        devPointsClosed = self.devPointsClosed
+        totalPointsClosed = self.totalPointsClosed
+        milestoneGrade = self.milestoneGrade
+        milestoneData = MilestoneData(
+            sprints=self.sprints, startDate=self.startDate, endDate=self.endDate
         )
-    return milestoneData
+        untrimmedAverage = totalPointsClosed / max(1, len(devPointsClosed))
+        trimmedAverage = outliersRemovedAverage(devPointsClosed.values())
+        devBenchmark = max(
+            1, min(untrimmedAverage, trimmedAverage) / (milestoneGrade / 100)
+        )
+        logger.debug(f"Dev benchmark: {devBenchmark}")
+
+        milestoneData.totalPointsClosed = totalPointsClosed
+        for dev in self.developers:
+            contribution = devPointsClosed[dev] / max(totalPointsClosed, 1)
+            # check if the developer has completed the minimum tasks up until the current sprint
+            # If they haven't thats an automatic zero for that milestone
+            currentSprint = getCurrentSprintIndex(
+                date=pr_tz.localize(datetime.today()), cutoffs=self.sprintCutoffs
+            )
+            individualGrade = min(devPointsClosed[dev] / devBenchmark * 100, 100.0)
+            for sprintIdx in range(currentSprint + 1):
+                if self.devTasksCompleted[dev][sprintIdx] < self.minTasksPerSprint:
+                    sprintDateRange = getFormattedSprintDateRange(
+                        startDate=self.startDate,
+                        endDate=self.endDate,
+                        cutoffs=self.sprintCutoffs,
+                        sprintIndex=sprintIdx,
+                    )
+                    logger.warning(
+                        f"{dev} hasn't completed the minimum {self.minTasksPerSprint} task(s) required for sprint {sprintDateRange}"
+                    )
+                    if not self.shouldCountOpenIssues:
+                        individualGrade = 0.0
+            milestoneData.devMetrics[dev] = DeveloperMetrics(
+                tasksBySprint=self.devTasksCompleted[dev],
+                pointsClosed=devPointsClosed[dev],
+                percentContribution=contribution * 100.0,
+                individualGrade=individualGrade,
+                milestoneGrade=milestoneGrade * 0.4 + individualGrade * 0.6,
+                lectureTopicTasksClosed=self.lectureTopicTaskData.lectureTopicTasksByDeveloperByMilestone[
+                    dev
+                ].get(
+                    self.milestone, 0
+                ),
+                pointPercentByLabel={
+                    label: self.devPointsByLabel[dev].get(label, 0)
+                    / max(1, devPointsClosed[dev])
+                    * 100
+                    for label in self.milestoneLabels
+                },
+                issueTimings=self.devIssueTimings.get(dev, []),
+                pointsTimeline=self.devPointsTimeline.get(dev, []),
+            )
+        if self.ledger is not None:
+            self.ledger.save()
+        return milestoneData
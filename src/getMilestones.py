@@ -1,6 +1,9 @@
 import logging
 from src.utils.milestones import parseMilestone
-from src.utils.models import Milestone
+from src.utils.models import Milestone, ParsingError
+from src.utils.orgMetadata import getOrgMetadataCache
+from src.utils.asyncQueryRunner import runGraphqlQueryAsync
+from src.utils.queryBatcher import runBatchedQuery
 from src.utils.queryRunner import runGraphqlQuery
 
 
@@ -31,6 +34,8 @@ def getMilestones(*, organization: str, team: str) -> list[Milestone]:
     """
     Retrieve all milestones from repositories belonging to a team in an organization.
 
+    The milestones are only fetched once per run (see OrgMetadataCache).
+
     Args:
         organization (str): The GitHub organization name. Keyword-only argument.
         team (str): The team slug within the organization. Keyword-only argument.
@@ -42,9 +47,71 @@ def getMilestones(*, organization: str, team: str) -> list[Milestone]:
         KeyError: If the response doesn't contain the expected data structure.
         ParsingError: If the milestone objects in the API response have an unknown structure.
     """
-    params = {"org": organization, "team": team}
+    return getOrgMetadataCache().getOrFetch(
+        "milestones",
+        organization=organization,
+        team=team,
+        fetch=lambda: parseMilestonesResponse(
+            runGraphqlQuery(
+                query=get_milestones_query,
+                variables={"org": organization, "team": team},
+            )
+        ),
+    )
+
+
+async def getMilestonesAsync(*, organization: str, team: str) -> list[Milestone]:
+    """Async counterpart of getMilestones, run through the shared async GraphQL client."""
+
+    async def fetch() -> list[Milestone]:
+        params = {"org": organization, "team": team}
+        response: dict = await runGraphqlQueryAsync(
+            query=get_milestones_query, variables=params
+        )
+        return parseMilestonesResponse(response)
+
+    return await getOrgMetadataCache().getOrFetchAsync(
+        "milestones", organization=organization, team=team, fetch=fetch
+    )
+
+
+def getMilestonesBatch(*, organization: str, teams: list[str]) -> dict[str, list[Milestone]]:
+    """
+    Fetches the milestones of many teams using alias-batched queries.
+
+    Teams whose milestones were already looked up in this run are left out, and teams
+    whose batched lookup fails are fetched individually with getMilestones. Teams whose
+    milestones can't be fetched at all, such as a team name that doesn't exist, are left
+    out of the result so they don't stop the others.
+    """
+    cache = getOrgMetadataCache()
+    missing = cache.missing("milestones", organization=organization, teams=teams)
+    responses = runBatchedQuery(
+        runQuery=runGraphqlQuery,
+        query=get_milestones_query,
+        lookups={team: {"org": organization, "team": team} for team in missing},
+        # 1 team * 100 repositories * 100 milestones
+        nodesPerLookup=10_000,
+    )
+    for team, response in responses.items():
+        try:
+            milestones = parseMilestonesResponse(response)
+        except (IndexError, KeyError, ParsingError):
+            # Looked up on its own below
+            continue
+        cache.store("milestones", milestones, organization=organization, team=team)
+    milestonesByTeam = {}
+    for team in teams:
+        try:
+            milestonesByTeam[team] = getMilestones(organization=organization, team=team)
+        except (IndexError, KeyError, ParsingError):
+            continue
+    return milestonesByTeam
+
+
+def parseMilestonesResponse(response: dict, /) -> list[Milestone]:
+    """Collects the milestones of every repository in a get_milestones_query response."""
     milestones = []
-    response: dict = runGraphqlQuery(query=get_milestones_query, variables=params)
     repositories = response["organization"]["teams"]["nodes"][0]["repositories"][
         "nodes"
     ]
@@ -1,5 +1,8 @@
 from src.utils.models import Project
+from src.utils.orgMetadata import getOrgMetadataCache
 from src.utils.project import parseProject
+from src.utils.asyncQueryRunner import runGraphqlQueryAsync
+from src.utils.queryBatcher import runBatchedQuery
 from src.utils.queryRunner import runGraphqlQuery
 
 get_projects_query = """
@@ -23,15 +26,55 @@ query QueryProjects($owner: String!, $project_name: String!,  $nextPage: String)
 
 
 def getProject(*, organization: str, project_name: str) -> Project:
+    """Looks up a project by its exact name, once per run (see OrgMetadataCache)."""
+    return getOrgMetadataCache().getOrFetch(
+        "project",
+        organization=organization,
+        team=project_name,
+        fetch=lambda: fetchProject(organization=organization, project_name=project_name),
+    )
+
+
+async def getProjectAsync(*, organization: str, project_name: str) -> Project:
+    """Async counterpart of getProject, run through the shared async GraphQL client."""
+    return await getOrgMetadataCache().getOrFetchAsync(
+        "project",
+        organization=organization,
+        team=project_name,
+        fetch=lambda: fetchProjectAsync(
+            organization=organization, project_name=project_name
+        ),
+    )
+
+
+def fetchProject(*, organization: str, project_name: str) -> Project:
     params = {"owner": organization, "project_name": project_name}
     hasAnotherPage = True
     while hasAnotherPage:
         response: dict = runGraphqlQuery(query=get_projects_query, variables=params)
-        project_dicts: list[dict] = response["organization"]["projectsV2"]["nodes"]
-        for project_dict in project_dicts:
-            project = parseProject(project_dict)
-            if project.name == project_name:
-                return project
+        project = findProjectInResponse(response, project_name=project_name)
+        if project is not None:
+            return project
+        hasAnotherPage = response["organization"]["projectsV2"]["pageInfo"][
+            "hasNextPage"
+        ]
+        if hasAnotherPage:
+            params["nextPage"] = response["organization"]["projectsV2"]["pageInfo"][
+                "endCursor"
+            ]
+    raise projectNotFoundError(project_name)
+
+
+async def fetchProjectAsync(*, organization: str, project_name: str) -> Project:
+    params = {"owner": organization, "project_name": project_name}
+    hasAnotherPage = True
+    while hasAnotherPage:
+        response: dict = await runGraphqlQueryAsync(
+            query=get_projects_query, variables=params
+        )
+        project = findProjectInResponse(response, project_name=project_name)
+        if project is not None:
+            return project
         hasAnotherPage = response["organization"]["projectsV2"]["pageInfo"][
             "hasNextPage"
         ]
@@ -39,7 +82,59 @@ def getProject(*, organization: str, project_name: str) -> Project:
             params["nextPage"] = response["organization"]["projectsV2"]["pageInfo"][
                 "endCursor"
             ]
-    raise ValueError(
+    raise projectNotFoundError(project_name)
+
+
+def getProjectsBatch(*, organization: str, project_names: list[str]) -> dict[str, Project]:
+    """
+    Looks up many projects by name using alias-batched queries.
+
+    The batch covers the first page of matches for every name not looked up yet in this
+    run. Names that aren't found there but have more pages, or whose batched lookup
+    failed, are looked up with getProject. Names that don't exist are left out of the
+    result, so one misspelled project doesn't stop the others; getProject raises the
+    ValueError explaining it.
+    """
+    cache = getOrgMetadataCache()
+    missing = cache.missing("project", organization=organization, teams=project_names)
+    responses = runBatchedQuery(
+        runQuery=runGraphqlQuery,
+        query=get_projects_query,
+        lookups={
+            name: {"owner": organization, "project_name": name} for name in missing
+        },
+    )
+    for name in missing:
+        project = None
+        if name in responses:
+            try:
+                project = findProjectInResponse(responses[name], project_name=name)
+            except KeyError:
+                # Looked up on its own below
+                pass
+        if project is not None:
+            cache.store("project", project, organization=organization, team=name)
+    projects = {}
+    for name in project_names:
+        try:
+            projects[name] = getProject(organization=organization, project_name=name)
+        except (KeyError, ValueError):
+            continue
+    return projects
+
+
+def findProjectInResponse(response: dict, /, *, project_name: str) -> Project | None:
+    """Returns the project named exactly project_name from a page of get_projects_query."""
+    project_dicts: list[dict] = response["organization"]["projectsV2"]["nodes"]
+    for project_dict in project_dicts:
+        project = parseProject(project_dict)
+        if project.name == project_name:
+            return project
+    return None
+
+
+def projectNotFoundError(project_name: str) -> ValueError:
+    return ValueError(
         f"Project Board with name {project_name} not found in organization. Ensure that all"
         " the team's issues are listed in a board with this *exact* name."
     )
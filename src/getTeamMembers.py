@@ -1,3 +1,6 @@
+from src.utils.asyncQueryRunner import runGraphqlQueryAsync
+from src.utils.orgMetadata import getOrgMetadataCache
+from src.utils.queryBatcher import runBatchedQuery
 from src.utils.queryRunner import runGraphqlQuery
 
 member_fetching_query = """
@@ -18,8 +21,65 @@ query GetTeamMembers($owner: String!, $team: String!) {
 
 
 def getTeamMembers(organization, team) -> list[str]:
-    params = {"owner": organization, "team": team}
-    response = runGraphqlQuery(query=member_fetching_query, variables=params)
+    return getOrgMetadataCache().getOrFetch(
+        "members",
+        organization=organization,
+        team=team,
+        fetch=lambda: parseTeamMembersResponse(
+            runGraphqlQuery(
+                query=member_fetching_query,
+                variables={"owner": organization, "team": team},
+            )
+        ),
+    )
+
+
+async def getTeamMembersAsync(organization, team) -> list[str]:
+    async def fetch() -> list[str]:
+        params = {"owner": organization, "team": team}
+        response = await runGraphqlQueryAsync(
+            query=member_fetching_query, variables=params
+        )
+        return parseTeamMembersResponse(response)
+
+    return await getOrgMetadataCache().getOrFetchAsync(
+        "members", organization=organization, team=team, fetch=fetch
+    )
+
+
+def getTeamMembersBatch(organization: str, teams: list[str]) -> dict[str, list[str]]:
+    """
+    Fetches the members of many teams using alias-batched queries.
+
+    Teams whose members were already looked up in this run are left out, and teams
+    whose batched lookup fails are fetched individually with getTeamMembers. Teams whose
+    members can't be fetched at all are left out of the result so they don't stop the
+    others.
+    """
+    cache = getOrgMetadataCache()
+    missing = cache.missing("members", organization=organization, teams=teams)
+    responses = runBatchedQuery(
+        runQuery=runGraphqlQuery,
+        query=member_fetching_query,
+        lookups={team: {"owner": organization, "team": team} for team in missing},
+    )
+    for team, response in responses.items():
+        try:
+            members = parseTeamMembersResponse(response)
+        except KeyError:
+            # Looked up on its own below
+            continue
+        cache.store("members", members, organization=organization, team=team)
+    membersByTeam = {}
+    for team in teams:
+        try:
+            membersByTeam[team] = getTeamMembers(organization, team)
+        except KeyError:
+            continue
+    return membersByTeam
+
+
+def parseTeamMembersResponse(response: dict, /) -> list[str]:
     teams = response["organization"]["teams"]["nodes"]
     if len(teams) < 1:
         return []
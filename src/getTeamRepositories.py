@@ -0,0 +1,69 @@
+from src.utils.asyncQueryRunner import runGraphqlQueryAsync
+from src.utils.orgMetadata import getOrgMetadataCache
+from src.utils.queryRunner import runGraphqlQuery
+
+team_repositories_query = """
+query GetTeamRepositories($owner: String!, $team: String!) {
+  organization(login: $owner) {
+    teams(query: $team, first: 1) {
+      nodes {
+        repositories(first: 100) {
+          nodes {
+            nameWithOwner
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def getTeamRepositories(*, organization: str, team: str) -> list[str]:
+    """
+    Retrieve the repositories a team of an organization has access to, once per run
+    (see OrgMetadataCache).
+
+    Args:
+        organization (str): The GitHub organization name. Keyword-only argument.
+        team (str): The team slug within the organization. Keyword-only argument.
+
+    Returns:
+        list[str]: The `owner/name` of every repository of the team.
+    """
+    return getOrgMetadataCache().getOrFetch(
+        "repositories",
+        organization=organization,
+        team=team,
+        fetch=lambda: parseTeamRepositoriesResponse(
+            runGraphqlQuery(
+                query=team_repositories_query,
+                variables={"owner": organization, "team": team},
+            )
+        ),
+    )
+
+
+async def getTeamRepositoriesAsync(*, organization: str, team: str) -> list[str]:
+    """Async counterpart of getTeamRepositories, run through the shared async GraphQL client."""
+
+    async def fetch() -> list[str]:
+        params = {"owner": organization, "team": team}
+        response = await runGraphqlQueryAsync(
+            query=team_repositories_query, variables=params
+        )
+        return parseTeamRepositoriesResponse(response)
+
+    return await getOrgMetadataCache().getOrFetchAsync(
+        "repositories", organization=organization, team=team, fetch=fetch
+    )
+
+
+def parseTeamRepositoriesResponse(response: dict, /) -> list[str]:
+    teams = response["organization"]["teams"]["nodes"]
+    if len(teams) < 1:
+        return []
+    return [
+        repository["nameWithOwner"]
+        for repository in teams[0]["repositories"]["nodes"]
+    ]
@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+from src.utils.constants import getMaxInFlight
+from src.utils.queryRunner import runGraphqlQuery
+
+
+class AsyncGraphqlClient:
+    """
+    Runs GraphQL queries from coroutines on top of the pooled, rate limited query runner.
+
+    Each query runs runGraphqlQuery on a worker thread, so requests share the
+    transport's kept-alive connections and the process-wide rate limit budget while the
+    event loop stays free to start more of them. A request holds its thread until the
+    response is read, so the number of workers caps how many requests are in flight at
+    once: coroutines past it wait for a free worker. The cap is set with
+    GITHUB_API_MAX_IN_FLIGHT (see getMaxInFlight), and the transport keeps at least as
+    many connections.
+
+    Args:
+        maxInFlight (int): Maximum number of requests running at the same time.
+    """
+
+    def __init__(self, *, maxInFlight: int):
+        self.maxInFlight = maxInFlight
+        self._executor = ThreadPoolExecutor(
+            max_workers=maxInFlight, thread_name_prefix="graphql"
+        )
+
+    async def run(
+        self,
+        *,
+        query: str,
+        variables: dict | None = None,
+        maxTransientRetries: int | None = None,
+    ) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(
+                runGraphqlQuery,
+                query=query,
+                variables=variables,
+                maxTransientRetries=maxTransientRetries,
+            ),
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_client: AsyncGraphqlClient | None = None
+_clientLock = threading.Lock()
+
+
+def getAsyncClient() -> AsyncGraphqlClient:
+    """Returns the process-wide async client, with getMaxInFlight workers."""
+    global _client
+    if _client is None:
+        with _clientLock:
+            if _client is None:
+                _client = AsyncGraphqlClient(maxInFlight=getMaxInFlight())
+    return _client
+
+
+async def runGraphqlQueryAsync(
+    *,
+    query: str,
+    variables: dict | None = None,
+    maxTransientRetries: int | None = None,
+) -> dict:
+    """Async counterpart of runGraphqlQuery, executed through the shared AsyncGraphqlClient."""
+    return await getAsyncClient().run(
+        query=query, variables=variables, maxTransientRetries=maxTransientRetries
+    )
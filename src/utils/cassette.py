@@ -0,0 +1,124 @@
+from collections import defaultdict, deque
+import gzip
+import json
+import threading
+from requests.structures import CaseInsensitiveDict
+from src.utils.checkpoints import queryFingerprint
+
+
+class CassetteMismatchError(LookupError):
+    """Raised when a replayed run sends a request the cassette has no response left for."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class CassetteResponse:
+    """The parts of a requests.Response that runGraphqlQuery reads, rebuilt from a cassette."""
+
+    def __init__(self, *, status_code: int, headers: dict[str, str], text: str):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size: int = 1):
+        content = self.text.encode()
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+def requestKey(payload: dict) -> str:
+    return queryFingerprint(query=payload["query"], variables=payload.get("variables"))
+
+
+class RecordingTransport:
+    """
+    Wraps a transport and appends every request and response it sees to a cassette.
+
+    The cassette is a gzip compressed file holding one JSON interaction per line. Each
+    interaction is appended as soon as its response arrives, so a run that dies halfway
+    still leaves a usable cassette. Request headers, and with them the API token, are
+    never written.
+
+    Args:
+        inner: Transport that actually sends the requests.
+        path (str): Cassette file to write. An existing file is overwritten.
+    """
+
+    def __init__(self, inner, *, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        with gzip.open(path, mode="wt"):
+            pass
+
+    def post(self, *, payload: dict, headers: dict[str, str], stream: bool = False):
+        # Reading the text below consumes a streamed body, which iter_content then replays
+        response = self.inner.post(payload=payload, headers=headers, stream=stream)
+        interaction = {
+            "request": {"query": payload["query"], "variables": payload.get("variables")},
+            "response": {
+                "status": response.status_code,
+                "headers": dict(response.headers),
+                "body": response.text,
+            },
+        }
+        with self._lock:
+            # Every append adds a gzip member; gzip readers read them back as one stream
+            with gzip.open(self.path, mode="at") as cassette:
+                cassette.write(json.dumps(interaction) + "\n")
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayTransport:
+    """
+    Serves the responses of a recorded cassette without any network access.
+
+    Responses are matched to requests by query and variables, and identical requests
+    (e.g. a retried page) get their recorded responses in the order they were recorded.
+    Matching by content rather than by position keeps replay correct when concurrent
+    fetchers send their requests in a different order than the recorded run did.
+
+    Args:
+        path (str): Cassette file written by RecordingTransport.
+    """
+
+    def __init__(self, *, path: str):
+        self.path = path
+        self._responses: defaultdict[str, deque[dict]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        with gzip.open(path, mode="rt") as cassette:
+            for line in cassette:
+                interaction = json.loads(line)
+                self._responses[requestKey(interaction["request"])].append(
+                    interaction["response"]
+                )
+
+    def post(
+        self, *, payload: dict, headers: dict[str, str], stream: bool = False
+    ) -> CassetteResponse:
+        with self._lock:
+            responses = self._responses.get(requestKey(payload))
+            if not responses:
+                raise CassetteMismatchError(
+                    f"{self.path} has no recorded response left for this request:\n"
+                    f"{payload['query']}\nvariables: {payload.get('variables')}"
+                )
+            recorded = responses.popleft()
+        return CassetteResponse(
+            status_code=recorded["status"],
+            headers=recorded["headers"],
+            text=recorded["body"],
+        )
+
+    def close(self):
+        pass
@@ -0,0 +1,291 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+import shutil
+from src.getProject import getProject
+from src.getTeamRepositories import getTeamRepositories
+from src.utils.checkpoints import writeJsonAtomically
+from src.utils.constants import getCacheDirectory
+from src.utils.models import MilestoneConfig
+from src.utils.queryRunner import runGraphqlQuery
+
+team_activity_probe_fields = """
+  organization(login: $owner) {
+    projectV2(number: $projectNumber) {
+      updatedAt
+      items(first: 0) {
+        totalCount
+      }
+    }
+    teams(query: $team, first: 1) {
+      nodes {
+        repositories(first: 100) {
+          nodes {
+            discussions(first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) {
+              totalCount
+              nodes {
+                updatedAt
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+"""
+
+# The counts of 🎉 reactions and comments move when a reaction grants or takes back a
+# bonus, which doesn't move any updatedAt
+issue_search_probe_fields = """
+  search(query: $issues, type: ISSUE, first: 100, after: $issuesCursor) {
+    issueCount
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ... on Issue {
+        url
+        updatedAt
+        reactions(first: 0, content: HOORAY) {
+          totalCount
+        }
+        comments(first: 30) {
+          totalCount
+          nodes {
+            reactions(first: 0, content: HOORAY) {
+              totalCount
+            }
+          }
+        }
+      }
+    }
+  }
+"""
+
+issue_activity_probe_query = (
+    "query ProbeIssueActivity($issues: String!, $issuesCursor: String) {"
+    + issue_search_probe_fields
+    + "}\n"
+)
+
+
+def teamActivityProbeQuery(*, searchIssues: bool) -> str:
+    """
+    The probe query, with the issue search only when the team has repositories to
+    restrict it to: without any repo: qualifier it would search the whole of GitHub.
+    """
+    if not searchIssues:
+        return (
+            "query ProbeTeamActivity($owner: String!, $projectNumber: Int!, $team: String!) {"
+            + team_activity_probe_fields
+            + "}\n"
+        )
+    return (
+        "query ProbeTeamActivity(\n"
+        "  $owner: String!\n"
+        "  $projectNumber: Int!\n"
+        "  $team: String!\n"
+        "  $issues: String!\n"
+        "  $issuesCursor: String\n"
+        ") {"
+        + team_activity_probe_fields
+        + issue_search_probe_fields
+        + "}\n"
+    )
+
+
+def probeTeamActivity(*, org: str, team: str) -> dict:
+    """
+    Reads the timestamps and counts that move when anything a team's reports are built
+    from changes: the project's updatedAt and item count, the updatedAt and 🎉 reaction
+    and comment counts of every issue of the team's repositories, and the latest
+    updated Scrum discussion of each of them.
+
+    It takes one request, plus one for every hundred issues past the first hundred, of a
+    few dozen points each (the reactions of the first 30 comments of every issue are
+    counted; those of later comments aren't). That's still a fraction of what fetching
+    the project costs.
+
+    The project and repositories come from the run's metadata cache, so the probe
+    doesn't add lookups of its own.
+
+    Returns:
+        dict: The probed values, to be compared with those of a previous run.
+    """
+    project = getProject(organization=org, project_name=team)
+    repositories = getTeamRepositories(organization=org, team=team)
+    variables = {"owner": org, "projectNumber": project.number, "team": team}
+    if repositories:
+        variables["issues"] = " ".join(
+            ["is:issue", "sort:updated-desc"]
+            + [f"repo:{repository}" for repository in repositories]
+        )
+    response = runGraphqlQuery(
+        query=teamActivityProbeQuery(searchIssues=bool(repositories)),
+        variables=variables,
+    )
+    search = response.get("search")
+    if search is not None:
+        page = search
+        while page["pageInfo"]["hasNextPage"]:
+            page = runGraphqlQuery(
+                query=issue_activity_probe_query,
+                variables={
+                    "issues": variables["issues"],
+                    "issuesCursor": page["pageInfo"]["endCursor"],
+                },
+            )["search"]
+            search["nodes"].extend(page["nodes"])
+    return parseTeamActivityResponse(response)
+
+
+def parseTeamActivityResponse(response: dict, /) -> dict:
+    """Reduces a probe response, with every page of its issue search, to the probed values."""
+    project = response["organization"]["projectV2"]
+    discussions = []
+    teams = response["organization"]["teams"]["nodes"]
+    if teams:
+        discussions = [
+            repository["discussions"]
+            for repository in teams[0]["repositories"]["nodes"]
+            if repository and repository["discussions"]
+        ]
+    search = response.get("search") or {"issueCount": 0, "nodes": []}
+    return {
+        "projectUpdatedAt": project["updatedAt"],
+        "projectItems": project["items"]["totalCount"],
+        "issues": search["issueCount"],
+        "latestIssueUpdatedAt": latestUpdatedAt(search["nodes"]),
+        "issueReactions": issueReactionsDigest(search["nodes"]),
+        "discussions": sum(connection["totalCount"] for connection in discussions),
+        "latestDiscussionUpdatedAt": latestUpdatedAt(
+            [node for connection in discussions for node in connection["nodes"]]
+        ),
+    }
+
+
+def issueReactionsDigest(nodes: list[dict], /) -> str:
+    """
+    Digest of the 🎉 reaction and comment counts of every issue, and of the 🎉 reactions
+    of their comments: like itemVersion, it moves when a reaction changes a score.
+    """
+    counts = []
+    for node in nodes:
+        if not node:
+            continue
+        comments = node["comments"]
+        parts = [node["url"], node["reactions"]["totalCount"], comments["totalCount"]]
+        parts += [comment["reactions"]["totalCount"] for comment in comments["nodes"]]
+        counts.append("|".join(str(part) for part in parts))
+    return hashlib.blake2b("\n".join(sorted(counts)).encode(), digest_size=16).hexdigest()
+
+
+def latestUpdatedAt(nodes: list[dict], /) -> str | None:
+    return max((node["updatedAt"] for node in nodes if node), default=None)
+
+
+def sprintMarkers(
+    milestones: dict[str, MilestoneConfig], *, sprints: int, now: datetime
+) -> dict[str, int]:
+    """
+    Where `now` falls in every milestone: 0 before it starts, `k` during its k-th
+    sprint and `sprints + 1` once it's over. The reports mark the current sprint and
+    only hold developers to the sprints that started, so they change when this does.
+    """
+    sprints = max(1, sprints)
+    markers = {}
+    for milestone, config in milestones.items():
+        boundaries = [
+            config.startDate + (config.endDate - config.startDate) * (index / sprints)
+            for index in range(sprints + 1)
+        ]
+        markers[milestone] = sum(1 for boundary in boundaries if boundary <= now)
+    return markers
+
+
+class RunState:
+    """
+    On-disk record of the last successful run for a team: what its outputs were built
+    from (the probed activity, the config and the time markers) and copies of the
+    outputs themselves.
+
+    A run that would be built from the same inputs can restore the copies instead of
+    fetching and scoring everything again.
+
+    Args:
+        directory (str): Directory holding the state and the copied outputs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @classmethod
+    def forTeam(cls, *, org: str, team: str) -> "RunState | None":
+        """Returns the run state of a team, or None if no cache directory is configured."""
+        cacheDirectory = getCacheDirectory()
+        if cacheDirectory is None:
+            return None
+        safeName = "".join(c if c.isalnum() else "_" for c in f"{org}-{team}")
+        return cls(os.path.join(cacheDirectory, "runs", safeName))
+
+    @property
+    def _statePath(self) -> str:
+        return os.path.join(self.directory, "state.json")
+
+    @property
+    def _outputsDirectory(self) -> str:
+        return os.path.join(self.directory, "outputs")
+
+    def _load(self) -> dict | None:
+        try:
+            with open(self._statePath) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def matches(self, fingerprint: dict) -> bool:
+        """Whether the last successful run was built from exactly these inputs."""
+        state = self._load()
+        if state is None:
+            return False
+        # Round trip through JSON so tuples and lists compare equal
+        return state["fingerprint"] == json.loads(json.dumps(fingerprint, default=str))
+
+    def restoreOutputs(self, destination: str = ".") -> list[str]:
+        """Copies the outputs of the last successful run into `destination`."""
+        state = self._load()
+        if state is None:
+            return []
+        restored = []
+        for name in state["outputs"]:
+            shutil.copy2(
+                os.path.join(self._outputsDirectory, name),
+                os.path.join(destination, name),
+            )
+            restored.append(name)
+        return restored
+
+    def record(self, fingerprint: dict, outputs: list[str]) -> None:
+        """Stores the inputs and copies of the outputs of a successful run."""
+        # The old state goes first, so it never points at outputs that are being replaced
+        if os.path.exists(self._statePath):
+            os.remove(self._statePath)
+        shutil.rmtree(self._outputsDirectory, ignore_errors=True)
+        os.makedirs(self._outputsDirectory)
+        names = []
+        for path in outputs:
+            if not os.path.exists(path):
+                continue
+            name = os.path.basename(path)
+            shutil.copy2(path, os.path.join(self._outputsDirectory, name))
+            names.append(name)
+        # Written last, so a run that dies while copying leaves no state behind
+        writeJsonAtomically(
+            self._statePath,
+            {
+                "fingerprint": json.loads(json.dumps(fingerprint, default=str)),
+                "outputs": names,
+            },
+        )
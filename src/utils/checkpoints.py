@@ -0,0 +1,158 @@
+from collections.abc import Iterator
+import contextlib
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from src.utils.constants import getCacheDirectory
+
+# Checkpoints left behind by a failed run are only resumed for this long
+checkpoint_max_age_seconds = 12 * 60 * 60
+
+
+@dataclass(kw_only=True)
+class CheckpointPage:
+    nodes: list[dict]
+    endCursor: str | None
+    hasNextPage: bool
+
+
+def queryFingerprint(*, query: str, variables: dict | None) -> str:
+    """Stable hash identifying a query document together with its variables."""
+    encoded = json.dumps(
+        {"query": query, "variables": variables or {}}, sort_keys=True
+    ).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def writeJsonAtomically(path: str, data) -> None:
+    """Writes JSON to a temporary file and moves it into place so readers never see half a file."""
+    # Unique per process and thread, so concurrent writers never share a temporary file
+    temporaryPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporaryPath, mode="w") as file:
+        json.dump(data, file)
+    os.replace(temporaryPath, path)
+
+
+def writePickleAtomically(path: str, data) -> None:
+    """Pickles data to a temporary file and moves it into place, like writeJsonAtomically."""
+    temporaryPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporaryPath, mode="wb") as file:
+        pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+    os.replace(temporaryPath, path)
+
+
+@contextlib.contextmanager
+def lockFile(path: str) -> Iterator[None]:
+    """
+    Holds an exclusive lock on `path` (through a `.lock` file next to it) for the
+    duration of the block, so processes sharing a cache directory take turns
+    reading and rewriting it.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", mode="a+") as lock:
+        if os.name == "nt":
+            import msvcrt
+
+            lock.seek(0)
+            # Retries for about 10 seconds before giving up
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+class PageCheckpoint:
+    """
+    On-disk record of the pages fetched so far for one paginated query.
+
+    Each page is written to its own file as soon as it arrives, along with the cursor
+    that follows it. If the run dies halfway, the next run with the same query and
+    variables replays the stored pages locally and continues from the last good cursor.
+    The checkpoint is removed once the pagination finishes.
+
+    Args:
+        directory (str): Directory holding this query's page files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @classmethod
+    def forQuery(
+        cls, *, name: str, query: str, variables: dict | None
+    ) -> "PageCheckpoint | None":
+        """
+        Returns the checkpoint for a query, or None if no cache directory is configured.
+
+        Args:
+            name (str): Readable prefix for the checkpoint directory (e.g. the team name).
+            query (str): The paginated query document.
+            variables (dict | None): The query variables, excluding the cursor.
+        """
+        cacheDirectory = getCacheDirectory()
+        if cacheDirectory is None:
+            return None
+        safeName = "".join(c if c.isalnum() else "_" for c in name)
+        fingerprint = queryFingerprint(query=query, variables=variables)[:16]
+        return cls(os.path.join(cacheDirectory, "checkpoints", f"{safeName}-{fingerprint}"))
+
+    def _pagePath(self, index: int) -> str:
+        return os.path.join(self.directory, f"page-{index:05d}.json")
+
+    def _pageCount(self) -> int:
+        count = 0
+        while os.path.exists(self._pagePath(count)):
+            count += 1
+        return count
+
+    def isStale(self) -> bool:
+        try:
+            age = time.time() - os.path.getmtime(self.directory)
+        except FileNotFoundError:
+            return False
+        return age > checkpoint_max_age_seconds
+
+    def pages(self) -> Iterator[CheckpointPage]:
+        """Yields the stored pages in the order they were fetched."""
+        if self.isStale():
+            self.clear()
+            return
+        for index in range(self._pageCount()):
+            with open(self._pagePath(index)) as file:
+                page = json.load(file)
+            yield CheckpointPage(
+                nodes=page["nodes"],
+                endCursor=page["endCursor"],
+                hasNextPage=page["hasNextPage"],
+            )
+
+    def savePage(self, page: CheckpointPage) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        writeJsonAtomically(
+            self._pagePath(self._pageCount()),
+            {
+                "nodes": page.nodes,
+                "endCursor": page.endCursor,
+                "hasNextPage": page.hasNextPage,
+            },
+        )
+        # Touch the directory so the age check measures time since the last page
+        os.utime(self.directory)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
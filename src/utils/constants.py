@@ -7,6 +7,117 @@ pr_tz = pytz.timezone("America/Puerto_Rico")
 default_start_time = time(hour=8, minute=0)
 default_end_time = time(hour=20, minute=0)
 
+default_graphql_url = "https://api.github.com/graphql"
+default_pool_size = 32
+default_request_timeout = 60.0
+default_team_workers = 8
+
 
 def getToken():
     return os.environ["GITHUB_API_TOKEN"]
+
+
+def getTokens() -> list[str]:
+    """
+    Tokens to spread requests over. GITHUB_API_TOKENS holds a comma separated list;
+    without it the single GITHUB_API_TOKEN is used.
+    """
+    tokens = [
+        token.strip()
+        for token in os.environ.get("GITHUB_API_TOKENS", "").split(",")
+        if token.strip()
+    ]
+    if tokens:
+        return tokens
+    if "GITHUB_API_TOKEN" not in os.environ and getCassettePath() and getCassetteMode() == "replay":
+        # Replayed runs never reach the API, so they don't need a real token
+        return ["replay"]
+    return [getToken()]
+
+
+def getGraphqlUrl() -> str:
+    return os.environ.get("GITHUB_GRAPHQL_URL", default_graphql_url)
+
+
+def getPoolSize() -> int:
+    return int(os.environ.get("GITHUB_API_POOL_SIZE", default_pool_size))
+
+
+def getMaxInFlight() -> int:
+    """
+    Most requests the async fetchers keep in flight at once, from
+    GITHUB_API_MAX_IN_FLIGHT. Defaults to the connection pool size.
+    """
+    return int(os.environ.get("GITHUB_API_MAX_IN_FLIGHT", getPoolSize()))
+
+
+def getRequestTimeout() -> float:
+    return float(os.environ.get("GITHUB_API_TIMEOUT", default_request_timeout))
+
+
+def getCacheDirectory() -> str | None:
+    """Directory for on-disk state kept between runs, or None when it is disabled."""
+    return os.environ.get("INSO_CACHE_DIR") or None
+
+
+def getResponseCacheMaxBytes() -> int:
+    """Size cap of the GraphQL response cache, from INSO_RESPONSE_CACHE_MB. 0 disables it."""
+    return int(float(os.environ.get("INSO_RESPONSE_CACHE_MB", 0)) * 1024 * 1024)
+
+
+def getResponseCacheTtls() -> dict[str, float]:
+    """
+    Per operation TTL overrides for the response cache, read from INSO_RESPONSE_CACHE_TTLS
+    as comma separated `OperationName=seconds` pairs.
+    """
+    ttls = {}
+    for pair in os.environ.get("INSO_RESPONSE_CACHE_TTLS", "").split(","):
+        if "=" in pair:
+            operation, seconds = pair.split("=", 1)
+            ttls[operation.strip()] = float(seconds)
+    return ttls
+
+
+def getCassettePath() -> str | None:
+    return os.environ.get("GITHUB_API_CASSETTE") or None
+
+
+def getCassetteMode() -> str:
+    """`record` or `replay`, from GITHUB_API_CASSETTE_MODE. Only used with a cassette path."""
+    mode = os.environ.get("GITHUB_API_CASSETTE_MODE", "replay").lower()
+    if mode not in ("record", "replay"):
+        raise ValueError(
+            f"GITHUB_API_CASSETTE_MODE must be record or replay, got {mode!r}"
+        )
+    return mode
+
+
+def getIncrementalSyncEnabled() -> bool:
+    """
+    Whether project items are synced incrementally into INSO_CACHE_DIR instead of being
+    downloaded in full, from INSO_INCREMENTAL_SYNC.
+    """
+    enabled = os.environ.get("INSO_INCREMENTAL_SYNC", "").lower() in ("1", "true", "yes")
+    return enabled and getCacheDirectory() is not None
+
+
+def getIssueStoreMaxAge() -> float:
+    """
+    Seconds parsed issues are served from the issue store before being fetched again,
+    from INSO_ISSUE_STORE_MAX_AGE. 0 disables the store; `inf` never refetches.
+    """
+    return float(os.environ.get("INSO_ISSUE_STORE_MAX_AGE", 0))
+
+
+def getDirectoryMaxAge() -> float | None:
+    """
+    Cap in seconds on how long looked up identifiers are kept in the directory cache,
+    from INSO_DIRECTORY_MAX_AGE. 0 disables the directory; None keeps the defaults.
+    """
+    maxAge = os.environ.get("INSO_DIRECTORY_MAX_AGE")
+    return float(maxAge) if maxAge else None
+
+
+def getTeamWorkers() -> int:
+    """Most teams the course exporters process at the same time, from INSO_TEAM_WORKERS."""
+    return int(os.environ.get("INSO_TEAM_WORKERS", default_team_workers))
@@ -0,0 +1,110 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from src.utils.constants import getTokens
+from src.utils.rateLimit import RateLimitScheduler
+
+
+@dataclass
+class Credential:
+    token: str
+    scheduler: RateLimitScheduler
+
+    def __repr__(self) -> str:
+        # Never print whole tokens into logs
+        return f"Credential(token=...{self.token[-4:]})"
+
+
+class CredentialPool:
+    """
+    Spreads requests over several API tokens, each with its own point budget.
+
+    Every token gets its own RateLimitScheduler, so the budget, reset time and learned
+    operation costs are tracked per token from the responses sent with it. Each request
+    goes to the token with the most points left that can send it right away. A token
+    that hits a rate limit is parked until the limit passes while the others carry on;
+    only when every token is parked or paced does the pool wait.
+
+    Args:
+        tokens (list[str]): The API tokens to use. Must not be empty.
+        clock (Callable[[], float]): Returns the current unix time. Replaceable for tests.
+        sleep (Callable[[float], None]): Blocks for the given seconds. Replaceable for tests.
+    """
+
+    def __init__(
+        self,
+        tokens: list[str],
+        *,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        logger: logging.Logger | None = None,
+    ):
+        if not tokens:
+            raise ValueError("A credential pool needs at least one token")
+        self.sleep = sleep
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.credentials = [
+            Credential(
+                token=token,
+                scheduler=RateLimitScheduler(clock=clock, sleep=sleep, logger=logger),
+            )
+            for token in tokens
+        ]
+
+    @property
+    def tokens(self) -> list[str]:
+        return [credential.token for credential in self.credentials]
+
+    def acquire(self, *, operation: str) -> Credential:
+        """
+        Returns the credential a request for the given operation should be sent with,
+        blocking until one of them has the budget for it. The request's expected cost is
+        already reserved from that credential's budget.
+        """
+        while True:
+            byHeadroom = sorted(
+                self.credentials,
+                key=lambda credential: credential.scheduler.headroom(),
+                reverse=True,
+            )
+            delays = []
+            for credential in byHeadroom:
+                delay = credential.scheduler.tryReserve(operation=operation)
+                if delay <= 0:
+                    return credential
+                delays.append(delay)
+            delay = min(delays)
+            self.logger.info(
+                f"Pausing {delay:.1f}s before {operation}: every API token is at its rate limit"
+            )
+            self.sleep(delay)
+
+
+_pool: CredentialPool | None = None
+_poolLock = threading.Lock()
+
+
+def getCredentialPool() -> CredentialPool:
+    """
+    Returns the process-wide credential pool, creating it on first use.
+
+    The tokens are read from the environment (`GITHUB_API_TOKENS`, falling back to
+    `GITHUB_API_TOKEN`). If they change, a new pool is built for the new tokens.
+    """
+    global _pool
+    tokens = getTokens()
+    with _poolLock:
+        if _pool is None or _pool.tokens != tokens:
+            _pool = CredentialPool(tokens)
+        return _pool
+
+
+def setCredentialPool(pool: CredentialPool | None) -> CredentialPool | None:
+    """Replaces the process-wide credential pool and returns the previous one."""
+    global _pool
+    with _poolLock:
+        previous = _pool
+        _pool = pool
+    return previous
@@ -1,8 +1,11 @@
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime, timedelta
 import logging
 from typing import Any, Callable
+from src.utils.checkpoints import PageCheckpoint
 from src.utils.models import Category, Discussion, DiscussionComment, ParsingError
+from src.utils.asyncQueryRunner import runGraphqlQueryAsync
+from src.utils.pagination import paginateConnection, paginateConnectionAsync
 from src.utils.queryRunner import runGraphqlQuery
 
 
@@ -115,7 +118,9 @@ def getDiscussionDicts(
     Retrieves GitHub discussion data through GraphQL API as an iterator of dictionaries.
 
     This function makes paginated GraphQL queries to fetch all discussions from a GitHub repository.
-    It yields each discussion's raw dictionary data one at a time to conserve memory.
+    It yields each discussion's raw dictionary data one at a time to conserve memory. When a
+    cache directory is configured, fetched pages are checkpointed so an interrupted run resumes
+    from the last good cursor.
 
     Args:
         org (str): GitHub organization name
@@ -138,20 +143,46 @@ def getDiscussionDicts(
     params: dict[str, Any] = {"owner": org, "team": team}
     if category is not None:
         params["category"] = category
-    hasAnotherPage = True
-    while hasAnotherPage:
-        response: dict = runGraphqlQuery(
-            query=team_scrum_prep_discussions_query, variables=params
-        )
-        discussion_info: dict = response["organization"]["teams"]["nodes"][0][
-            "repositories"
-        ]["nodes"][0]["discussions"]
-        discussion_dicts: list[dict] = discussion_info["nodes"]
-        yield from discussion_dicts
+    yield from paginateConnection(
+        runQuery=runGraphqlQuery,
+        query=team_scrum_prep_discussions_query,
+        variables=params,
+        cursorVariable="cursor",
+        getConnection=getDiscussionConnection,
+        checkpoint=PageCheckpoint.forQuery(
+            name=f"{org}-{team}-discussions",
+            query=team_scrum_prep_discussions_query,
+            variables=params,
+        ),
+    )
 
-        hasAnotherPage = discussion_info["pageInfo"]["hasNextPage"]
-        if hasAnotherPage:
-            params["cursor"] = discussion_info["pageInfo"]["endCursor"]
+
+async def getDiscussionDictsAsync(
+    *, org: str, team: str, category: int | None = None
+) -> AsyncIterator[dict]:
+    """Async counterpart of getDiscussionDicts, run through the shared async GraphQL client."""
+    params: dict[str, Any] = {"owner": org, "team": team}
+    if category is not None:
+        params["category"] = category
+    async for discussion_dict in paginateConnectionAsync(
+        runQuery=runGraphqlQueryAsync,
+        query=team_scrum_prep_discussions_query,
+        variables=params,
+        cursorVariable="cursor",
+        getConnection=getDiscussionConnection,
+        checkpoint=PageCheckpoint.forQuery(
+            name=f"{org}-{team}-discussions",
+            query=team_scrum_prep_discussions_query,
+            variables=params,
+        ),
+    ):
+        yield discussion_dict
+
+
+def getDiscussionConnection(response: dict, /) -> dict:
+    return response["organization"]["teams"]["nodes"][0]["repositories"]["nodes"][0][
+        "discussions"
+    ]
 
 
 def getDiscussions(
@@ -187,6 +218,16 @@ def getDiscussions(
     ]
 
 
+async def getDiscussionsAsync(
+    *, org: str, team: str, category: int | None = None
+) -> list[Discussion]:
+    """Async counterpart of getDiscussions, run through the shared async GraphQL client."""
+    return [
+        parseDiscussion(discussion_dict=d)
+        async for d in getDiscussionDictsAsync(org=org, team=team, category=category)
+    ]
+
+
 def getWeekIndex(
     *, dateOfInterest: datetime, milestoneStart: datetime, milestoneEnd: datetime
 ) -> int:
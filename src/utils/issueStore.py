@@ -0,0 +1,373 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import os
+import sqlite3
+import threading
+import time
+from src.utils.constants import getCacheDirectory, getIssueStoreMaxAge
+from src.utils.models import Issue, IssueComment, Reaction, ReactionKind, TimelineEvent
+
+schema = """
+CREATE TABLE IF NOT EXISTS syncs (
+    team TEXT PRIMARY KEY,
+    syncedAt REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    team TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT,
+    number INTEGER,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    createdAt TEXT NOT NULL,
+    closedAt TEXT,
+    closed INTEGER NOT NULL,
+    closedBy TEXT,
+    milestone TEXT,
+    urgency REAL,
+    difficulty REAL,
+    modifier REAL,
+    isLectureTopicTask INTEGER NOT NULL,
+    PRIMARY KEY (team, position)
+);
+CREATE INDEX IF NOT EXISTS issues_by_milestone ON issues (team, milestone);
+CREATE INDEX IF NOT EXISTS issues_by_closed_at ON issues (closedAt);
+CREATE INDEX IF NOT EXISTS issues_by_lecture_topic_task ON issues (team, isLectureTopicTask);
+CREATE TABLE IF NOT EXISTS assignees (
+    team TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    login TEXT NOT NULL,
+    PRIMARY KEY (team, position, rank)
+);
+CREATE INDEX IF NOT EXISTS assignees_by_login ON assignees (login);
+CREATE TABLE IF NOT EXISTS labels (
+    team TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (team, position, rank)
+);
+CREATE TABLE IF NOT EXISTS reactions (
+    team TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    -- -1 for reactions to the issue itself, the comment's rank otherwise
+    comment INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    userLogin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (team, position, comment, rank)
+);
+CREATE TABLE IF NOT EXISTS comments (
+    team TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    authorLogin TEXT NOT NULL,
+    PRIMARY KEY (team, position, rank)
+);
+CREATE TABLE IF NOT EXISTS timeline_events (
+    team TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    eventType TEXT NOT NULL,
+    actor TEXT,
+    createdAt TEXT,
+    assignee TEXT,
+    prNumber INTEGER,
+    prUrl TEXT,
+    prMerged INTEGER,
+    PRIMARY KEY (team, position, rank)
+);
+"""
+child_tables = ["assignees", "labels", "reactions", "comments", "timeline_events"]
+
+
+def encodeDate(date: datetime | None) -> str | None:
+    # Stored in UTC so the text order of the column is the chronological order
+    if date is None:
+        return None
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return date.isoformat()
+
+
+def decodeDate(text: str | None) -> datetime | None:
+    return None if text is None else datetime.fromisoformat(text)
+
+
+class IssueStore:
+    """
+    Embedded SQLite database of parsed issues, so metrics can be recomputed without
+    going back to the API.
+
+    Each team's issues are stored with their assignees, labels, reactions, comments and
+    timeline events in separate tables, in the order the API returned them. Issues are
+    indexed by team and milestone, assignee, close date and lecture topic task flag, so
+    issues(...) only reads the rows a metric needs. A team's issues are replaced as a
+    whole whenever they are fetched again, and served for `maxAge` seconds after that.
+
+    Args:
+        path (str): Database file. Created if missing.
+        maxAge (float): Seconds a team's stored issues are served for.
+        clock (Callable[[], float]): Source of the current unix time.
+    """
+
+    def __init__(self, path: str, *, maxAge: float, clock=time.time):
+        self.path = path
+        self.maxAge = maxAge
+        self.clock = clock
+        self._writeLock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            # Lets readers in other threads and processes work while a team is written
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(schema)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per call keeps the store usable from any thread
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def isFresh(self, team: str) -> bool:
+        """Whether the team's issues were stored less than maxAge seconds ago."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT syncedAt FROM syncs WHERE team = ?", (team,)
+            ).fetchone()
+        return row is not None and self.clock() - row["syncedAt"] < self.maxAge
+
+    def replaceIssues(self, team: str, issues: Iterable[Issue]) -> None:
+        """Replaces everything stored for the team with the given issues."""
+        with self._writeLock, self._connect() as connection:
+            connection.execute("DELETE FROM issues WHERE team = ?", (team,))
+            for table in child_tables:
+                connection.execute(f"DELETE FROM {table} WHERE team = ?", (team,))
+            for position, issue in enumerate(issues):
+                self._insertIssue(connection, team, position, issue)
+            connection.execute(
+                "INSERT OR REPLACE INTO syncs (team, syncedAt) VALUES (?, ?)",
+                (team, self.clock()),
+            )
+
+    def _insertIssue(
+        self, connection: sqlite3.Connection, team: str, position: int, issue: Issue
+    ):
+        connection.execute(
+            "INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                team,
+                position,
+                issue.url,
+                issue.number,
+                issue.title,
+                issue.author,
+                encodeDate(issue.createdAt),
+                encodeDate(issue.closedAt),
+                issue.closed,
+                issue.closedBy,
+                issue.milestone,
+                issue.urgency,
+                issue.difficulty,
+                issue.modifier,
+                issue.isLectureTopicTask,
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO assignees VALUES (?, ?, ?, ?)",
+            [(team, position, rank, login) for rank, login in enumerate(issue.assignees)],
+        )
+        connection.executemany(
+            "INSERT INTO labels VALUES (?, ?, ?, ?)",
+            [(team, position, rank, name) for rank, name in enumerate(issue.labels)],
+        )
+        reactions = [(-1, issue.reactions)] + [
+            (rank, comment.reactions) for rank, comment in enumerate(issue.comments)
+        ]
+        connection.executemany(
+            "INSERT INTO reactions VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (team, position, comment, rank, reaction.user_login, str(reaction.kind))
+                for comment, commentReactions in reactions
+                for rank, reaction in enumerate(commentReactions)
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO comments VALUES (?, ?, ?, ?)",
+            [
+                (team, position, rank, comment.author_login)
+                for rank, comment in enumerate(issue.comments)
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO timeline_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    team,
+                    position,
+                    rank,
+                    event.event_type,
+                    event.actor,
+                    encodeDate(event.created_at),
+                    event.assignee,
+                    event.pr_number,
+                    event.pr_url,
+                    event.pr_merged,
+                )
+                for rank, event in enumerate(issue.timeline)
+            ],
+        )
+
+    def issues(
+        self,
+        team: str,
+        *,
+        milestone: str | None = None,
+        includeWithoutMilestone: bool = False,
+        assignee: str | None = None,
+        closedAfter: datetime | None = None,
+        closedBefore: datetime | None = None,
+        lectureTopicTasksOnly: bool = False,
+    ) -> list[Issue]:
+        """
+        Reads a team's stored issues, in the order they were fetched.
+
+        Args:
+            team (str): The team the issues were stored for.
+            milestone (str | None): Only issues of this milestone.
+            includeWithoutMilestone (bool): With `milestone`, also the issues without
+                any milestone.
+            assignee (str | None): Only issues assigned to this login.
+            closedAfter (datetime | None): Only issues closed at or after this time.
+            closedBefore (datetime | None): Only issues closed before this time.
+            lectureTopicTasksOnly (bool): Only lecture topic tasks.
+
+        Returns:
+            list[Issue]: The matching issues.
+        """
+        conditions = ["issues.team = ?"]
+        parameters: list = [team]
+        if milestone is not None:
+            if includeWithoutMilestone:
+                conditions.append("(issues.milestone = ? OR issues.milestone IS NULL)")
+            else:
+                conditions.append("issues.milestone = ?")
+            parameters.append(milestone)
+        if assignee is not None:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM assignees WHERE assignees.login = ?"
+                " AND assignees.team = issues.team AND assignees.position = issues.position)"
+            )
+            parameters.append(assignee)
+        if closedAfter is not None:
+            conditions.append("issues.closedAt >= ?")
+            parameters.append(encodeDate(closedAfter))
+        if closedBefore is not None:
+            conditions.append("issues.closedAt < ?")
+            parameters.append(encodeDate(closedBefore))
+        if lectureTopicTasksOnly:
+            conditions.append("issues.isLectureTopicTask = 1")
+        where = " AND ".join(conditions)
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT * FROM issues WHERE {where} ORDER BY position", parameters
+            ).fetchall()
+            if not rows:
+                return []
+            children = {
+                table: self._childRows(connection, table, where, parameters)
+                for table in child_tables
+            }
+        return [self._buildIssue(row, children) for row in rows]
+
+    @staticmethod
+    def _childRows(
+        connection: sqlite3.Connection, table: str, where: str, parameters: list
+    ) -> defaultdict[int, list[sqlite3.Row]]:
+        rows = connection.execute(
+            f"SELECT {table}.* FROM {table} JOIN issues"
+            f" ON issues.team = {table}.team AND issues.position = {table}.position"
+            f" WHERE {where} ORDER BY {table}.position, {table}.rank",
+            parameters,
+        ).fetchall()
+        byPosition: defaultdict[int, list[sqlite3.Row]] = defaultdict(list)
+        for row in rows:
+            byPosition[row["position"]].append(row)
+        return byPosition
+
+    @staticmethod
+    def _buildIssue(row: sqlite3.Row, children: dict) -> Issue:
+        position = row["position"]
+        reactionsByComment: defaultdict[int, list[Reaction]] = defaultdict(list)
+        for reaction in children["reactions"][position]:
+            reactionsByComment[reaction["comment"]].append(
+                Reaction(user_login=reaction["userLogin"], kind=ReactionKind(reaction["kind"]))
+            )
+        return Issue(
+            url=row["url"],
+            number=row["number"],
+            title=row["title"],
+            author=row["author"],
+            createdAt=decodeDate(row["createdAt"]),
+            closedAt=decodeDate(row["closedAt"]),
+            closed=bool(row["closed"]),
+            closedBy=row["closedBy"],
+            milestone=row["milestone"],
+            assignees=[a["login"] for a in children["assignees"][position]],
+            labels=[label["name"] for label in children["labels"][position]],
+            reactions=reactionsByComment[-1],
+            comments=[
+                IssueComment(
+                    author_login=comment["authorLogin"],
+                    reactions=reactionsByComment[comment["rank"]],
+                )
+                for comment in children["comments"][position]
+            ],
+            timeline=[
+                TimelineEvent(
+                    event_type=event["eventType"],
+                    actor=event["actor"],
+                    created_at=decodeDate(event["createdAt"]),
+                    assignee=event["assignee"],
+                    pr_number=event["prNumber"],
+                    pr_url=event["prUrl"],
+                    pr_merged=None if event["prMerged"] is None else bool(event["prMerged"]),
+                )
+                for event in children["timeline_events"][position]
+            ],
+            urgency=row["urgency"],
+            difficulty=row["difficulty"],
+            modifier=row["modifier"],
+            isLectureTopicTask=bool(row["isLectureTopicTask"]),
+        )
+
+
+_store: IssueStore | None = None
+_storeLock = threading.Lock()
+
+
+def getIssueStore() -> IssueStore | None:
+    """
+    Returns the process-wide issue store, or None when it is disabled.
+
+    The store lives in `<INSO_CACHE_DIR>/issues.sqlite3` and is enabled by giving
+    `INSO_ISSUE_STORE_MAX_AGE` the number of seconds stored issues are served for.
+    """
+    global _store
+    cacheDirectory = getCacheDirectory()
+    maxAge = getIssueStoreMaxAge()
+    if cacheDirectory is None or maxAge <= 0:
+        return None
+    path = os.path.join(cacheDirectory, "issues.sqlite3")
+    with _storeLock:
+        if _store is None or _store.path != path or _store.maxAge != maxAge:
+            _store = IssueStore(path, maxAge=maxAge)
+        return _store
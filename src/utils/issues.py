@@ -1,6 +1,7 @@
 from collections import defaultdict
 from datetime import datetime
 import logging
+from typing import Protocol
 from src.utils.models import (
     IssueComment,
     IssueMetrics,
@@ -63,9 +64,10 @@ def parseIssue(*, issue_dict: dict) -> Issue:
     ]
     labels: list[str] = [label["name"] for label in content["labels"]["nodes"]]
     # Currently, we only search for reactions and comments with HOORAY 🎉
+    # Both are left out of the lighter field profiles (see IssueFields)
     reactions = [
         Reaction(user_login=reaction["user"]["login"], kind=ReactionKind.HOORAY)
-        for reaction in content["reactions"]["nodes"]
+        for reaction in content.get("reactions", {"nodes": []})["nodes"]
     ]
     comments = [
         IssueComment(
@@ -75,7 +77,7 @@ def parseIssue(*, issue_dict: dict) -> Issue:
                 for r in comment["reactions"]["nodes"]
             ],
         )
-        for comment in content["comments"]["nodes"]
+        for comment in content.get("comments", {"nodes": []})["nodes"]
     ]
 
     # Extract the nullable fields
@@ -266,6 +268,19 @@ def whoShouldGetBonus(issue: Issue, managers: list[str]) -> str | None:
     return target
 
 
+class ScoringLogger(Protocol):
+    """
+    What calculateIssueScores logs through: a logging.Logger, or a stand-in that also
+    records the messages (see ScoringLogRecorder).
+    """
+
+    def debug(self, msg: str) -> None: ...
+
+    def info(self, msg: str) -> None: ...
+
+    def warning(self, msg: str) -> None: ...
+
+
 def calculateIssueScores(
     *,
     issue: Issue,
@@ -274,7 +289,7 @@ def calculateIssueScores(
     startDate: datetime,
     endDate: datetime,
     useDecay: bool,
-    logger: logging.Logger,
+    logger: ScoringLogger,
 ) -> IssueMetrics:
     """
     Calculates scores and bonuses for an issue based on various factors and team member roles.
@@ -289,7 +304,7 @@ def calculateIssueScores(
         startDate (datetime): The start date of the relevant period (e.g., milestone start).
         endDate (datetime): The end date of the relevant period (e.g., milestone end).
         useDecay (bool): Flag to determine if decay factor should be applied to the score.
-        logger (logging.Logger): Logger object for recording information and warnings.
+        logger (ScoringLogger): Logger object for recording information and warnings.
 
     Returns:
         IssueMetrics: An object containing two defaultdict(float) attributes:
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from src.utils.checkpoints import queryFingerprint, writeJsonAtomically
+from src.utils.constants import getCacheDirectory
+
+
+# Stored items are fetched again after this long even if their version didn't move, as
+# a 🎉 on a comment changes the score without changing anything the version holds
+item_refetch_max_age = timedelta(days=1)
+# Tombstones are dropped this long after their item was noticed missing
+tombstone_max_age = timedelta(days=30)
+
+
+def itemVersion(item: dict, /) -> str:
+    """
+    What identifies one state of a project item: its own updatedAt, which moves when a
+    field value changes, and that of its issue, which moves when the issue changes.
+    Reactions don't move either, so when the item has them, the counts of the issue's
+    🎉 reactions and comments are part of the version too.
+    """
+    content = item.get("content") or {}
+    parts = [item.get("updatedAt"), content.get("updatedAt")]
+    for name in ("reactions", "comments"):
+        connection = content.get(name) or {}
+        if "totalCount" in connection:
+            parts.append(connection["totalCount"])
+    return "|".join(str(part) for part in parts)
+
+
+def parseSyncTime(text: str, /) -> datetime:
+    time = datetime.fromisoformat(text)
+    return time if time.tzinfo is not None else time.replace(tzinfo=timezone.utc)
+
+
+class ProjectItemStore:
+    """
+    On-disk copy of a project's raw items, kept up to date by incremental syncs.
+
+    Next to every item it keeps the version (see itemVersion) and the time it was
+    fetched at, and the time of the last sync. Items fetched more than
+    item_refetch_max_age ago are due for a refetch whatever their version. Items that
+    disappear from the project are moved to the tombstones with the time their removal
+    was noticed, rather than silently dropped, come back to life if they reappear, and
+    are dropped for good after tombstone_max_age.
+
+    The store is tied to the fields the items were fetched with: when the item query
+    changes, the stored items no longer match it and the store starts out empty.
+
+    Args:
+        path (str): JSON file holding the store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.syncedAt: str | None = None
+        self._items: dict[str, dict] = {}
+        self.tombstones: dict[str, dict] = {}
+        try:
+            with open(path) as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.syncedAt = stored["syncedAt"]
+        self._items = stored["items"]
+        self.tombstones = stored["tombstones"]
+
+    @classmethod
+    def forProject(
+        cls, *, name: str, projectNumber: int, query: str
+    ) -> "ProjectItemStore | None":
+        """
+        Returns the store of a project, or None if no cache directory is configured.
+
+        Args:
+            name (str): Readable prefix for the store file (e.g. the team name).
+            projectNumber (int): The project's number in its organization.
+            query (str): The query the full items are fetched with.
+        """
+        cacheDirectory = getCacheDirectory()
+        if cacheDirectory is None:
+            return None
+        safeName = "".join(c if c.isalnum() else "_" for c in name)
+        fingerprint = queryFingerprint(query=query, variables=None)[:16]
+        return cls(
+            os.path.join(
+                cacheDirectory, "items", f"{safeName}-{projectNumber}-{fingerprint}.json"
+            )
+        )
+
+    @property
+    def isEmpty(self) -> bool:
+        return self.syncedAt is None
+
+    def versions(self) -> dict[str, str]:
+        """The version every stored item was fetched at, by item id."""
+        return {itemId: stored["version"] for itemId, stored in self._items.items()}
+
+    def staleIds(self, *, now: datetime | None = None) -> set[str]:
+        """Ids of the stored items fetched more than item_refetch_max_age ago."""
+        if now is None:
+            now = datetime.now(tz=timezone.utc)
+        return {
+            itemId
+            for itemId, stored in self._items.items()
+            if "fetchedAt" not in stored
+            or now - parseSyncTime(stored["fetchedAt"]) > item_refetch_max_age
+        }
+
+    def items(self) -> list[dict]:
+        """The raw items currently in the project, as of the last sync."""
+        return [stored["item"] for stored in self._items.values()]
+
+    def merge(
+        self, *, listedIds: list[str], changedItems: list[dict], syncedAt: str | None = None
+    ) -> int:
+        """
+        Brings the store up to date with a fresh listing of the project.
+
+        Args:
+            listedIds (list[str]): Ids of every item currently in the project, in order.
+            changedItems (list[dict]): Full raw items of everything new or changed.
+            syncedAt (str | None): ISO time of the sync. Defaults to now.
+
+        Returns:
+            int: The number of items that were turned into tombstones.
+        """
+        if syncedAt is None:
+            syncedAt = datetime.now(tz=timezone.utc).isoformat()
+        changed = {item["id"]: item for item in changedItems}
+        items: dict[str, dict] = {}
+        for itemId in listedIds:
+            if itemId in changed:
+                item = changed[itemId]
+                items[itemId] = {
+                    "version": itemVersion(item),
+                    "fetchedAt": syncedAt,
+                    "item": item,
+                }
+            elif itemId in self._items:
+                items[itemId] = self._items[itemId]
+            self.tombstones.pop(itemId, None)
+        removed = self._items.keys() - items.keys()
+        for itemId in removed:
+            self.tombstones[itemId] = {
+                "removedAt": syncedAt,
+                "item": self._items[itemId]["item"],
+            }
+        self.tombstones = {
+            itemId: tombstone
+            for itemId, tombstone in self.tombstones.items()
+            if parseSyncTime(syncedAt) - parseSyncTime(tombstone["removedAt"])
+            <= tombstone_max_age
+        }
+        self._items = items
+        self.syncedAt = syncedAt
+        return len(removed)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        writeJsonAtomically(
+            self.path,
+            {
+                "syncedAt": self.syncedAt,
+                "items": self._items,
+                "tombstones": self.tombstones,
+            },
+        )
@@ -0,0 +1,140 @@
+from collections.abc import Iterator
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[\s,]*")
+# One token of the JSON outside the streamed array: a complete string, a structural
+# character, or a run of literal characters (numbers, true, false, null)
+_token = re.compile(r'\s*("(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s{}\[\]:,"]+)')
+
+
+class JsonArrayStreamer:
+    """
+    Incrementally decodes a JSON document, handing out the elements of one nested array
+    as soon as each of them has arrived.
+
+    Text is passed in chunk by chunk with feed(), which returns the array elements that
+    were completed by that chunk. Everything outside the array is kept as text and
+    decoded by finish(), with the array left empty. Only the array elements are ever
+    held decoded, one at a time, which is what keeps large pages cheap.
+
+    Args:
+        path (tuple[str, ...]): Keys leading from the document root to the array, e.g.
+            ("data", "organization", "projectV2", "items", "nodes").
+    """
+
+    def __init__(self, path: tuple[str, ...]):
+        self.path = list(path)
+        self._buffer = ""
+        self._skeleton: list[str] = []
+        # Keys of the enclosing containers; None for array elements and the root
+        self._stack: list[str | None] = []
+        self._kinds: list[str] = []
+        self._pendingKey: str | None = None
+        self._expectingKey = False
+        self._state = "before"
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        if self._state == "before":
+            self._scanBefore()
+        if self._state == "inside":
+            return self._scanInside()
+        if self._state == "after":
+            self._skeleton.append(self._buffer)
+            self._buffer = ""
+        return []
+
+    def _scanBefore(self):
+        position = 0
+        while True:
+            match = _token.match(self._buffer, position)
+            # A token touching the end of the buffer may still be cut off
+            if match is None or match.end() == len(self._buffer):
+                break
+            token = match.group(1)
+            position = match.end()
+            if token in "{[":
+                key = self._pendingKey if self._kinds and self._kinds[-1] == "{" else None
+                self._stack.append(key)
+                self._kinds.append(token)
+                self._pendingKey = None
+                self._expectingKey = token == "{"
+                if token == "[" and self._stack[1:] == self.path:
+                    self._skeleton.append(self._buffer[:position])
+                    self._buffer = self._buffer[position:]
+                    self._state = "inside"
+                    return
+            elif token in "}]":
+                self._stack.pop()
+                self._kinds.pop()
+                self._expectingKey = False
+            elif token == ":":
+                self._expectingKey = False
+            elif token == ",":
+                self._expectingKey = bool(self._kinds) and self._kinds[-1] == "{"
+            elif token.startswith('"') and self._expectingKey:
+                self._pendingKey = json.loads(token)
+        self._skeleton.append(self._buffer[:position])
+        self._buffer = self._buffer[position:]
+
+    def _scanInside(self) -> list:
+        elements = []
+        position = 0
+        while True:
+            position = _whitespace.match(self._buffer, position).end()
+            if position >= len(self._buffer):
+                break
+            if self._buffer[position] == "]":
+                self._state = "after"
+                self._skeleton.append(self._buffer[position:])
+                self._buffer = ""
+                return elements
+            try:
+                element, end = _decoder.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                # The element hasn't fully arrived yet
+                break
+            if not isinstance(element, (dict, list, str)) and (
+                end == len(self._buffer) or self._buffer[end] not in ",] \t\r\n"
+            ):
+                # A number cut off by the end of the buffer may be missing digits
+                break
+            elements.append(element)
+            position = end
+        self._buffer = self._buffer[position:]
+        return elements
+
+    def finish(self):
+        """Decodes everything outside the streamed array once the whole document was fed."""
+        return json.loads("".join(self._skeleton) + self._buffer)
+
+
+def streamJsonArray(
+    chunks: Iterator[str], *, path: tuple[str, ...], into: dict
+) -> Iterator:
+    """
+    Yields the elements of the array at `path` from a stream of text chunks, then
+    merges the rest of the document into `into`.
+
+    Args:
+        chunks (Iterator[str]): The JSON document, in pieces.
+        path (tuple[str, ...]): Keys leading to the array.
+        into (dict): Updated in place with the decoded document (array left empty)
+            once the stream is exhausted.
+    """
+    streamer = JsonArrayStreamer(path)
+    for chunk in chunks:
+        yield from streamer.feed(chunk)
+    deepMerge(into, streamer.finish())
+
+
+def deepMerge(target: dict, source: dict) -> dict:
+    """Copies `source` into `target`, merging nested dicts instead of replacing them."""
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            deepMerge(target[key], value)
+        else:
+            target[key] = value
+    return target
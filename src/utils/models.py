@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+import logging
 from datetime import datetime
 from enum import StrEnum
 from src.utils.constants import pr_tz
@@ -39,6 +40,26 @@ class ReactionKind(StrEnum):
     HOORAY = "HOORAY"
 
 
+class IssueFields(StrEnum):
+    """
+    How much of each issue is fetched, from the least to the most. Every profile
+    includes the fields of the profiles before it.
+    """
+
+    # Title, labels, milestone, assignees, field values and who closed the issue
+    LECTURE_TOPIC_TASKS = "lectureTopicTasks"
+    # Plus the 🎉 reactions on the issue and its comments, for the documentation bonus
+    SCORING = "scoring"
+    # Plus the assignment events, for cycle times
+    CYCLE_TIME = "cycleTime"
+    # Plus the pull requests that reference the issue
+    FULL = "full"
+
+    def includes(self, other: "IssueFields") -> bool:
+        profiles = list(IssueFields)
+        return profiles.index(self) >= profiles.index(other)
+
+
 @dataclass(kw_only=True)
 class Reaction:
     user_login: str
@@ -91,6 +112,21 @@ class IssueMetrics:
     bonusesByDeveloper: dict[str, float]
 
 
+@dataclass(kw_only=True)
+class IssueContribution:
+    """What one scored issue adds to a milestone's totals (see ScoreLedger)."""
+
+    pointsByDeveloper: dict[str, float]
+    bonusesByDeveloper: dict[str, float]
+    sprintIndex: int
+    labels: list[str]
+    # (issue number, cycle time hours, lead time hours)
+    timing: tuple[int | None, float, float]
+    closedDate: str
+    # (level, message) of everything logged while scoring the issue
+    logMessages: list[tuple[int, str]] = field(default_factory=list)
+
+
 @dataclass(kw_only=True, frozen=True)
 class Project:
     name: str
@@ -134,3 +170,30 @@ class Discussion:
     category: Category
     comments: list[DiscussionComment]
     publishedAt: datetime
+
+
+@dataclass(kw_only=True)
+class MilestoneConfig:
+    """The settings of one milestone of a V2 config, as used for scoring."""
+
+    startDate: datetime
+    endDate: datetime
+    milestoneGrade: float = 100.0
+    useDecay: bool = True
+
+
+@dataclass(kw_only=True)
+class ProjectSnapshot:
+    """
+    Everything fetched for one team's project during a run, shared by every milestone
+    scored in that run so the project is only downloaded and parsed once.
+    """
+
+    project: Project
+    issues: list[Issue]
+    # None when the milestone lookup failed
+    milestones: list[Milestone] | None
+    # None unless the discussions were requested
+    discussions: list[Discussion] | None = None
+    # Messages logged while fetching and parsing, replayed to each milestone's logger
+    logRecords: list[logging.LogRecord] = field(default_factory=list)
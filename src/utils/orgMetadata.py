@@ -0,0 +1,356 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+import copy
+import dataclasses
+import json
+import os
+import threading
+import time
+from typing import TypeVar
+import weakref
+from src.utils.checkpoints import lockFile, writeJsonAtomically
+from src.utils.constants import getCacheDirectory, getDirectoryMaxAge
+from src.utils.models import Project
+
+T = TypeVar("T")
+
+# How long each kind of identifier is kept on disk. Milestones aren't: their due dates
+# move and new ones get added during a semester, so they're only kept for the run.
+directory_max_ages = {
+    "project": 7 * 24 * 60 * 60,
+    "repositories": 7 * 24 * 60 * 60,
+    "members": 24 * 60 * 60,
+}
+# Lookups that found nothing are kept this long, so a misconfigured team fails fast
+# without a fix going unnoticed for long
+directory_not_found_max_age = 10 * 60
+# How the kinds that aren't plain JSON are stored
+directory_codecs: dict[str, tuple[Callable, Callable]] = {
+    "project": (dataclasses.asdict, lambda stored: Project(**stored)),
+}
+# Returned by OrgDirectory.lookup when it has nothing fresh
+_absent = object()
+
+
+class OrgDirectory:
+    """
+    On-disk directory of the identifiers a run looks up, shared between runs: each
+    team's project (number and visibility), repositories and members.
+
+    They rarely change during a semester, so they're kept for days (see
+    directory_max_ages) instead of being rediscovered every run. Lookups that found
+    nothing, a project name that doesn't exist or a team without members, are kept for
+    a few minutes only, so a misconfigured team fails right away on a re-run but a fix
+    is picked up soon. Entries can be dropped explicitly with `invalidate`, e.g. after
+    renaming a project (`python -m src.utils.orgMetadata [organization [team]]`).
+
+    Args:
+        path (str): JSON file holding the directory.
+        maxAgeCap (float | None): Upper bound on every kind's max age.
+        clock (Callable[[], float]): Returns the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        maxAgeCap: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.maxAgeCap = maxAgeCap
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    @classmethod
+    def forCacheDirectory(cls) -> "OrgDirectory | None":
+        """
+        Returns the directory kept in INSO_CACHE_DIR, or None if there is no cache
+        directory or INSO_DIRECTORY_MAX_AGE is 0.
+        """
+        cacheDirectory = getCacheDirectory()
+        maxAgeCap = getDirectoryMaxAge()
+        if cacheDirectory is None or maxAgeCap == 0:
+            return None
+        return cls(os.path.join(cacheDirectory, "directory.json"), maxAgeCap=maxAgeCap)
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self.path) as file:
+                return json.load(file)["entries"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return {}
+
+    @staticmethod
+    def _key(kind: str, organization: str, team: str) -> str:
+        return f"{kind}/{organization}/{team}"
+
+    def _maxAge(self, kind: str, entry: dict) -> float:
+        if "notFound" in entry or not entry.get("value"):
+            maxAge = directory_not_found_max_age
+        else:
+            maxAge = directory_max_ages[kind]
+        return maxAge if self.maxAgeCap is None else min(maxAge, self.maxAgeCap)
+
+    def lookup(self, kind: str, *, organization: str, team: str):
+        """
+        Returns the stored entry, or `_absent` if there's none or it's too old.
+
+        Raises:
+            ValueError: If the entry records a lookup that found nothing.
+        """
+        if kind not in directory_max_ages:
+            return _absent
+        with self._lock:
+            entry = self._entries.get(self._key(kind, organization, team))
+        if entry is None or self.clock() - entry["storedAt"] > self._maxAge(kind, entry):
+            return _absent
+        if "notFound" in entry:
+            raise ValueError(entry["notFound"])
+        decode = directory_codecs.get(kind, (None, lambda stored: stored))[1]
+        return decode(entry["value"])
+
+    def store(self, kind: str, value, *, organization: str, team: str) -> None:
+        if kind not in directory_max_ages:
+            return
+        encode = directory_codecs.get(kind, (lambda value: value, None))[0]
+        self._write(kind, organization, team, {"value": encode(value)})
+
+    def storeNotFound(
+        self, kind: str, error: ValueError, *, organization: str, team: str
+    ) -> None:
+        if kind not in directory_max_ages:
+            return
+        self._write(kind, organization, team, {"notFound": str(error)})
+
+    def _write(self, kind: str, organization: str, team: str, entry: dict) -> None:
+        stored = {"storedAt": self.clock(), **entry}
+
+        def change(entries: dict[str, dict]):
+            entries[self._key(kind, organization, team)] = stored
+
+        self._update(change)
+
+    def invalidate(
+        self, *, organization: str | None = None, team: str | None = None
+    ) -> int:
+        """
+        Drops the entries of a team, of an organization, or every entry.
+
+        Returns:
+            int: The number of entries dropped.
+        """
+
+        def change(entries: dict[str, dict]) -> int:
+            dropped = [
+                key
+                for key in entries
+                if (organization is None or key.split("/")[1] == organization)
+                and (team is None or key.split("/", 2)[2] == team)
+            ]
+            for key in dropped:
+                del entries[key]
+            return len(dropped)
+
+        return self._update(change)
+
+    def _update(self, change: Callable[[dict[str, dict]], T]) -> T:
+        """
+        Applies `change` to the entries on disk and writes them back. The file is
+        read again under a file lock first, so entries other processes sharing the
+        cache directory stored since this one loaded it are kept, not overwritten.
+        """
+        with self._lock, lockFile(self.path):
+            entries = self._load()
+            result = change(entries)
+            writeJsonAtomically(self.path, {"entries": entries})
+            self._entries = entries
+        return result
+
+
+class OrgMetadataCache:
+    """
+    Run-scoped memo of the organization metadata a run looks up: each team's project,
+    repositories, milestones and members.
+
+    Entries are keyed by kind, organization and team and filled the first time they're
+    looked up, so however many entry points ask for the same team's project or
+    milestones, the API is only asked once per run. Failed lookups aren't stored.
+    Callers get copies, so changing a returned list doesn't change the cache.
+
+    With a `directory`, entries missing from the run are first looked for there, and
+    what the API returns (including the ValueError of a lookup that found nothing) is
+    stored there for the following runs.
+
+    Args:
+        directory (OrgDirectory | None): On-disk directory shared between runs.
+    """
+
+    def __init__(self, directory: OrgDirectory | None = None):
+        self.directory = directory
+        self._entries: dict[tuple[str, str, str], object] = {}
+        self._keyLocks: dict[tuple[str, str, str], threading.Lock] = {}
+        # asyncio locks belong to one event loop, and runs may start several
+        self._asyncKeyLocks: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[tuple[str, str, str], asyncio.Lock]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _keyLock(self, key: tuple[str, str, str]) -> threading.Lock:
+        with self._lock:
+            return self._keyLocks.setdefault(key, threading.Lock())
+
+    def _asyncKeyLock(self, key: tuple[str, str, str]) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            locks = self._asyncKeyLocks.setdefault(loop, {})
+            return locks.setdefault(key, asyncio.Lock())
+
+    def has(self, kind: str, *, organization: str, team: str) -> bool:
+        with self._lock:
+            return (kind, organization, team) in self._entries
+
+    def get(self, kind: str, *, organization: str, team: str):
+        """Returns a copy of a stored entry. Raises KeyError if it isn't stored."""
+        with self._lock:
+            return copy.copy(self._entries[(kind, organization, team)])
+
+    def put(self, kind: str, value, *, organization: str, team: str) -> None:
+        with self._lock:
+            self._entries[(kind, organization, team)] = copy.copy(value)
+
+    def getOrFetch(
+        self, kind: str, *, organization: str, team: str, fetch: Callable[[], T]
+    ) -> T:
+        """
+        Returns the stored entry, calling `fetch` to fill it in if it isn't stored yet.
+
+        Threads asking for the same entry at the same time wait for the first one's
+        lookup instead of repeating it.
+        """
+        key = (kind, organization, team)
+        with self._keyLock(key):
+            if self.has(kind, organization=organization, team=team):
+                return self.get(kind, organization=organization, team=team)
+            value = self._lookupDirectory(kind, organization=organization, team=team)
+            if value is _absent:
+                try:
+                    value = fetch()
+                except ValueError as e:
+                    self._rememberNotFound(kind, e, organization=organization, team=team)
+                    raise
+                self._remember(kind, value, organization=organization, team=team)
+            self.put(kind, value, organization=organization, team=team)
+            return value
+
+    async def getOrFetchAsync(
+        self,
+        kind: str,
+        *,
+        organization: str,
+        team: str,
+        fetch: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Async counterpart of getOrFetch: coroutines asking for the same entry at the
+        same time wait for the first one's lookup instead of repeating it.
+        """
+        async with self._asyncKeyLock((kind, organization, team)):
+            if self.has(kind, organization=organization, team=team):
+                return self.get(kind, organization=organization, team=team)
+            value = self._lookupDirectory(kind, organization=organization, team=team)
+            if value is _absent:
+                try:
+                    value = await fetch()
+                except ValueError as e:
+                    self._rememberNotFound(kind, e, organization=organization, team=team)
+                    raise
+                self._remember(kind, value, organization=organization, team=team)
+            self.put(kind, value, organization=organization, team=team)
+            return value
+
+    def _lookupDirectory(self, kind: str, *, organization: str, team: str):
+        if self.directory is None:
+            return _absent
+        return self.directory.lookup(kind, organization=organization, team=team)
+
+    def _remember(self, kind: str, value, *, organization: str, team: str) -> None:
+        if self.directory is not None:
+            self.directory.store(kind, value, organization=organization, team=team)
+
+    def _rememberNotFound(
+        self, kind: str, error: ValueError, *, organization: str, team: str
+    ) -> None:
+        if self.directory is not None:
+            self.directory.storeNotFound(
+                kind, error, organization=organization, team=team
+            )
+
+    def missing(self, kind: str, *, organization: str, teams: list[str]) -> list[str]:
+        """
+        The teams whose `kind` entry isn't stored yet, for batched lookups. Entries
+        found in the directory are brought into the run on the way.
+        """
+        missing = []
+        for team in teams:
+            if self.has(kind, organization=organization, team=team):
+                continue
+            try:
+                value = self._lookupDirectory(kind, organization=organization, team=team)
+            except ValueError:
+                # Looked up individually, which raises the stored error
+                continue
+            if value is _absent:
+                missing.append(team)
+            else:
+                self.put(kind, value, organization=organization, team=team)
+        return missing
+
+    def store(self, kind: str, value, *, organization: str, team: str) -> None:
+        """Stores the result of a batched lookup in the run and in the directory."""
+        self.put(kind, value, organization=organization, team=team)
+        self._remember(kind, value, organization=organization, team=team)
+
+
+_cache: OrgMetadataCache | None = None
+_cacheLock = threading.Lock()
+
+
+def getOrgMetadataCache() -> OrgMetadataCache:
+    """
+    Returns the metadata cache of the current run, creating it on first use. It is
+    backed by the OrgDirectory in INSO_CACHE_DIR when there is one.
+    """
+    global _cache
+    with _cacheLock:
+        if _cache is None:
+            _cache = OrgMetadataCache(directory=OrgDirectory.forCacheDirectory())
+        return _cache
+
+
+def setOrgMetadataCache(cache: OrgMetadataCache | None) -> OrgMetadataCache | None:
+    """
+    Replaces the metadata cache and returns the previous one. Setting None starts a new
+    run scope, so the next lookups go to the API again.
+    """
+    global _cache
+    with _cacheLock:
+        previous = _cache
+        _cache = cache
+    return previous
+
+
+if __name__ == "__main__":
+    import sys
+
+    _, *scope = sys.argv
+    directory = OrgDirectory.forCacheDirectory()
+    if directory is None:
+        print("INSO_CACHE_DIR isn't set, there is no directory to invalidate")
+        exit(1)
+    dropped = directory.invalidate(
+        organization=scope[0] if len(scope) > 0 else None,
+        team=scope[1] if len(scope) > 1 else None,
+    )
+    print(f"Dropped {dropped} directory entries")
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+from src.utils.checkpoints import queryFingerprint, writeJsonAtomically
+from src.utils.constants import getCacheDirectory
+
+# Largest page GitHub serves for a connection
+max_page_size = 100
+# Pages in a row that have to succeed before the page size doubles again
+page_size_growth_streak = 3
+
+
+class AdaptivePageSize:
+    """
+    Page size of one paginated query, adapted to what the API manages to serve.
+
+    A page that fails with a timeout or a 5xx is fetched again from the same cursor with
+    half as many nodes, down to `minimum`. Once `growthStreak` pages in a row succeed the
+    size doubles again, up to `maximum`. The largest size that didn't fail is stored with
+    `save`, so the next run of the same query starts at a size known to work instead of
+    failing its way down again.
+
+    Args:
+        variable (str): Name of the query variable holding the page size.
+        initial (int): Page size of the first request.
+        minimum (int): Smallest page size. A page failing at this size isn't split further.
+        maximum (int): Largest page size.
+        growthStreak (int): Successful pages in a row before the size doubles.
+        path (str | None): File the size is stored in, or None to not store it.
+    """
+
+    def __init__(
+        self,
+        *,
+        variable: str,
+        initial: int = max_page_size,
+        minimum: int = 1,
+        maximum: int = max_page_size,
+        growthStreak: int = page_size_growth_streak,
+        path: str | None = None,
+    ):
+        self.variable = variable
+        self.minimum = minimum
+        self.maximum = maximum
+        self.growthStreak = growthStreak
+        self.path = path
+        self.size = max(minimum, min(maximum, initial))
+        self._successes = 0
+        # Sizes that served a page and the smallest size that failed, during this run
+        self._succeededSizes: set[int] = set()
+        self._smallestFailure: int | None = None
+
+    @classmethod
+    def forQuery(
+        cls, *, name: str, query: str, variable: str, **options
+    ) -> "AdaptivePageSize":
+        """
+        Returns the page size of a query, starting from the size stored by a previous run.
+
+        Without a cache directory nothing is stored and the first page is a full one.
+
+        Args:
+            name (str): Readable prefix for the stored file (e.g. the team name).
+            query (str): The paginated query document.
+            variable (str): Name of the query variable holding the page size.
+            **options: Other AdaptivePageSize arguments.
+        """
+        cacheDirectory = getCacheDirectory()
+        if cacheDirectory is None:
+            return cls(variable=variable, **options)
+        safeName = "".join(c if c.isalnum() else "_" for c in name)
+        fingerprint = queryFingerprint(query=query, variables=None)[:16]
+        path = os.path.join(cacheDirectory, "pageSizes", f"{safeName}-{fingerprint}.json")
+        try:
+            with open(path) as file:
+                options.setdefault("initial", int(json.load(file)["pageSize"]))
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+        return cls(variable=variable, path=path, **options)
+
+    @property
+    def canShrink(self) -> bool:
+        return self.size > self.minimum
+
+    @property
+    def safeSize(self) -> int:
+        """
+        Size the next run should start with: the largest size that served a page and is
+        smaller than every size that failed, or the current size if none did.
+        """
+        working = [
+            size
+            for size in self._succeededSizes
+            if self._smallestFailure is None or size < self._smallestFailure
+        ]
+        return max(working, default=self.size)
+
+    def shrink(self, *, logger: logging.Logger | None = None) -> bool:
+        """
+        Halves the page size after a failed page.
+
+        Returns:
+            bool: False if the size is already at its minimum, in which case the failure
+                has to be handled by the caller.
+        """
+        self._successes = 0
+        if self._smallestFailure is None or self.size < self._smallestFailure:
+            self._smallestFailure = self.size
+        if not self.canShrink:
+            return False
+        self.size = max(self.minimum, self.size // 2)
+        if logger is not None:
+            logger.warning(f"Page failed, retrying it with {self.size} nodes a page")
+        return True
+
+    def recordSuccess(self) -> None:
+        """Counts a page that was served, doubling the size after a long enough streak."""
+        self._successes += 1
+        self._succeededSizes.add(self.size)
+        if self._successes >= self.growthStreak and self.size < self.maximum:
+            self.size = min(self.maximum, self.size * 2)
+            self._successes = 0
+
+    def save(self) -> None:
+        """Stores the size the next run should start with, if a path is set."""
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        writeJsonAtomically(self.path, {"pageSize": self.safeSize})
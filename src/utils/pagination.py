@@ -0,0 +1,273 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+import logging
+import queue
+import threading
+from typing import TypeVar
+from src.utils.checkpoints import CheckpointPage, PageCheckpoint
+from src.utils.pageSizes import AdaptivePageSize
+from src.utils.queryRunner import TransientQueryError
+
+T = TypeVar("T")
+# Marks the end of a prefetched iterator in its buffer
+_exhausted = object()
+
+
+def paginateConnection(
+    *,
+    runQuery: Callable[..., dict],
+    query: str,
+    variables: dict,
+    cursorVariable: str,
+    getConnection: Callable[[dict], dict],
+    checkpoint: PageCheckpoint | None = None,
+    pageSize: AdaptivePageSize | None = None,
+    logger: logging.Logger | None = None,
+) -> Iterator[dict]:
+    """
+    Yields every node of a paginated GraphQL connection, page by page.
+
+    The nodes of a page may be an iterator that decodes them as they arrive (see the
+    `streamPath` option of runGraphqlQuery); `pageInfo` is only read once they have all
+    been consumed. When a checkpoint is given, each page is stored once it has been
+    read completely. Pages left behind by a previous, interrupted run are served from
+    the checkpoint first and the pagination resumes from the last stored cursor instead
+    of starting over.
+
+    With an adaptive `pageSize`, a page that fails with a TransientQueryError (a timeout,
+    a dropped connection or a 5xx) is fetched again from the same cursor with half as
+    many nodes, and runQuery is asked to fail fast (`maxTransientRetries=0`) while the
+    page can still be split. Nodes of a streamed page that were handed out before it
+    failed are skipped when it is fetched again.
+
+    Args:
+        runQuery (Callable[..., dict]): Function executing a query, called as
+            runQuery(query=..., variables=...). Usually runGraphqlQuery.
+        query (str): The query document. Must accept the cursor through `cursorVariable`.
+        variables (dict): Variables for the first page.
+        cursorVariable (str): Name of the variable holding the `after` cursor.
+        getConnection (Callable[[dict], dict]): Extracts the connection (the object with
+            `nodes` and `pageInfo`) from a query response.
+        checkpoint (PageCheckpoint | None): Where to store pages for resuming.
+        pageSize (AdaptivePageSize | None): Adapts the page size variable of the query
+            to failures. Its size is saved once the pagination finishes.
+        logger (logging.Logger | None): Logger to use.
+
+    Returns:
+        Iterator[dict]: The raw node dictionaries in the order the API returns them.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    params = dict(variables)
+    if pageSize is not None:
+        params[pageSize.variable] = pageSize.size
+    hasAnotherPage = True
+    if checkpoint is not None:
+        resumedPages = 0
+        for page in checkpoint.pages():
+            resumedPages += 1
+            yield from page.nodes
+            hasAnotherPage = page.hasNextPage
+            if page.endCursor is not None:
+                params[cursorVariable] = page.endCursor
+        if resumedPages > 0:
+            logger.info(
+                f"Resumed {resumedPages} page(s) from checkpoint {checkpoint.directory}"
+            )
+
+    # Nodes from the current cursor that were handed out before a failed attempt
+    handedOut = 0
+    while hasAnotherPage:
+        nodes: list[dict] = []
+        received = 0
+        try:
+            response = runQuery(query=query, variables=params, **pageOptions(pageSize))
+            connection = getConnection(response)
+            # Nodes may be streamed, in which case pageInfo is only filled in once they're read
+            for node in connection["nodes"]:
+                received += 1
+                if checkpoint is not None:
+                    nodes.append(node)
+                if received > handedOut:
+                    yield node
+            pageInfo = connection["pageInfo"]
+        except TransientQueryError:
+            if pageSize is None or not pageSize.shrink(logger=logger):
+                raise
+            handedOut = max(handedOut, received)
+            params[pageSize.variable] = pageSize.size
+            continue
+        handedOut = max(0, handedOut - received)
+        if pageSize is not None:
+            pageSize.recordSuccess()
+            params[pageSize.variable] = pageSize.size
+        hasAnotherPage = pageInfo["hasNextPage"]
+        if checkpoint is not None:
+            checkpoint.savePage(
+                CheckpointPage(
+                    nodes=nodes,
+                    endCursor=pageInfo["endCursor"],
+                    hasNextPage=hasAnotherPage,
+                )
+            )
+
+        if hasAnotherPage:
+            params[cursorVariable] = pageInfo["endCursor"]
+
+    if checkpoint is not None:
+        checkpoint.clear()
+    if pageSize is not None:
+        pageSize.save()
+
+
+async def paginateConnectionAsync(
+    *,
+    runQuery: Callable[..., Awaitable[dict]],
+    query: str,
+    variables: dict,
+    cursorVariable: str,
+    getConnection: Callable[[dict], dict],
+    checkpoint: PageCheckpoint | None = None,
+    pageSize: AdaptivePageSize | None = None,
+    logger: logging.Logger | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Async counterpart of paginateConnection, with `runQuery` awaited for every page.
+
+    Checkpointing, resuming and adaptive page sizes behave exactly as in
+    paginateConnection. The next page is requested as soon as the current page's cursor
+    is known, so it downloads while the caller works through the current page.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    params = dict(variables)
+    if pageSize is not None:
+        params[pageSize.variable] = pageSize.size
+    hasAnotherPage = True
+    if checkpoint is not None:
+        resumedPages = 0
+        for page in checkpoint.pages():
+            resumedPages += 1
+            for node in page.nodes:
+                yield node
+            hasAnotherPage = page.hasNextPage
+            if page.endCursor is not None:
+                params[cursorVariable] = page.endCursor
+        if resumedPages > 0:
+            logger.info(
+                f"Resumed {resumedPages} page(s) from checkpoint {checkpoint.directory}"
+            )
+
+    async def fetchPage(params: dict) -> dict:
+        while True:
+            try:
+                response = await runQuery(
+                    query=query, variables=params, **pageOptions(pageSize)
+                )
+            except TransientQueryError:
+                if pageSize is None or not pageSize.shrink(logger=logger):
+                    raise
+                params[pageSize.variable] = pageSize.size
+                continue
+            if pageSize is not None:
+                pageSize.recordSuccess()
+            return getConnection(response)
+
+    nextPage = asyncio.ensure_future(fetchPage(dict(params))) if hasAnotherPage else None
+    try:
+        while nextPage is not None:
+            connection = await nextPage
+            nextPage = None
+            nodes: list[dict] = connection["nodes"]
+            pageInfo = connection["pageInfo"]
+            hasAnotherPage = pageInfo["hasNextPage"]
+            if checkpoint is not None:
+                checkpoint.savePage(
+                    CheckpointPage(
+                        nodes=nodes,
+                        endCursor=pageInfo["endCursor"],
+                        hasNextPage=hasAnotherPage,
+                    )
+                )
+            if hasAnotherPage:
+                # The next page downloads while the caller works through this one
+                params[cursorVariable] = pageInfo["endCursor"]
+                if pageSize is not None:
+                    params[pageSize.variable] = pageSize.size
+                nextPage = asyncio.ensure_future(fetchPage(dict(params)))
+            for node in nodes:
+                yield node
+    finally:
+        if nextPage is not None:
+            nextPage.cancel()
+
+    if checkpoint is not None:
+        checkpoint.clear()
+    if pageSize is not None:
+        pageSize.save()
+
+
+def pageOptions(pageSize: AdaptivePageSize | None, /) -> dict:
+    """Extra runQuery arguments making a page that can still be split fail fast."""
+    if pageSize is None or not pageSize.canShrink:
+        return {}
+    return {"maxTransientRetries": 0}
+
+
+def prefetchNodes(nodes: Iterable[T], /, *, maxBuffered: int) -> Iterator[T]:
+    """
+    Iterates `nodes` on a background thread, staying at most `maxBuffered` nodes ahead
+    of the caller.
+
+    Wrapped around paginateConnection, the next page is requested as soon as the
+    current page's cursor is known, so pages download while the caller is still
+    processing the previous ones instead of the two taking turns. An error raised while
+    iterating is raised to the caller once it reaches that point. When the caller stops
+    early, the background iteration stops at the next node and is closed.
+
+    Args:
+        nodes (Iterable[T]): The nodes to prefetch, usually a paginateConnection iterator.
+        maxBuffered (int): Most nodes held that the caller hasn't taken yet.
+
+    Returns:
+        Iterator[T]: The same nodes, in the same order.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, maxBuffered))
+    stopped = threading.Event()
+
+    def put(entry: tuple) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(nodes)
+        try:
+            for node in iterator:
+                if not put((node, None)):
+                    return
+            put((_exhausted, None))
+        except Exception as e:
+            put((_exhausted, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            node, error = buffer.get()
+            if node is _exhausted:
+                if error is not None:
+                    raise error
+                return
+            yield node
+    finally:
+        # The producer may be waiting on a request, so it's left to finish on its own
+        stopped.set()
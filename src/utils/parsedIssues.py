@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from src.utils.checkpoints import writePickleAtomically
+from src.utils.constants import getCacheDirectory
+from src.utils.models import Issue, IssueFields
+
+# Bump whenever parseIssue or the Issue dataclass changes, so issues parsed by an older
+# version aren't served
+parsed_issue_format = 2
+
+
+def rawItemFingerprint(item: dict, /) -> str:
+    """
+    Digest of everything in a raw project item. Unlike itemVersion it also moves when
+    only a reaction changes, which doesn't touch the issue's updatedAt but does its score.
+    """
+    encoded = json.dumps(item, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class ParsedIssueCache:
+    """
+    On-disk cache of parsed issues, keyed by project item id and the fingerprint of the
+    raw item (see rawItemFingerprint) they were parsed from.
+
+    Items that haven't changed since the last run are rebuilt from the cache instead of
+    parsed again, which saves the date parsing and timeline walking of every item on
+    large projects where few items change a day. Items that aren't issues (pull requests
+    and drafts) are remembered as such. The file is a pickle holding each issue pickled
+    on its own, so every lookup returns a fresh Issue the hooks can change freely.
+
+    Args:
+        path (str): File holding the cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[str, bytes | None]] = {}
+        self._used: set[str] = set()
+        try:
+            with open(path, mode="rb") as file:
+                stored = pickle.load(file)
+            if stored["format"] == parsed_issue_format:
+                self._entries = stored["entries"]
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, KeyError, TypeError):
+            pass
+
+    @classmethod
+    def forTeam(
+        cls, *, org: str, team: str, issueFields: IssueFields
+    ) -> "ParsedIssueCache | None":
+        """
+        Returns the cache of a team's issues fetched with a field profile, or None if no
+        cache directory is configured.
+        """
+        cacheDirectory = getCacheDirectory()
+        if cacheDirectory is None:
+            return None
+        safeName = "".join(c if c.isalnum() else "_" for c in f"{org}-{team}")
+        return cls(
+            os.path.join(cacheDirectory, "parsedIssues", f"{safeName}-{issueFields}.pickle")
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, itemId: str, fingerprint: str) -> tuple[bool, Issue | None]:
+        """
+        Returns whether the item was parsed from the same raw item before and, if so,
+        a fresh copy of the issue (None if the item isn't an issue).
+        """
+        with self._lock:
+            entry = self._entries.get(itemId)
+            if entry is None or entry[0] != fingerprint:
+                return False, None
+            self._used.add(itemId)
+        encoded = entry[1]
+        return True, None if encoded is None else pickle.loads(encoded)
+
+    def store(self, itemId: str, fingerprint: str, issue: Issue | None) -> None:
+        """Stores the issue parsed from a raw item, or None for an item that isn't one."""
+        encoded = None if issue is None else pickle.dumps(issue, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[itemId] = (fingerprint, encoded)
+            self._used.add(itemId)
+
+    def save(self, *, dropUnused: bool = False) -> None:
+        """
+        Writes the cache to disk.
+
+        Args:
+            dropUnused (bool): Drop the items that weren't looked up or stored since the
+                cache was loaded. For runs that went through the whole project, so items
+                removed from it don't stay in the cache forever.
+        """
+        with self._lock:
+            if dropUnused:
+                self._entries = {
+                    itemId: entry
+                    for itemId, entry in self._entries.items()
+                    if itemId in self._used
+                }
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            writePickleAtomically(
+                self.path, {"format": parsed_issue_format, "entries": self._entries}
+            )
@@ -0,0 +1,145 @@
+from collections.abc import Callable
+import logging
+import re
+from src.utils.queryRunner import RequestRejectedError
+from src.utils.rateLimit import RateLimitError
+
+# Cost cap of a single batched document, measured like GitHub's node limit: the maximum
+# number of nodes the document could return. GitHub rejects calls above 500,000 nodes;
+# staying far below keeps each response small and each document cheap in rate limit points.
+default_max_nodes_per_document = 100_000
+
+
+def splitOperation(query: str) -> tuple[str, dict[str, str], str]:
+    """
+    Splits a single-operation query document into its parts.
+
+    Args:
+        query (str): A document such as `query Name($a: String!) { field(arg: $a) { ... } }`.
+
+    Returns:
+        tuple[str, dict[str, str], str]: The operation name, the variable types keyed by
+            variable name, and the operation's selection set without its outer braces.
+    """
+    header = re.match(r"\s*query\s+(\w+)\s*(\(([^)]*)\))?\s*\{", query)
+    if header is None:
+        raise ValueError("Only named query operations can be batched")
+    name = header.group(1)
+    variableTypes = {
+        match.group(1): match.group(2).strip()
+        for match in re.finditer(r"\$(\w+)\s*:\s*([\w!\[\]]+)", header.group(3) or "")
+    }
+    body = query[header.end():]
+    depth = 1
+    for index, char in enumerate(body):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return name, variableTypes, body[:index]
+    raise ValueError("Unbalanced braces in query document")
+
+
+def topLevelFieldName(selection: str) -> str:
+    match = re.match(r"\s*(\w+)", selection)
+    if match is None:
+        raise ValueError("Selection set has no fields")
+    return match.group(1)
+
+
+def buildBatchedDocument(
+    *, name: str, variableTypes: dict[str, str], selection: str, count: int
+) -> str:
+    """
+    Builds one document holding `count` copies of a selection, each under its own alias.
+
+    Copy i is aliased `lookup{i}` and every variable `$v` it uses is renamed `$v_{i}`, so
+    copies never share arguments.
+    """
+    definitions = []
+    fields = []
+    for index in range(count):
+        for variable, variableType in variableTypes.items():
+            definitions.append(f"${variable}_{index}: {variableType}")
+        renamed = re.sub(
+            r"\$(\w+)\b",
+            lambda m: f"${m.group(1)}_{index}" if m.group(1) in variableTypes else m.group(0),
+            selection,
+        )
+        fields.append(f"lookup{index}: {renamed.lstrip()}")
+    return f"query {name}Batch({', '.join(definitions)}) {{\n" + "\n".join(fields) + "\n}"
+
+
+def runBatchedQuery(
+    *,
+    runQuery: Callable[..., dict],
+    query: str,
+    lookups: dict[str, dict],
+    nodesPerLookup: int = 100,
+    maxNodesPerDocument: int = default_max_nodes_per_document,
+    logger: logging.Logger | None = None,
+) -> dict[str, dict]:
+    """
+    Runs the same query for many variable sets using as few requests as possible.
+
+    Lookups are merged into documents of at most `maxNodesPerDocument // nodesPerLookup`
+    aliased copies of the query. Each copy's result is split back out and wrapped so it
+    has exactly the shape the original query would have returned, which lets the usual
+    response parsers handle it unchanged.
+
+    If a batched document fails with a query error or keeps timing out, it is split in
+    half and retried, so a document over GitHub's node or complexity limits gets through
+    in smaller parts and one bad lookup can't take the others down with it. Lookups that
+    fail on their own are left out of the result and logged; callers are expected to fall
+    back to the unbatched query for them. Failures that smaller documents would run into
+    just the same, a rate limit that outlasted every retry or a rejected token, are
+    raised instead of splitting into a cascade of requests that fail too.
+
+    Args:
+        runQuery (Callable[..., dict]): Function executing a query, usually runGraphqlQuery.
+        query (str): A named, single-operation query with a single top-level field.
+        lookups (dict[str, dict]): Variables for every lookup, keyed by a caller chosen key.
+        nodesPerLookup (int): Maximum nodes a single lookup can return (the product of the
+            `first` arguments along its deepest path).
+        maxNodesPerDocument (int): Cap on the nodes one batched document can return.
+        logger (logging.Logger | None): Logger to use.
+
+    Returns:
+        dict[str, dict]: The response of every successful lookup, keyed like `lookups`.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    name, variableTypes, selection = splitOperation(query)
+    fieldName = topLevelFieldName(selection)
+    batchSize = max(1, maxNodesPerDocument // max(1, nodesPerLookup))
+    keys = list(lookups)
+    results: dict[str, dict] = {}
+
+    def runChunk(chunk: list[str]):
+        document = buildBatchedDocument(
+            name=name, variableTypes=variableTypes, selection=selection, count=len(chunk)
+        )
+        variables = {
+            f"{variable}_{index}": value
+            for index, key in enumerate(chunk)
+            for variable, value in lookups[key].items()
+        }
+        try:
+            response = runQuery(query=document, variables=variables)
+        except (RateLimitError, RequestRejectedError):
+            raise
+        except ConnectionError as e:
+            if len(chunk) == 1:
+                logger.warning(f"Batched lookup {chunk[0]} failed: {e}")
+                return
+            middle = len(chunk) // 2
+            runChunk(chunk[:middle])
+            runChunk(chunk[middle:])
+            return
+        for index, key in enumerate(chunk):
+            results[key] = {fieldName: response[f"lookup{index}"]}
+
+    for start in range(0, len(keys), batchSize):
+        runChunk(keys[start:start + batchSize])
+    return results
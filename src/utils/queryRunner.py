@@ -1,25 +1,119 @@
-from typing import Any
+from collections.abc import Iterator
+import codecs
+import logging
+import random
+import time
 import requests
-from src.utils.constants import getToken
+from src.utils.credentials import Credential, getCredentialPool
+from src.utils.jsonStream import deepMerge, streamJsonArray
+from src.utils.rateLimit import (
+    RateLimitError,
+    addRateLimitField,
+    getOperationName,
+    isRateLimitedError,
+)
+from src.utils.responseCache import getResponseCache
+from src.utils.transport import getTransport
 
+# Number of times a rate limited request is retried after waiting out the limit
+max_rate_limit_retries = 5
+# Number of times a request is retried after a transient network or server failure
+max_transient_retries = 4
+# Backoff before the n-th transient retry is drawn uniformly from [0, min(cap, base * 2^n)]
+transient_backoff_base = 1.0
+transient_backoff_cap = 30.0
+transient_status_codes = {500, 502, 503, 504}
+# Bytes read from a streamed response body at a time
+stream_chunk_size = 64 * 1024
 
-def runGraphqlQuery(*, query: str, variables: dict | None = None) -> dict:
+logger = logging.getLogger(__name__)
+
+
+class TransientQueryError(ConnectionError):
+    """Raised when a request keeps failing with timeouts, dropped connections or 5xx errors."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class RequestRejectedError(ConnectionError):
+    """Raised when the API turns a request down outright, e.g. for a bad or revoked token."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+def backoffDelay(attempt: int) -> float:
+    """Full-jitter exponential backoff, so concurrent retries don't hit the API in lockstep."""
+    return random.uniform(
+        0, min(transient_backoff_cap, transient_backoff_base * 2**attempt)
+    )
+
+
+def isQueryTimeoutError(errors: list[dict] | None) -> bool:
+    """
+    Whether a response's errors say GitHub gave up executing the query, which it does
+    when a query takes too long, usually because it asks for too many nodes at once.
+    """
+    return any(
+        "timeout" in str(error.get("message", "")).lower()
+        for error in errors or []
+        if isinstance(error, dict)
+    )
+
+
+def runGraphqlQuery(
+    *,
+    query: str,
+    variables: dict | None = None,
+    streamPath: tuple[str, ...] | None = None,
+    maxTransientRetries: int | None = None,
+) -> dict:
     """Execute a GraphQL query against the GitHub API and return the response data.
 
     This function sends a POST request to GitHub's GraphQL API endpoint with the provided
-    query and optional variables. It handles authentication using a bearer token and
-    validates the response. If successful, it returns the contents of the "data" field
-    from the JSON response.
+    query and optional variables. Requests go through the shared pooled transport so
+    consecutive pages reuse the same kept-alive connections. It handles authentication
+    using a bearer token and validates the response. If successful, it returns the
+    contents of the "data" field from the JSON response.
+
+    Every request is sent with a token from the shared CredentialPool, picking the token
+    with the most budget left. A `rateLimit` selection is added to the query and,
+    together with the `X-RateLimit-*` headers, keeps that token's point budget current.
+    Requests wait for a budget to reset instead of failing. A response rejected by the
+    primary or secondary limits parks its token until the limit passes and the request
+    is retried, with another token if one has budget left. Timeouts (including GitHub's
+    own query timeout errors), dropped connections and 5xx responses are retried with
+    jittered exponential backoff.
+
+    When the response cache is enabled (see getResponseCache), a fresh cached response
+    is returned without touching the network or the rate limit budget, and successful
+    responses are stored in it.
+
+    With `streamPath`, the response body is decoded while it downloads: the list at that
+    path (e.g. the `nodes` of a connection) is returned as an iterator handing out each
+    element as soon as it has arrived, and the rest of the returned data is only filled
+    in once the iterator is exhausted. A streamed response that comes back with an error
+    before any element was handed out is retried the regular way, without streaming.
+    Streaming is skipped while the response cache is enabled, since a cached response
+    has to be stored whole.
 
     Args:
         query: The GraphQL query string to execute.
         variables: Dictionary of variables to pass with the query.
             Defaults to None.
+        streamPath: Keys leading from "data" to a list to stream. Defaults to None.
+        maxTransientRetries: Retries after a transient failure. Defaults to
+            max_transient_retries; callers that can make the request smaller instead
+            (see paginateConnection) pass 0.
 
     Returns:
         dict: The contents of the "data" field from the successful GraphQL response.
 
     Raises:
+        RateLimitError: If the request is still rate limited after every retry.
+        TransientQueryError: If the request still fails with a timeout, a dropped
+            connection or a 5xx status after every retry.
         ConnectionError: In two cases:
             1. If the HTTP request fails (status code != 200), with the status code
                and response text in the error message.
@@ -39,31 +133,195 @@ def runGraphqlQuery(*, query: str, variables: dict | None = None) -> dict:
         >>> print(result["repository"]["name"])
         'Hello-World'
     """
-    # GitHub GraphQL API endpoint
-    url = "https://api.github.com/graphql"
-    token = getToken()
-
-    # Set up the request headers
-    headers = {
-        "Authorization": f"bearer {token}",
-        "Content-Type": "application/json",
-    }
-
     # Set up the request payload
     payload = {
-        "query": query,
+        "query": addRateLimitField(query),
         "variables": variables,
     }
+    operation = getOperationName(query)
+    cache = getResponseCache()
+    if cache is not None:
+        cached = cache.get(operation=operation, query=query, variables=variables)
+        if cached is not None:
+            return cached
+    pool = getCredentialPool()
+    if streamPath is not None and cache is None:
+        streamed = _startStreaming(
+            payload=payload, operation=operation, credential=pool.acquire(operation=operation)
+        )
+        if streamed is not None:
+            response, scheduler = streamed
+            data: dict = {}
+            leaf = data
+            for key in streamPath[:-1]:
+                leaf = leaf.setdefault(key, {})
+            leaf[streamPath[-1]] = _streamElements(
+                response,
+                data=data,
+                path=streamPath,
+                operation=operation,
+                scheduler=scheduler,
+                fallback=lambda: runGraphqlQuery(
+                    query=query,
+                    variables=variables,
+                    maxTransientRetries=maxTransientRetries,
+                ),
+            )
+            return data
 
-    # Make the request to the GitHub GraphQL API
-    response = requests.post(url, headers=headers, json=payload)
+    if maxTransientRetries is None:
+        maxTransientRetries = max_transient_retries
+    rateLimitRetries = 0
+    transientRetries = 0
+    while True:
+        credential = pool.acquire(operation=operation)
+        scheduler = credential.scheduler
+        # Set up the request headers
+        headers = {
+            "Authorization": f"bearer {credential.token}",
+        }
+        transientFailure: str | None = None
+        try:
+            # Make the request to the GitHub GraphQL API over a pooled connection
+            response = getTransport().post(payload=payload, headers=headers)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            transientFailure = f"{type(e).__name__}: {e}"
+        else:
+            scheduler.recordHeaders(response.headers)
+            if response.status_code in transient_status_codes:
+                transientFailure = f"status code {response.status_code}"
+            elif response.status_code == 200:
+                response_dict = response.json()
+                if isQueryTimeoutError(response_dict.get("errors")):
+                    transientFailure = "a query timeout"
 
-    # Check for errors
+        if transientFailure is not None:
+            if transientRetries >= maxTransientRetries:
+                raise TransientQueryError(
+                    f"{operation} failed after {maxTransientRetries} retries: {transientFailure}"
+                )
+            delay = backoffDelay(transientRetries)
+            transientRetries += 1
+            logger.warning(
+                f"{operation} failed with {transientFailure}, retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+            continue
+
+        # Check for errors
+        delay = None
+        if response.status_code != 200:
+            delay = scheduler.retryDelay(
+                statusCode=response.status_code,
+                headers=response.headers,
+                body=response.text,
+            )
+            if delay is None:
+                raise RequestRejectedError(
+                    f"Query failed to run, status code {response.status_code}\n{response.text}"
+                )
+        elif "errors" in response_dict:
+            if not isRateLimitedError(response_dict["errors"]):
+                raise ConnectionError(
+                    f"Error executing query: {response_dict['errors']}"
+                )
+            delay = scheduler.resetDelay()
+
+        if delay is not None:
+            if rateLimitRetries >= max_rate_limit_retries:
+                raise RateLimitError(
+                    f"{operation} was still rate limited after {max_rate_limit_retries} retries"
+                )
+            rateLimitRetries += 1
+            logger.warning(
+                f"{operation} was rate limited, parking {credential} for {delay:.0f}s"
+            )
+            scheduler.park(delay)
+            continue
+
+        data = response_dict["data"]
+        scheduler.recordRateLimit(
+            operation=operation, rateLimit=data.pop("rateLimit", None)
+        )
+        if cache is not None:
+            cache.put(operation=operation, query=query, variables=variables, data=data)
+        return data
+
+
+def _startStreaming(
+    *, payload: dict, operation: str, credential: Credential
+) -> tuple[requests.Response, object] | None:
+    """Sends a request with its body left unread, or returns None if it didn't succeed."""
+    try:
+        response = getTransport().post(
+            payload=payload,
+            headers={"Authorization": f"bearer {credential.token}"},
+            stream=True,
+        )
+    except (requests.ConnectionError, requests.Timeout) as e:
+        logger.warning(f"Streamed {operation} failed with {type(e).__name__}: {e}")
+        return None
+    credential.scheduler.recordHeaders(response.headers)
     if response.status_code != 200:
-        raise ConnectionError(
-            f"Query failed to run, status code {response.status_code}\n{response.text}"
+        logger.warning(
+            f"Streamed {operation} failed with status code {response.status_code}"
         )
-    response_dict = response.json()
-    if "errors" in response_dict:
-        raise ConnectionError(f"Error executing query: {response_dict['errors']}")
-    return response_dict["data"]
+        response.close()
+        return None
+    return response, credential.scheduler
+
+
+def _streamElements(
+    response: requests.Response,
+    *,
+    data: dict,
+    path: tuple[str, ...],
+    operation: str,
+    scheduler,
+    fallback,
+) -> Iterator:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = (decoder.decode(chunk) for chunk in response.iter_content(stream_chunk_size))
+    document: dict = {}
+    yielded = 0
+    failure: str | None = None
+    try:
+        for element in streamJsonArray(chunks, path=("data", *path), into=document):
+            yielded += 1
+            yield element
+    except (requests.RequestException, ValueError) as e:
+        failure = f"{type(e).__name__}: {e}"
+    finally:
+        response.close()
+
+    if failure is None and isQueryTimeoutError(document.get("errors")):
+        failure = "a query timeout"
+    if failure is None and "errors" in document:
+        if not isRateLimitedError(document["errors"]):
+            raise ConnectionError(f"Error executing query: {document['errors']}")
+        scheduler.park(scheduler.resetDelay())
+        failure = "a rate limit error"
+    if failure is not None:
+        if yielded > 0:
+            # Elements already handed out can't be taken back, so the page can't be retried
+            raise TransientQueryError(
+                f"Streamed {operation} failed after {yielded} elements with {failure}"
+            )
+        logger.warning(f"Streamed {operation} failed with {failure}, retrying")
+        fallbackData = fallback()
+        leaf = fallbackData
+        for key in path:
+            leaf = leaf[key]
+        yield from leaf
+        deepMerge(data, fallbackData)
+        return
+
+    streamed = document.get("data")
+    for key in path[:-1]:
+        streamed = streamed.get(key) if isinstance(streamed, dict) else None
+    if not isinstance(streamed, dict) or path[-1] not in streamed:
+        raise ConnectionError(f"{operation} response has no {'.'.join(path)}")
+    scheduler.recordRateLimit(
+        operation=operation, rateLimit=document["data"].pop("rateLimit", None)
+    )
+    deepMerge(data, document["data"])
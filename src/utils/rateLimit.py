@@ -0,0 +1,244 @@
+from collections import deque
+from collections.abc import Callable, Mapping
+from datetime import datetime
+import logging
+import re
+import threading
+import time
+
+# GitHub's documented secondary limit for GraphQL is 2,000 points per minute
+default_points_per_minute = 2000
+# Points kept in reserve so a burst of in-flight requests never overdraws the budget
+default_reserve = 100
+# Once the remaining budget drops below this fraction, requests get spread out until reset
+default_pacing_fraction = 0.2
+
+rate_limit_selection = "rateLimit { cost remaining resetAt }"
+
+
+class RateLimitError(ConnectionError):
+    """Raised when a request keeps getting rate limited after every retry was spent."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+def addRateLimitField(query: str) -> str:
+    """
+    Adds a `rateLimit { cost remaining resetAt }` selection to the top level of a query.
+
+    The selection is inserted right after the opening brace of the operation's selection
+    set, skipping over any variable definitions. Queries that already select rateLimit
+    are returned untouched.
+
+    Args:
+        query (str): The GraphQL query document.
+
+    Returns:
+        str: The query with the rateLimit selection added.
+    """
+    if re.search(r"\brateLimit\b", query):
+        return query
+    openBrace = query.find("{")
+    openParen = query.find("(")
+    if openParen != -1 and openParen < openBrace:
+        closeParen = query.find(")", openParen)
+        openBrace = query.find("{", closeParen)
+    if openBrace == -1:
+        return query
+    return f"{query[:openBrace + 1]}\n    {rate_limit_selection}{query[openBrace + 1:]}"
+
+
+def getOperationName(query: str) -> str:
+    """Returns the operation name of a query document, or "anonymous" if it has none."""
+    match = re.match(r"\s*(?:query|mutation)\s+(\w+)", query)
+    return match.group(1) if match is not None else "anonymous"
+
+
+class RateLimitScheduler:
+    """
+    Keeps a GraphQL point budget and paces requests so they never run it dry.
+
+    The budget is refreshed from both the `X-RateLimit-*` response headers and the
+    `rateLimit` object returned in the query body. The expected cost of each operation
+    is learned from previous responses, so a heavy page such as the project items query
+    reserves more of the budget than a cheap lookup. Before each request the scheduler:
+
+    1. pauses until the budget resets if the request would eat into the reserve,
+    2. spreads requests evenly until the reset once the budget runs low, and
+    3. keeps the points spent in the last minute under GitHub's secondary limit.
+
+    A single scheduler is shared between threads.
+
+    Args:
+        reserve (int): Points that must be left after a request before it is sent.
+        pointsPerMinute (int): Secondary limit on points spent in any 60 second window.
+        pacingFraction (float): Fraction of the hourly limit below which requests are paced.
+        clock (Callable[[], float]): Returns the current unix time. Replaceable for tests.
+        sleep (Callable[[float], None]): Blocks for the given seconds. Replaceable for tests.
+    """
+
+    def __init__(
+        self,
+        *,
+        reserve: int = default_reserve,
+        pointsPerMinute: int = default_points_per_minute,
+        pacingFraction: float = default_pacing_fraction,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        logger: logging.Logger | None = None,
+    ):
+        self.reserve = reserve
+        self.pointsPerMinute = pointsPerMinute
+        self.pacingFraction = pacingFraction
+        self.clock = clock
+        self.sleep = sleep
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.resetAt: float | None = None
+        self.costByOperation: dict[str, float] = {}
+        self._recentCosts: deque[tuple[float, int]] = deque()
+        self._nextSlot = 0.0
+        self._parkedUntil = 0.0
+        self._lock = threading.Lock()
+
+    def expectedCost(self, operation: str) -> int:
+        return max(1, round(self.costByOperation.get(operation, 1)))
+
+    def _pacingSpacing(self, cost: int, now: float) -> float:
+        """Seconds to leave between requests so the remaining budget lasts until reset."""
+        if (
+            self.limit
+            and self.remaining is not None
+            and self.resetAt is not None
+            and now < self.resetAt
+            and self.remaining < self.limit * self.pacingFraction
+        ):
+            requestsLeft = max(1, (self.remaining - self.reserve) // cost)
+            return (self.resetAt - now) / requestsLeft
+        return 0.0
+
+    def headroom(self) -> float:
+        """Points left in the current window, or infinity while the budget is unknown."""
+        if self.remaining is None:
+            return float("inf") if self.limit is None else float(self.limit)
+        return float(self.remaining)
+
+    def park(self, seconds: float):
+        """Holds back every request for the given seconds, e.g. after being rate limited."""
+        with self._lock:
+            self._parkedUntil = max(self._parkedUntil, self.clock() + seconds)
+
+    def _delayFor(self, cost: int, now: float) -> float:
+        """Seconds to wait before a request of the given cost may be sent."""
+        if now < self._parkedUntil:
+            return self._parkedUntil - now
+        if self.remaining is not None and self.resetAt is not None and now < self.resetAt:
+            if self.remaining - cost < self.reserve:
+                # Wait for the reset plus a second of slack for clock skew
+                return self.resetAt - now + 1
+        delay = 0.0
+        if self._pacingSpacing(cost, now) > 0:
+            delay = self._nextSlot - now
+        while self._recentCosts and self._recentCosts[0][0] <= now - 60:
+            self._recentCosts.popleft()
+        spentThisMinute = sum(c for _, c in self._recentCosts)
+        if self._recentCosts and spentThisMinute + cost > self.pointsPerMinute:
+            delay = max(delay, self._recentCosts[0][0] + 60 - now)
+        return delay
+
+    def tryReserve(self, *, operation: str) -> float:
+        """
+        Reserves the budget for one request of the given operation if it fits right now.
+
+        Returns:
+            float: 0 if the request may be sent, otherwise the seconds to wait before
+                trying again. Nothing is reserved in that case.
+        """
+        cost = self.expectedCost(operation)
+        with self._lock:
+            now = self.clock()
+            delay = self._delayFor(cost, now)
+            if delay > 0:
+                return delay
+            self._nextSlot = now + self._pacingSpacing(cost, now)
+            self._recentCosts.append((now, cost))
+            if self.remaining is not None:
+                # Reserve the points now so concurrent requests see them as spent
+                self.remaining -= cost
+            return 0.0
+
+    def waitForBudget(self, *, operation: str):
+        """Blocks until a request for the given operation fits in the budget."""
+        while True:
+            delay = self.tryReserve(operation=operation)
+            if delay <= 0:
+                return
+            self.logger.info(
+                f"Pausing {delay:.1f}s before {operation} to stay within the GitHub API rate limit"
+            )
+            self.sleep(delay)
+
+    def recordHeaders(self, headers: Mapping[str, str]):
+        """Updates the budget from the `X-RateLimit-*` headers of a response."""
+        with self._lock:
+            if "X-RateLimit-Limit" in headers:
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                self.resetAt = float(headers["X-RateLimit-Reset"])
+
+    def recordRateLimit(self, *, operation: str, rateLimit: dict | None):
+        """Updates the budget and the learned cost of an operation from a `rateLimit` result."""
+        if not rateLimit:
+            return
+        with self._lock:
+            cost = rateLimit.get("cost")
+            if cost is not None:
+                previous = self.costByOperation.get(operation)
+                # Smooth the estimate since page costs vary a little with their contents
+                self.costByOperation[operation] = (
+                    cost if previous is None else 0.7 * previous + 0.3 * cost
+                )
+            if rateLimit.get("remaining") is not None:
+                self.remaining = int(rateLimit["remaining"])
+            if rateLimit.get("resetAt") is not None:
+                self.resetAt = datetime.fromisoformat(rateLimit["resetAt"]).timestamp()
+
+    def resetDelay(self) -> float:
+        """Seconds until the primary budget resets, or a minute if the reset time is unknown."""
+        with self._lock:
+            if self.resetAt is None:
+                return 60.0
+            return max(1.0, self.resetAt - self.clock() + 1)
+
+    def retryDelay(
+        self, *, statusCode: int, headers: Mapping[str, str], body: str
+    ) -> float | None:
+        """
+        Returns how long to wait before retrying a rate limited HTTP response, or None if
+        the response wasn't rate limited.
+
+        Secondary limits are signaled with a 403/429 and usually a `Retry-After` header.
+        Primary limits are signaled with a 403/429 and `X-RateLimit-Remaining: 0`.
+        """
+        isLimited = statusCode in (403, 429) and (
+            "Retry-After" in headers
+            or headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in body.lower()
+        )
+        if not isLimited:
+            return None
+        if "Retry-After" in headers:
+            return float(headers["Retry-After"])
+        if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+            return max(1.0, float(headers["X-RateLimit-Reset"]) - self.clock())
+        # GitHub asks to wait at least a minute when no explicit wait time is given
+        return 60.0
+
+
+def isRateLimitedError(errors: list[dict]) -> bool:
+    """Whether the GraphQL errors of a response report an exhausted primary rate limit."""
+    return any(error.get("type") == "RATE_LIMITED" for error in errors)
@@ -0,0 +1,190 @@
+from collections.abc import Callable
+import json
+import logging
+import os
+import threading
+import time
+from src.utils.checkpoints import queryFingerprint, writeJsonAtomically
+from src.utils.constants import (
+    getCacheDirectory,
+    getResponseCacheMaxBytes,
+    getResponseCacheTtls,
+)
+
+# Seconds a cached response stays fresh, by operation name. Projects, milestones and team
+# rosters barely change during a milestone, while project items change all the time.
+default_response_ttls: dict[str, float] = {
+    "QueryProjects": 24 * 60 * 60,
+    "GetRepositoryMilestones": 24 * 60 * 60,
+    "GetTeamMembers": 6 * 60 * 60,
+    "QueryClassroomTeams": 6 * 60 * 60,
+    "QueryProjectItemsForTeam": 10 * 60,
+    "QueryScrumPrepForTeam": 10 * 60,
+    # Asks whether anything changed, which a cached answer can't tell
+    "ProbeTeamActivity": 0,
+    "ProbeIssueActivity": 0,
+}
+default_response_ttl = 10 * 60
+# Once over the size cap, the least recently used entries are removed down to this fraction
+eviction_target_fraction = 0.9
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of GraphQL responses.
+
+    Entries are keyed by a hash of the query document and its variables and stored one
+    file per entry. Each operation has its own TTL, so a project lookup can be reused for
+    a day while a page of project items only lives for minutes. The cache is kept under
+    `maxBytes` by removing the least recently used entries.
+
+    Several processes can share the same directory: entries are written to a temporary
+    file and moved into place, so a reader only ever sees complete entries, and files
+    vanishing under a reader or an evicting process are treated as misses.
+
+    Args:
+        directory (str): Directory holding the cache entries.
+        maxBytes (int): Size the entries may take up before the oldest are evicted.
+        ttlByOperation (dict[str, float] | None): TTL in seconds per operation name.
+            Operations not listed use `defaultTtl`. A TTL of 0 disables caching.
+        defaultTtl (float): TTL in seconds of operations not in `ttlByOperation`.
+        clock (Callable[[], float]): Returns the current unix time. Replaceable for tests.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        maxBytes: int,
+        ttlByOperation: dict[str, float] | None = None,
+        defaultTtl: float = default_response_ttl,
+        clock: Callable[[], float] = time.time,
+        logger: logging.Logger | None = None,
+    ):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.ttlByOperation = (
+            dict(default_response_ttls) if ttlByOperation is None else ttlByOperation
+        )
+        self.defaultTtl = defaultTtl
+        self.clock = clock
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self._bytesSinceEviction = 0
+        self._lock = threading.Lock()
+
+    def ttlFor(self, operation: str) -> float:
+        # Alias-batched documents share the TTL of the query they batch
+        base = operation.removesuffix("Batch")
+        return self.ttlByOperation.get(
+            operation, self.ttlByOperation.get(base, self.defaultTtl)
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _count(self, *, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, *, operation: str, query: str, variables: dict | None) -> dict | None:
+        """Returns the cached data of a query, or None if there is no fresh entry."""
+        ttl = self.ttlFor(operation)
+        if ttl <= 0:
+            return None
+        path = self._path(queryFingerprint(query=query, variables=variables))
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+        if self.clock() - entry["storedAt"] > ttl:
+            self._count(hit=False)
+            return None
+        try:
+            # Mark the entry as recently used for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry["data"]
+
+    def put(self, *, operation: str, query: str, variables: dict | None, data: dict):
+        """Stores the data returned for a query."""
+        if self.ttlFor(operation) <= 0:
+            return
+        path = self._path(queryFingerprint(query=query, variables=variables))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writeJsonAtomically(
+            path, {"storedAt": self.clock(), "operation": operation, "data": data}
+        )
+        with self._lock:
+            self._bytesSinceEviction += os.path.getsize(path)
+            # Scanning the directory is costly, so only check the size now and then
+            shouldEvict = self._bytesSinceEviction >= self.maxBytes / 10
+            if shouldEvict:
+                self._bytesSinceEviction = 0
+        if shouldEvict:
+            self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in maxBytes."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.maxBytes:
+            return
+        target = self.maxBytes * eviction_target_fraction
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already removed by another process
+                pass
+            total -= size
+        self.logger.info(f"Evicted response cache entries down to {total} bytes")
+
+    def summary(self) -> str:
+        return f"Response cache: {self.hits} hits, {self.misses} misses"
+
+
+_cache: ResponseCache | None = None
+_cacheLock = threading.Lock()
+
+
+def getResponseCache() -> ResponseCache | None:
+    """
+    Returns the process-wide response cache, or None when it is disabled.
+
+    The cache lives in `<INSO_CACHE_DIR>/responses` and is enabled by giving it a size
+    with `INSO_RESPONSE_CACHE_MB`. TTLs can be overridden per operation with
+    `INSO_RESPONSE_CACHE_TTLS`.
+    """
+    global _cache
+    cacheDirectory = getCacheDirectory()
+    maxBytes = getResponseCacheMaxBytes()
+    if cacheDirectory is None or maxBytes <= 0:
+        return None
+    directory = os.path.join(cacheDirectory, "responses")
+    with _cacheLock:
+        if _cache is None or _cache.directory != directory or _cache.maxBytes != maxBytes:
+            _cache = ResponseCache(
+                directory,
+                maxBytes=maxBytes,
+                ttlByOperation=default_response_ttls | getResponseCacheTtls(),
+            )
+        return _cache
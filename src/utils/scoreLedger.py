@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from src.utils.checkpoints import writePickleAtomically
+from src.utils.constants import getCacheDirectory
+from src.utils.models import Issue, IssueContribution
+
+
+def issueFingerprint(issue: Issue, /) -> str:
+    """Digest of every field of an issue, as it is after the preprocessing hooks."""
+    return hashlib.blake2b(repr(issue).encode(), digest_size=16).hexdigest()
+
+
+def scoringInputsFingerprint(inputs: dict, /) -> str:
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class ScoreLedger:
+    """
+    On-disk ledger of what every issue scored for a milestone contributes to its totals:
+    points and bonus per developer, the sprint and labels the points count towards, the
+    issue's timings and the messages logged while scoring it.
+
+    Contributions are keyed by the fingerprint of the issue (see issueFingerprint), and
+    the whole ledger by the inputs of the scoring (milestone dates, members, managers,
+    sprints and decay): when any of those change, every issue is scored again. Otherwise
+    only issues that changed since the last run are, and the others contribute what the
+    ledger holds for them.
+
+    Args:
+        path (str): File holding the ledger.
+        inputs (dict): The scoring inputs the contributions depend on.
+    """
+
+    def __init__(self, path: str, *, inputs: dict):
+        self.path = path
+        self.inputsFingerprint = scoringInputsFingerprint(inputs)
+        self._contributions: dict[str, IssueContribution] = {}
+        self._used: set[str] = set()
+        try:
+            with open(path, mode="rb") as file:
+                stored = pickle.load(file)
+            if stored["inputs"] == self.inputsFingerprint:
+                self._contributions = stored["contributions"]
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, KeyError, TypeError):
+            pass
+
+    @classmethod
+    def forMilestone(
+        cls, *, scope: str, milestone: str, inputs: dict
+    ) -> "ScoreLedger | None":
+        """
+        Returns the ledger of a milestone, or None if no cache directory is configured.
+
+        Args:
+            scope (str): Readable prefix for the ledger file (e.g. the org and team).
+            milestone (str): The milestone scored.
+            inputs (dict): The scoring inputs the contributions depend on.
+        """
+        cacheDirectory = getCacheDirectory()
+        if cacheDirectory is None:
+            return None
+        safeName = "".join(c if c.isalnum() else "_" for c in f"{scope}-{milestone}")
+        return cls(
+            os.path.join(cacheDirectory, "scores", f"{safeName}.pickle"), inputs=inputs
+        )
+
+    def __len__(self) -> int:
+        return len(self._contributions)
+
+    def lookup(self, fingerprint: str) -> IssueContribution | None:
+        contribution = self._contributions.get(fingerprint)
+        if contribution is not None:
+            self._used.add(fingerprint)
+        return contribution
+
+    def store(self, fingerprint: str, contribution: IssueContribution) -> None:
+        self._contributions[fingerprint] = contribution
+        self._used.add(fingerprint)
+
+    def save(self) -> None:
+        """
+        Writes the ledger to disk, keeping only the contributions of the issues scored
+        since it was loaded, so issues that changed or left the milestone are dropped.
+        """
+        self._contributions = {
+            fingerprint: contribution
+            for fingerprint, contribution in self._contributions.items()
+            if fingerprint in self._used
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        writePickleAtomically(
+            self.path,
+            {"inputs": self.inputsFingerprint, "contributions": self._contributions},
+        )
+
+
+class ScoringLogRecorder:
+    """
+    Stands in for the logger while an issue is scored (it is a ScoringLogger): messages
+    are passed on to the logger and kept, so they can be logged again when the issue's
+    contribution is served from the ledger instead.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.messages: list[tuple[int, str]] = []
+
+    def log(self, level: int, msg: str) -> None:
+        self.messages.append((level, msg))
+        self.logger.log(level, msg)
+
+    def debug(self, msg: str) -> None:
+        self.log(logging.DEBUG, msg)
+
+    def info(self, msg: str) -> None:
+        self.log(logging.INFO, msg)
+
+    def warning(self, msg: str) -> None:
+        self.log(logging.WARNING, msg)
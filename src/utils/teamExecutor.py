@@ -0,0 +1,54 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import logging
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(kw_only=True)
+class TeamRunResults(Generic[T]):
+    # Results of the teams that finished, by team
+    results: dict[str, T] = field(default_factory=dict)
+    # Errors of the teams that failed, by team
+    errors: dict[str, Exception] = field(default_factory=dict)
+
+
+def runForTeams(
+    teams: Iterable[str],
+    task: Callable[[str], T],
+    *,
+    maxWorkers: int,
+    logger: logging.Logger | None = None,
+) -> TeamRunResults[T]:
+    """
+    Runs a task for every team, with at most `maxWorkers` teams in flight at once.
+
+    Teams only wait on the network, so running them on threads lets the requests of
+    different teams overlap while the shared connection pool and rate limit budget keep
+    the total load in check. A team whose task raises is recorded in the errors and the
+    remaining teams carry on.
+
+    Args:
+        teams (Iterable[str]): Teams to run the task for.
+        task (Callable[[str], T]): Called with each team name.
+        maxWorkers (int): Most teams run at the same time. 1 runs them one by one.
+        logger (logging.Logger | None): Logger to report failures to.
+
+    Returns:
+        TeamRunResults[T]: The result or the error of every team.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    outcome: TeamRunResults[T] = TeamRunResults()
+    with ThreadPoolExecutor(max_workers=max(1, maxWorkers)) as executor:
+        futures = {executor.submit(task, team): team for team in teams}
+        for future in as_completed(futures):
+            team = futures[future]
+            try:
+                outcome.results[team] = future.result()
+            except Exception as e:
+                logger.error(f"{team} failed: {type(e).__name__}: {e}")
+                outcome.errors[team] = e
+    return outcome
@@ -0,0 +1,114 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from src.utils.cassette import RecordingTransport, ReplayTransport
+from src.utils.constants import (
+    getCassetteMode,
+    getCassettePath,
+    getGraphqlUrl,
+    getMaxInFlight,
+    getPoolSize,
+    getRequestTimeout,
+)
+
+
+class GraphqlTransport:
+    """
+    Owns a long-lived, pooled HTTP session used to send every GraphQL request.
+
+    Reusing a single session keeps connections to the API alive between pages, so a
+    run with hundreds of pages only pays for a handful of TCP/TLS handshakes. The
+    underlying urllib3 pool is thread-safe and the session itself is never mutated
+    after construction, which makes a single transport safe to share between threads.
+
+    Args:
+        url (str): GraphQL endpoint requests are sent to.
+        poolSize (int): Maximum number of sockets kept open to the endpoint. Threads
+            requesting more connections than this block until one is free.
+        timeout (float): Seconds to wait for the server before giving up on a request.
+    """
+
+    def __init__(self, *, url: str, poolSize: int, timeout: float):
+        self.url = url
+        self.poolSize = poolSize
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=poolSize, pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+                "Content-Type": "application/json",
+            }
+        )
+
+    def post(
+        self, *, payload: dict, headers: dict[str, str], stream: bool = False
+    ) -> requests.Response:
+        """
+        Send a GraphQL payload over a pooled connection and return the raw response.
+
+        With `stream`, the body is left unread so it can be consumed with iter_content;
+        the connection goes back to the pool once the response is read or closed.
+        """
+        return self.session.post(
+            self.url, json=payload, headers=headers, timeout=self.timeout, stream=stream
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_transport: GraphqlTransport | None = None
+_transportLock = threading.Lock()
+
+
+def getTransport() -> GraphqlTransport:
+    """
+    Returns the process-wide transport, creating it on first use.
+
+    The endpoint, pool size and timeout are read from the environment
+    (`GITHUB_GRAPHQL_URL`, `GITHUB_API_POOL_SIZE`, `GITHUB_API_TIMEOUT`). When
+    `GITHUB_API_CASSETTE` names a cassette file, `GITHUB_API_CASSETTE_MODE` picks between
+    recording the run's traffic to it (`record`) and serving it back offline (`replay`).
+    """
+    global _transport
+    if _transport is None:
+        with _transportLock:
+            if _transport is None:
+                _transport = buildTransport()
+    return _transport
+
+
+def buildTransport():
+    cassettePath = getCassettePath()
+    mode = getCassetteMode()
+    if cassettePath is not None and mode == "replay":
+        return ReplayTransport(path=cassettePath)
+    transport = GraphqlTransport(
+        url=getGraphqlUrl(),
+        # Enough connections for every request the async fetchers keep in flight
+        poolSize=max(getPoolSize(), getMaxInFlight()),
+        timeout=getRequestTimeout(),
+    )
+    if cassettePath is not None and mode == "record":
+        return RecordingTransport(transport, path=cassettePath)
+    return transport
+
+
+def setTransport(transport: GraphqlTransport | None) -> GraphqlTransport | None:
+    """
+    Replaces the process-wide transport and returns the previous one.
+
+    Passing None drops the current transport so the next call to getTransport()
+    builds a fresh one from the environment.
+    """
+    global _transport
+    with _transportLock:
+        previous = _transport
+        _transport = transport
+    return previous
@@ -0,0 +1,279 @@
+import logging
+import pytest
+import requests
+from benchmarks.fakeGithub import Course, CourseSettings, FakeGithubServer, ServerSettings
+from benchmarks.fakeGithub.graphql import (
+    Connection,
+    encodeCursor,
+    estimateCost,
+    execute,
+    parse,
+)
+import copy
+from src import generateMilestoneMetricsForActions as actions
+from src.generateTeamMetrics import (
+    completeTruncatedConnections,
+    fetchProjectSnapshotAsync,
+    fetchIssuesFromGithub,
+    fetchParsedIssues,
+    get_team_issues,
+    getTeamMetricsForMilestone,
+    teamIssuesQuery,
+)
+from src.getMilestones import getMilestonesBatch
+from src.getTeamMembers import getTeamMembers
+from src.utils.credentials import setCredentialPool
+from src.utils.models import IssueFields
+from src.utils.orgMetadata import setOrgMetadataCache
+from src.utils.pageSizes import AdaptivePageSize
+from src.utils.parseDateTime import get_milestone_end, get_milestone_start
+from src.utils.queryRunner import runGraphqlQuery
+from src.utils.transport import setTransport
+
+
+@pytest.fixture
+def course():
+    return Course(CourseSettings(seed=3, teams=3, itemsPerProject=250))
+
+
+@pytest.fixture
+def server(course, monkeypatch):
+    with FakeGithubServer(course) as server:
+        monkeypatch.setenv("GITHUB_GRAPHQL_URL", server.url)
+        monkeypatch.setenv("GITHUB_API_TOKEN", "fake")
+        monkeypatch.delenv("GITHUB_API_TOKENS", raising=False)
+        previousTransport = setTransport(None)
+        previousPool = setCredentialPool(None)
+        previousMetadata = setOrgMetadataCache(None)
+        yield server
+        setTransport(previousTransport).close()
+        setCredentialPool(previousPool)
+        setOrgMetadataCache(previousMetadata)
+
+
+def test_aliases_fragments_and_pagination():
+    operation = parse(
+        """
+        query Q($after: String) {
+          first: things(first: 2, after: $after) {
+            nodes { ... on Thing { name } ... on Other { missing } __typename }
+            pageInfo { endCursor hasNextPage }
+          }
+        }
+        """
+    )
+    things = [{"__typename": "Thing", "name": f"thing{i}"} for i in range(3)]
+    root = {"things": Connection(things)}
+    data, errors = execute(operation, root=root)
+    assert errors == []
+    assert data["first"]["nodes"] == [
+        {"name": "thing0", "__typename": "Thing"},
+        {"name": "thing1", "__typename": "Thing"},
+    ]
+    cursor = data["first"]["pageInfo"]["endCursor"]
+    data, _ = execute(operation, root=root, variables={"after": cursor})
+    assert data["first"]["nodes"] == [{"name": "thing2", "__typename": "Thing"}]
+    assert data["first"]["pageInfo"]["hasNextPage"] is False
+
+
+def test_project_items_query_cost_follows_githubs_formula():
+    operation = parse(get_team_issues)
+    # The page size is a variable that defaults to a full page
+    cost, nodes = estimateCost(operation.selections, operation.variableDefaults)
+    # 1 items request, plus 100 for each nested connection and 3,000 for comment reactions
+    assert cost == 35
+    assert nodes == 100 + 100 * (20 + 10 + 10 + 30 + 30 * 10 + 50)
+
+
+def test_lecture_topic_task_profile_leaves_out_the_costly_connections():
+    operation = parse(teamIssuesQuery(IssueFields.LECTURE_TOPIC_TASKS))
+    cost, _ = estimateCost(operation.selections, operation.variableDefaults)
+    # 1 items request plus 100 each for assignees, labels and timeline items
+    assert cost == 3
+    assert teamIssuesQuery(IssueFields.FULL) == get_team_issues
+
+def test_course_is_reproducible_from_its_seed():
+    first = Course(CourseSettings(seed=5, teams=2, itemsPerProject=50))
+    second = Course(CourseSettings(seed=5, teams=2, itemsPerProject=50))
+    query = parse(get_team_issues)
+    variables = {"owner": "fake-course", "projectNumber": 2}
+    assert execute(query, root={"organization": lambda a: first.organizationObject(a["login"])}, variables=variables) == execute(
+        query, root={"organization": lambda a: second.organizationObject(a["login"])}, variables=variables
+    )
+
+
+def test_pipeline_runs_end_to_end(server, course):
+    config = course.actionsConfig(1)
+    dates = config["milestones"]["Milestone #1"]
+    members = getTeamMembers(course.organization, "Team 002")
+    assert len(members) == 7
+    data = getTeamMetricsForMilestone(
+        org=course.organization,
+        team="Team 002",
+        milestone="Milestone #1",
+        members=members,
+        managers=config["managers"],
+        startDate=get_milestone_start(dates["startDate"]),
+        endDate=get_milestone_end(dates["endDate"]),
+        sprints=2,
+        minTasksPerSprint=1,
+        useDecay=True,
+        milestoneGrade=100.0,
+    )
+    assert data.totalPointsClosed > 0
+    assert set(data.devMetrics) <= set(members)
+    milestones = getMilestonesBatch(organization=course.organization, teams=["Team 001", "Team 003"])
+    assert [m.title for m in milestones["Team 003"]] == ["Milestone #1", "Milestone #2", "Milestone #3"]
+
+
+def test_milestone_search_finds_the_same_issues_as_a_full_fetch(server, course):
+    logger = logging.getLogger(__name__)
+    everything = fetchParsedIssues(org=course.organization, team="Team 002", logger=logger)
+    searched = fetchParsedIssues(
+        org=course.organization,
+        team="Team 002",
+        logger=logger,
+        milestone="Milestone #2",
+        searchMilestone=True,
+    )
+    assert [issue.url for issue in searched] == [
+        issue.url
+        for issue in everything
+        if issue.milestone in ("Milestone #2", None)
+    ]
+
+
+def test_lighter_profiles_parse_the_same_issue_basics(server, course):
+    logger = logging.getLogger(__name__)
+    full = list(
+        fetchParsedIssues(org=course.organization, team="Team 001", logger=logger)
+    )
+    light = list(
+        fetchParsedIssues(
+            org=course.organization,
+            team="Team 001",
+            logger=logger,
+            issueFields=IssueFields.LECTURE_TOPIC_TASKS,
+        )
+    )
+
+    def basics(issue):
+        return (
+            issue.title,
+            issue.milestone,
+            issue.assignees,
+            issue.labels,
+            # Only read for closed issues; open ones fall back to the last event's actor
+            issue.closedBy if issue.closed else None,
+            issue.urgency,
+            issue.difficulty,
+        )
+
+    assert [basics(issue) for issue in light] == [basics(issue) for issue in full]
+    assert all(issue.reactions == [] and issue.comments == [] for issue in light)
+
+
+def test_truncated_connections_are_completed_with_follow_up_pages(server, course):
+    logger = logging.getLogger(__name__)
+    items = [
+        item
+        for item in fetchIssuesFromGithub(
+            org=course.organization, team="Team 003", logger=logger
+        )
+        if "id" in item["content"]
+        and len(item["content"]["comments"]["nodes"]) >= 2
+        and len(item["content"]["timelineItems"]["nodes"]) >= 2
+    ][:5]
+    assert items
+    complete = copy.deepcopy(items)
+    for item in items:
+        issue = item["content"]
+        # As if the item queries had only returned the first comment and the last event
+        issue["comments"]["nodes"] = issue["comments"]["nodes"][:1]
+        issue["comments"]["pageInfo"] = {"hasNextPage": True, "endCursor": encodeCursor(0)}
+        events = issue["timelineItems"]["nodes"]
+        issue["timelineItems"]["nodes"] = events[-1:]
+        issue["timelineItems"]["pageInfo"] = {
+            "hasPreviousPage": True,
+            "startCursor": encodeCursor(len(events) - 1),
+        }
+
+    completeTruncatedConnections(items, logger=logger)
+
+    def nodes(item, connection):
+        return item["content"][connection]["nodes"]
+
+    for item, expected in zip(items, complete):
+        assert nodes(item, "comments") == nodes(expected, "comments")
+        assert nodes(item, "timelineItems") == nodes(expected, "timelineItems")
+
+
+def test_pages_that_time_out_are_split_and_their_size_remembered(
+    server, course, tmp_path, monkeypatch
+):
+    logger = logging.getLogger(__name__)
+    team = "Team 003"
+    expected = [item["id"] for item in fetchIssuesFromGithub(org=course.organization, team=team, logger=logger)]
+
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    # Full pages of 100 items ask for 42,100 nodes, half pages for 21,050
+    server.settings.timeoutNodes = 30_000
+    items = [item["id"] for item in fetchIssuesFromGithub(org=course.organization, team=team, logger=logger)]
+    assert items == expected
+
+    remembered = AdaptivePageSize.forQuery(
+        name=f"{course.organization}-{team}", query=get_team_issues, variable="pageSize"
+    )
+    assert remembered.size == 50
+
+
+def test_unchanged_team_reuses_the_previous_reports(server, course, tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("ORGANIZATION", course.organization)
+    monkeypatch.chdir(tmp_path)
+    snapshots = []
+
+    async def fetchSnapshot(**kwargs):
+        snapshots.append(kwargs["team"])
+        return await fetchProjectSnapshotAsync(**kwargs)
+
+    monkeypatch.setattr(actions, "fetchProjectSnapshotAsync", fetchSnapshot)
+    config = course.actionsConfig(0)
+    actions.generateMetricsFromV2Config(config)
+    reports = sorted(path.name for path in tmp_path.glob("*.md"))
+    assert reports
+    for path in tmp_path.glob("*.md"):
+        path.unlink()
+
+    actions.generateMetricsFromV2Config(config)
+    assert snapshots == ["Team 001"]
+    assert sorted(path.name for path in tmp_path.glob("*.md")) == reports
+
+    actions.generateMetricsFromV2Config(config, force=True)
+    assert snapshots == ["Team 001", "Team 001"]
+
+
+def test_unknown_organization_is_an_error(server):
+    with pytest.raises(ConnectionError, match="NOT_FOUND"):
+        runGraphqlQuery(
+            query="query Q($owner: String!) { organization(login: $owner) { login } }",
+            variables={"owner": "nobody"},
+        )
+
+
+def test_rate_limit_is_simulated_per_token(course):
+    settings = ServerSettings(pointsPerWindow=1, windowSeconds=3600)
+    query = {"query": 'query Q { organization(login: "fake-course") { login } }'}
+    with FakeGithubServer(course, settings) as server:
+
+        def post(token):
+            return requests.post(
+                server.url, json=query, headers={"Authorization": f"bearer {token}"}
+            )
+
+        first = post("a")
+        assert first.json() == {"data": {"organization": {"login": "fake-course"}}}
+        assert first.headers["X-RateLimit-Remaining"] == "0"
+        limited = post("a")
+        assert limited.json()["errors"][0]["type"] == "RATE_LIMITED"
+        assert "data" in post("b").json()
@@ -1,11 +1,24 @@
+import asyncio
+import copy
 import pytz
-from src.generateTeamMetrics import getTeamMetricsForMilestone
+from src.generateTeamMetrics import (
+    completeTruncatedConnections,
+    completeTruncatedItems,
+    fetchIssuesFromGithub,
+    fetchParsedIssues,
+    fetchProcessedIssues,
+    fetchProjectSnapshotAsync,
+    getTeamMetricsForMilestone,
+    getTeamMetricsForMilestoneAsync,
+    getTeamMetricsForMilestones,
+    milestoneSearchQueries,
+)
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from datetime import datetime
 import logging
 
-from src.utils.models import Project
+from src.utils.models import IssueFields, MilestoneConfig, MilestoneData, Project
 
 
 @pytest.fixture
@@ -789,5 +802,501 @@ def test_issues_points_percent_by_label(mock_runGraphqlQuery, mock_getProject, l
     )  # Issue 3 totals to 5 points and contain "3" label
 
 
+@patch("src.generateTeamMetrics.getMilestonesAsync", new_callable=AsyncMock)
+@patch("src.generateTeamMetrics.getTeamMembersAsync", new_callable=AsyncMock)
+@patch("src.generateTeamMetrics.getProjectAsync", new_callable=AsyncMock)
+@patch("src.generateTeamMetrics.runGraphqlQueryAsync", new_callable=AsyncMock)
+def test_async_metrics_match_sync_metrics(
+    mock_runGraphqlQueryAsync,
+    mock_getProjectAsync,
+    mock_getTeamMembersAsync,
+    mock_getMilestonesAsync,
+    logger,
+):
+    mock_getProjectAsync.return_value = mock_project
+    mock_runGraphqlQueryAsync.return_value = mock_gh_res_issue_with_hooray
+    mock_getTeamMembersAsync.return_value = ["dev1", "dev2", "manager1"]
+    mock_getMilestonesAsync.return_value = []
+
+    result = asyncio.run(
+        getTeamMetricsForMilestoneAsync(
+            org="sample-org",
+            team="sample-team",
+            milestone="v1.0",
+            managers=["manager1"],
+            startDate=datetime(2023, 1, 1, tzinfo=pytz.UTC),
+            endDate=datetime(2023, 12, 31, tzinfo=pytz.UTC),
+            useDecay=True,
+            sprints=1,
+            minTasksPerSprint=0,
+            milestoneGrade=100,
+            logger=logger,
+        )
+    )
+
+    expected_score = (3 * 2 + 1) * 1.1
+    assert result.totalPointsClosed == pytest.approx(expected_score / 1.1)
+    assert result.devMetrics["dev1"].pointsClosed == pytest.approx(expected_score)
+    mock_getTeamMembersAsync.assert_awaited_once_with("sample-org", "sample-team")
+
+
+@patch("src.generateTeamMetrics.getMilestonesAsync", new_callable=AsyncMock)
+@patch("src.generateTeamMetrics.getProjectAsync", new_callable=AsyncMock)
+@patch("src.generateTeamMetrics.runGraphqlQueryAsync", new_callable=AsyncMock)
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_milestones_scored_from_a_snapshot_share_one_fetch(
+    mock_runGraphqlQuery,
+    mock_runGraphqlQueryAsync,
+    mock_getProjectAsync,
+    mock_getMilestonesAsync,
+    logger,
+):
+    mock_getProjectAsync.return_value = mock_project
+    mock_runGraphqlQueryAsync.return_value = mock_gh_res_issue_with_hooray
+    mock_getMilestonesAsync.return_value = []
+
+    snapshot = asyncio.run(
+        fetchProjectSnapshotAsync(org="sample-org", team="sample-team")
+    )
+    results = [
+        getTeamMetricsForMilestone(
+            org="sample-org",
+            team="sample-team",
+            milestone=milestone,
+            members=["dev1", "dev2", "manager1"],
+            managers=["manager1"],
+            startDate=datetime(2023, 1, 1, tzinfo=pytz.UTC),
+            endDate=datetime(2023, 12, 31, tzinfo=pytz.UTC),
+            useDecay=True,
+            sprints=1,
+            minTasksPerSprint=0,
+            milestoneGrade=100,
+            # The hook must only change this milestone's copy of the issues
+            issuePreProcessingHooks=["issue.difficulty = 10"] if milestone == "v2.0" else [],
+            logger=logger,
+            snapshot=snapshot,
+        )
+        for milestone in ["v2.0", "v1.0", "v1.0"]
+    ]
+
+    assert mock_runGraphqlQueryAsync.await_count == 1
+    mock_runGraphqlQuery.assert_not_called()
+    expected_score = (3 * 2 + 1) * 1.1
+    assert results[0].totalPointsClosed == 0
+    for result in results[1:]:
+        assert result.devMetrics["dev1"].pointsClosed == pytest.approx(expected_score)
+    assert snapshot.issues[0].difficulty == 2
+
+
+@patch("src.generateTeamMetrics.getMilestones")
+@patch("src.generateTeamMetrics.getProject")
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_single_pass_scoring_matches_per_milestone_scoring(
+    mock_runGraphqlQuery, mock_getProject, mock_getMilestones, logger
+):
+    nodes = [
+        node
+        for response in [
+            mock_gh_res_issue_with_hooray,
+            mock_gh_res_v20_milestone,
+            mock_gh_res_issue_with_multiple_devs,
+            mock_gh_res_issues_with_lecture_topic_tasks,
+            mock_gh_res_issues_points_percent_by_label,
+        ]
+        for node in response["organization"]["projectV2"]["items"]["nodes"]
+    ]
+    mock_runGraphqlQuery.return_value = {
+        "organization": {
+            "projectV2": {
+                "title": "sample-team",
+                "items": {
+                    "pageInfo": {"endCursor": "end-cursor", "hasNextPage": False},
+                    "nodes": nodes,
+                },
+            }
+        }
+    }
+    mock_getProject.return_value = mock_project
+    mock_getMilestones.return_value = []
+    members = sorted(
+        {
+            assignee["login"]
+            for node in nodes
+            for assignee in node["content"]["assignees"]["nodes"]
+        }
+        | {"manager1"}
+    )
+    milestones = {
+        "v1.0": MilestoneConfig(
+            startDate=datetime(2023, 1, 1, tzinfo=pytz.UTC),
+            endDate=datetime(2023, 12, 31, tzinfo=pytz.UTC),
+            milestoneGrade=90,
+        ),
+        "v2.0": MilestoneConfig(
+            startDate=datetime(2022, 6, 1, tzinfo=pytz.UTC),
+            endDate=datetime(2023, 6, 1, tzinfo=pytz.UTC),
+            useDecay=False,
+        ),
+    }
+    shared = dict(
+        org="sample-org",
+        team="sample-team",
+        members=members,
+        managers=["manager1"],
+        sprints=2,
+        minTasksPerSprint=0,
+    )
+
+    results = getTeamMetricsForMilestones(milestones=milestones, **shared)
+
+    assert mock_runGraphqlQuery.call_count == 1
+    assert results["v1.0"].totalPointsClosed > 0
+    assert results["v2.0"].totalPointsClosed > 0
+    for milestone, config in milestones.items():
+        assert results[milestone] == getTeamMetricsForMilestone(
+            milestone=milestone,
+            startDate=config.startDate,
+            endDate=config.endDate,
+            useDecay=config.useDecay,
+            milestoneGrade=config.milestoneGrade,
+            logger=logger,
+            **shared,
+        )
+
+
+@patch("src.generateTeamMetrics.getProject")
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_incremental_sync_only_fetches_changed_items(
+    mock_runGraphqlQuery, mock_getProject, tmp_path, monkeypatch, logger
+):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("INSO_INCREMENTAL_SYNC", "1")
+    mock_getProject.return_value = mock_project
+
+    def makeItem(itemId: str, updatedAt: str) -> dict:
+        return {"id": itemId, "updatedAt": updatedAt, "content": {"updatedAt": updatedAt}}
+
+    def connection(nodes: list[dict]) -> dict:
+        return {
+            "organization": {
+                "projectV2": {
+                    "items": {
+                        "pageInfo": {"endCursor": None, "hasNextPage": False},
+                        "nodes": nodes,
+                    }
+                }
+            }
+        }
+
+    board = {"a": makeItem("a", "1"), "b": makeItem("b", "1"), "c": makeItem("c", "1")}
+    byIdRequests = []
+
+    def runQuery(*, query, variables=None, **_):
+        if "QueryProjectItemsById" in query:
+            byIdRequests.append(variables["ids"])
+            return {"nodes": [board[itemId] for itemId in variables["ids"]]}
+        return connection(list(board.values()))
+
+    mock_runGraphqlQuery.side_effect = runQuery
+
+    def fetch() -> list[dict]:
+        return list(
+            fetchIssuesFromGithub(org="sample-org", team="sample-team", logger=logger)
+        )
+
+    assert fetch() == list(board.values())
+    board["b"] = makeItem("b", "2")
+    del board["c"]
+    board["d"] = makeItem("d", "2")
+
+    assert fetch() == list(board.values())
+    assert byIdRequests == [["b", "d"]]
+    listedQueries = [call.kwargs["query"] for call in mock_runGraphqlQuery.call_args_list]
+    assert sum("QueryProjectItemsForTeam" in query for query in listedQueries) == 1
+
+
+@patch("src.generateTeamMetrics.getMilestones")
+@patch("src.generateTeamMetrics.getProject")
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_repeated_runs_read_issues_from_the_issue_store(
+    mock_runGraphqlQuery, mock_getProject, mock_getMilestones, tmp_path, monkeypatch, logger
+):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("INSO_ISSUE_STORE_MAX_AGE", "3600")
+    mock_runGraphqlQuery.return_value = mock_gh_res_issue_with_hooray
+    mock_getProject.return_value = mock_project
+    mock_getMilestones.return_value = []
+
+    def score() -> MilestoneData:
+        return getTeamMetricsForMilestone(
+            org="sample-org",
+            team="sample-team",
+            milestone="v1.0",
+            members=["dev1", "dev2", "manager1"],
+            managers=["manager1"],
+            startDate=datetime(2023, 1, 1, tzinfo=pytz.UTC),
+            endDate=datetime(2023, 12, 31, tzinfo=pytz.UTC),
+            useDecay=True,
+            sprints=1,
+            minTasksPerSprint=0,
+            milestoneGrade=100,
+            logger=logger,
+        )
+
+    first = score()
+    assert score() == first
+    assert mock_runGraphqlQuery.call_count == 1
+
+
+@patch("src.generateTeamMetrics.getProject")
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_hooks_dont_change_the_stored_issues(
+    mock_runGraphqlQuery, mock_getProject, tmp_path, monkeypatch, logger
+):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("INSO_ISSUE_STORE_MAX_AGE", "3600")
+    mock_runGraphqlQuery.return_value = mock_gh_res_issue_with_hooray
+    mock_getProject.return_value = mock_project
+
+    def fetch() -> list:
+        return list(
+            fetchProcessedIssues(
+                org="sample-org",
+                team="sample-team",
+                logger=logger,
+                hooks=["issue.milestone = 'MOVED'", "issue.urgency = 99.0"],
+                milestone="v1.0",
+                startDate=datetime(2023, 1, 1, tzinfo=pytz.UTC),
+                endDate=datetime(2023, 12, 31, tzinfo=pytz.UTC),
+                managers=["manager1"],
+            )
+        )
+
+    fetch()
+    (stored,) = fetchParsedIssues(org="sample-org", team="sample-team", logger=logger)
+    assert mock_runGraphqlQuery.call_count == 1
+    assert stored.milestone == "v1.0"
+    assert stored.urgency == 3.0
+
+
+@patch("src.generateTeamMetrics.getTeamRepositories")
+@patch("src.generateTeamMetrics.getProject")
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_milestone_search_only_fetches_the_milestones_items(
+    mock_runGraphqlQuery, mock_getProject, mock_getTeamRepositories, logger, caplog
+):
+    project = Project(
+        number=1, name="test", url="https://github.com/orgs/org/projects/1", public=True
+    )
+    mock_getProject.return_value = project
+    mock_getTeamRepositories.return_value = ["org/repo"]
+    board = {
+        item["content"]["number"]: {**item, "id": f"item{item['content']['number']}"}
+        for item in (
+            mock_gh_res_with_issue_closed_by_dev["organization"]["projectV2"]["items"]["nodes"]
+            + mock_gh_res_v20_milestone["organization"]["projectV2"]["items"]["nodes"]
+        )
+    }
+    # An issue of a repository the team doesn't have, which searches can't find
+    outsider = copy.deepcopy(board[1])
+    outsider["content"].update(number=3, url="https://github.com/org/docs/issues/3")
+    board[3] = {**outsider, "id": "item3"}
+    searches = []
+    byIdRequests = []
+
+    def runQuery(*, query, variables=None, **_):
+        if "QueryProjectItemsById" in query:
+            byIdRequests.append(variables["ids"])
+            return {"nodes": [board[int(itemId[4:])] for itemId in variables["ids"]]}
+        if "QueryProjectItemRepositories" in query:
+            nodes = [
+                {
+                    "id": item["id"],
+                    "content": {
+                        "repository": {
+                            "nameWithOwner": "org/docs" if number == 3 else "org/repo"
+                        },
+                        "milestone": item["content"]["milestone"],
+                    },
+                }
+                for number, item in board.items()
+            ]
+            return {
+                "organization": {
+                    "projectV2": {
+                        "items": {
+                            "pageInfo": {"endCursor": None, "hasNextPage": False},
+                            "nodes": nodes,
+                        }
+                    }
+                }
+            }
+        assert "SearchIssueProjectItems" in query
+        searches.append(variables["search"])
+        found = (
+            [
+                number
+                for number, item in board.items()
+                if (item["content"]["milestone"] or {}).get("title") == "v1.0"
+                and "org/repo/" in item["content"]["url"]
+            ]
+            if 'milestone:"v1.0"' in variables["search"]
+            else []
+        )
+        return {
+            "search": {
+                "issueCount": len(found),
+                "pageInfo": {"endCursor": None, "hasNextPage": False},
+                "nodes": [
+                    {
+                        "projectItems": {
+                            "nodes": [
+                                {"id": "other", "project": {"url": "elsewhere"}},
+                                {"id": f"item{number}", "project": {"url": project.url}},
+                            ]
+                        }
+                    }
+                    for number in found
+                ],
+            }
+        }
+
+    mock_runGraphqlQuery.side_effect = runQuery
+
+    issues = list(
+        fetchProcessedIssues(
+            org="org",
+            team="sample-team",
+            logger=logger,
+            milestone="v1.0",
+            managers=["dev2"],
+            searchMilestone=True,
+        )
+    )
+
+    assert searches == [
+        'is:issue milestone:"v1.0" repo:org/repo',
+        "is:issue no:milestone repo:org/repo",
+    ]
+    assert byIdRequests == [["item1", "item3"]]
+    assert [issue.number for issue in issues] == [1, 3]
+    assert "1 project items of v1.0 are issues of repositories outside the team" in caplog.text
+
+
+def test_milestone_searches_split_repositories_to_fit_the_query_limit():
+    repositories = [f"org/{'r' * 40}-{index}" for index in range(12)]
+
+    searches = milestoneSearchQueries(milestone="Milestone 1", repositories=repositories)
+
+    assert all(len(search) <= 256 for search in searches)
+    for milestoneFilter in ('milestone:"Milestone 1"', "no:milestone"):
+        searched = [
+            qualifier.removeprefix("repo:")
+            for search in searches
+            if milestoneFilter in search
+            for qualifier in search.split()
+            if qualifier.startswith("repo:")
+        ]
+        assert searched == repositories
+    assert milestoneSearchQueries(milestone='Say "hi"', repositories=repositories) is None
+    assert milestoneSearchQueries(milestone="Milestone 1", repositories=[]) is None
+
+
+@patch("src.generateTeamMetrics.getProject")
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_stored_issues_serve_profiles_they_include(
+    mock_runGraphqlQuery, mock_getProject, tmp_path, monkeypatch, logger
+):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("INSO_ISSUE_STORE_MAX_AGE", "3600")
+    mock_runGraphqlQuery.return_value = mock_gh_res_issue_with_hooray
+    mock_getProject.return_value = mock_project
+
+    def fetch(issueFields: IssueFields) -> list:
+        return list(
+            fetchParsedIssues(
+                org="sample-org", team="sample-team", logger=logger, issueFields=issueFields
+            )
+        )
+
+    fetch(IssueFields.LECTURE_TOPIC_TASKS)
+    assert "reactions" not in mock_runGraphqlQuery.call_args.kwargs["query"]
+    fetch(IssueFields.FULL)
+    assert mock_runGraphqlQuery.call_count == 2
+    fetch(IssueFields.SCORING)
+    fetch(IssueFields.LECTURE_TOPIC_TASKS)
+    assert mock_runGraphqlQuery.call_count == 2
+
+
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_truncated_connections_of_many_issues_share_a_follow_up_request(
+    mock_runGraphqlQuery, logger
+):
+    def item(number: int) -> dict:
+        return {
+            "content": {
+                "id": f"I_{number}",
+                "assignees": {
+                    "pageInfo": {"hasNextPage": True, "endCursor": "c20"},
+                    "nodes": [{"login": "dev1"}],
+                },
+                "labels": {"pageInfo": {"hasNextPage": False}, "nodes": []},
+            }
+        }
+
+    items = [item(1), item(2)]
+    mock_runGraphqlQuery.return_value = {
+        f"lookup{index}": {
+            "assignees": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [{"login": f"late{index}"}],
+            }
+        }
+        for index in range(2)
+    }
+
+    completeTruncatedConnections(items, logger=logger)
+
+    assert mock_runGraphqlQuery.call_count == 1
+    variables = mock_runGraphqlQuery.call_args.kwargs["variables"]
+    assert variables == {"id_0": "I_1", "cursor_0": "c20", "id_1": "I_2", "cursor_1": "c20"}
+    assert [
+        [a["login"] for a in i["content"]["assignees"]["nodes"]] for i in items
+    ] == [["dev1", "late0"], ["dev1", "late1"]]
+
+
+@patch("src.generateTeamMetrics.runGraphqlQuery")
+def test_items_without_truncated_connections_are_handed_on_right_away(
+    mock_runGraphqlQuery, logger
+):
+    def item(number: int, *, truncated: bool) -> dict:
+        return {
+            "content": {
+                "id": f"I_{number}",
+                "assignees": {
+                    "pageInfo": {"hasNextPage": truncated, "endCursor": "c20"},
+                    "nodes": [{"login": "dev1"}],
+                },
+            }
+        }
+
+    def stream():
+        yield item(1, truncated=True)
+        yield item(2, truncated=False)
+        # The rest of the page hasn't downloaded yet
+        raise AssertionError("read past the first complete item")
+
+    mock_runGraphqlQuery.return_value = {
+        "lookup0": {
+            "assignees": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [{"login": "late"}],
+            }
+        }
+    }
+    items = completeTruncatedItems(stream(), logger=logger)
+    assert next(items)["content"]["id"] == "I_2"
+    mock_runGraphqlQuery.assert_not_called()
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock
+import pytest
+from src.utils.cassette import (
+    CassetteMismatchError,
+    CassetteResponse,
+    RecordingTransport,
+    ReplayTransport,
+)
+from src.utils.credentials import setCredentialPool
+from src.utils.queryRunner import runGraphqlQuery
+from src.utils.transport import setTransport
+
+
+def make_response(status_code, text, headers=None):
+    return CassetteResponse(status_code=status_code, headers=headers or {}, text=text)
+
+
+def payload(page):
+    return {"query": "query Items { items }", "variables": {"page": page}}
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    inner = MagicMock()
+    inner.post.side_effect = [
+        make_response(502, "Bad Gateway"),
+        make_response(200, '{"data": {"items": [1]}}', {"X-RateLimit-Remaining": "4999"}),
+        make_response(200, '{"data": {"items": [2]}}'),
+    ]
+    path = str(tmp_path / "run.jsonl.gz")
+    recorder = RecordingTransport(inner, path=path)
+    recorder.post(payload=payload(1), headers={"Authorization": "bearer secret"})
+    recorder.post(payload=payload(1), headers={"Authorization": "bearer secret"})
+    recorder.post(payload=payload(2), headers={"Authorization": "bearer secret"})
+    return path
+
+
+def test_cassette_never_stores_the_token(cassette_path):
+    import gzip
+
+    with gzip.open(cassette_path, mode="rt") as cassette:
+        assert "secret" not in cassette.read()
+
+
+def test_replay_serves_recorded_responses_in_order(cassette_path):
+    replay = ReplayTransport(path=cassette_path)
+    # Requests may arrive in a different order than they were recorded
+    second = replay.post(payload=payload(2), headers={})
+    first = replay.post(payload=payload(1), headers={})
+    retried = replay.post(payload=payload(1), headers={})
+    assert second.json() == {"data": {"items": [2]}}
+    assert first.status_code == 502
+    assert retried.json() == {"data": {"items": [1]}}
+    assert retried.headers["x-ratelimit-remaining"] == "4999"
+    with pytest.raises(CassetteMismatchError):
+        replay.post(payload=payload(1), headers={})
+
+
+def test_run_is_replayed_without_a_token(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.jsonl.gz")
+    inner = MagicMock()
+    inner.post.return_value = make_response(200, '{"data": {"viewer": {"login": "me"}}}')
+    monkeypatch.setenv("GITHUB_API_TOKEN", "token")
+    previousPool = setCredentialPool(None)
+    previous = setTransport(RecordingTransport(inner, path=path))
+    try:
+        recorded = runGraphqlQuery(query="query Viewer { viewer { login } }")
+        monkeypatch.delenv("GITHUB_API_TOKEN")
+        monkeypatch.delenv("GITHUB_API_TOKENS", raising=False)
+        monkeypatch.setenv("GITHUB_API_CASSETTE", path)
+        monkeypatch.setenv("GITHUB_API_CASSETTE_MODE", "replay")
+        setTransport(None)
+        assert runGraphqlQuery(query="query Viewer { viewer { login } }") == recorded
+    finally:
+        setTransport(previous)
+        setCredentialPool(previousPool)
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from src.utils.changeProbe import (
+    RunState,
+    parseTeamActivityResponse,
+    probeTeamActivity,
+    sprintMarkers,
+)
+from src.utils.models import MilestoneConfig, Project
+
+
+def test_run_state_reuses_outputs_only_for_the_same_inputs(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    state = RunState.forTeam(org="org", team="Team 1")
+    assert state is not None
+    fingerprint = {"activity": {"projectUpdatedAt": "2024-01-01T00:00:00Z"}, "sprints": {"M1": 1}}
+    assert not state.matches(fingerprint)
+
+    (tmp_path / "M1-Team 1-org.md").write_text("report")
+    state.record(fingerprint, ["M1-Team 1-org.md", "missing.html"])
+    (tmp_path / "M1-Team 1-org.md").unlink()
+
+    assert state.matches(fingerprint)
+    assert not state.matches({**fingerprint, "sprints": {"M1": 2}})
+    assert state.restoreOutputs() == ["M1-Team 1-org.md"]
+    assert (tmp_path / "M1-Team 1-org.md").read_text() == "report"
+
+
+def test_sprint_markers_move_when_a_sprint_starts():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    milestones = {"M1": MilestoneConfig(startDate=start, endDate=start + timedelta(days=20))}
+    def marker(days):
+        return sprintMarkers(milestones, sprints=2, now=start + timedelta(days=days))["M1"]
+
+    assert [marker(-1), marker(1), marker(9), marker(11), marker(21)] == [0, 1, 1, 2, 3]
+
+
+def issueNode(number: int, *, reactions: int = 0, commentReactions: int = 0) -> dict:
+    return {
+        "url": f"https://github.com/org/repo/issues/{number}",
+        "updatedAt": f"2024-02-0{number}T00:00:00Z",
+        "reactions": {"totalCount": reactions},
+        "comments": {
+            "totalCount": 1,
+            "nodes": [{"reactions": {"totalCount": commentReactions}}],
+        },
+    }
+
+
+def probeResponse(*, repositories: list[dict], issues: list[dict]) -> dict:
+    return {
+        "organization": {
+            "projectV2": {"updatedAt": "2024-02-01T00:00:00Z", "items": {"totalCount": 3}},
+            "teams": {"nodes": [{"repositories": {"nodes": repositories}}]},
+        },
+        "search": {
+            "issueCount": len(issues),
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "nodes": issues,
+        },
+    }
+
+
+def test_probe_response_without_discussions():
+    response = probeResponse(repositories=[], issues=[issueNode(2)])
+    activity = parseTeamActivityResponse(response)
+    del activity["issueReactions"]
+    assert activity == {
+        "projectUpdatedAt": "2024-02-01T00:00:00Z",
+        "projectItems": 3,
+        "issues": 1,
+        "latestIssueUpdatedAt": "2024-02-02T00:00:00Z",
+        "discussions": 0,
+        "latestDiscussionUpdatedAt": None,
+    }
+
+
+def test_probe_moves_when_a_reaction_changes():
+    def activity(**counts) -> dict:
+        return parseTeamActivityResponse(
+            probeResponse(repositories=[], issues=[issueNode(1), issueNode(2, **counts)])
+        )
+
+    unchanged = activity()
+    assert activity() == unchanged
+    assert activity(reactions=1) != unchanged
+    assert activity(commentReactions=1) != unchanged
+
+
+def test_probe_reads_the_discussions_of_every_team_repository():
+    def discussions(totalCount: int, updatedAt: str | None) -> dict:
+        return {
+            "discussions": {
+                "totalCount": totalCount,
+                "nodes": [{"updatedAt": updatedAt}] if updatedAt else [],
+            }
+        }
+
+    response = probeResponse(
+        repositories=[
+            discussions(2, "2024-02-01T00:00:00Z"),
+            discussions(0, None),
+            discussions(1, "2024-02-05T00:00:00Z"),
+        ],
+        issues=[],
+    )
+    activity = parseTeamActivityResponse(response)
+    assert activity["discussions"] == 3
+    assert activity["latestDiscussionUpdatedAt"] == "2024-02-05T00:00:00Z"
+
+
+@patch("src.utils.changeProbe.runGraphqlQuery")
+@patch("src.utils.changeProbe.getTeamRepositories")
+@patch("src.utils.changeProbe.getProject")
+def test_probe_reads_every_page_of_the_issue_search(
+    mock_getProject, mock_getTeamRepositories, mock_runGraphqlQuery
+):
+    mock_getProject.return_value = Project(name="Team 1", number=1, url="", public=False)
+    mock_getTeamRepositories.return_value = ["org/repo", "org/docs"]
+    first = probeResponse(repositories=[], issues=[issueNode(1)])
+    first["search"].update(issueCount=2, pageInfo={"hasNextPage": True, "endCursor": "c1"})
+    mock_runGraphqlQuery.side_effect = [
+        first,
+        {
+            "search": {
+                "issueCount": 2,
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [issueNode(2, reactions=1)],
+            }
+        },
+    ]
+    activity = probeTeamActivity(org="org", team="Team 1")
+    assert mock_runGraphqlQuery.call_args.kwargs["variables"]["issuesCursor"] == "c1"
+    assert activity["latestIssueUpdatedAt"] == "2024-02-02T00:00:00Z"
+    assert activity["issueReactions"] == parseTeamActivityResponse(
+        probeResponse(repositories=[], issues=[issueNode(1), issueNode(2, reactions=1)])
+    )["issueReactions"]
+
+
+@patch("src.utils.changeProbe.runGraphqlQuery")
+@patch("src.utils.changeProbe.getTeamRepositories")
+@patch("src.utils.changeProbe.getProject")
+def test_team_without_repositories_isnt_probed_with_an_issue_search(
+    mock_getProject, mock_getTeamRepositories, mock_runGraphqlQuery
+):
+    mock_getProject.return_value = Project(name="Team 1", number=1, url="", public=False)
+    mock_getTeamRepositories.return_value = []
+    mock_runGraphqlQuery.return_value = {
+        "organization": {
+            "projectV2": {"updatedAt": "2024-02-01T00:00:00Z", "items": {"totalCount": 0}},
+            "teams": {"nodes": []},
+        }
+    }
+    activity = probeTeamActivity(org="org", team="Team 1")
+    call = mock_runGraphqlQuery.call_args.kwargs
+    assert "search(" not in call["query"]
+    assert "issues" not in call["variables"]
+    assert activity["issues"] == 0
@@ -0,0 +1,65 @@
+import pytest
+from src.utils.credentials import CredentialPool, getCredentialPool, setCredentialPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_pool(clock: FakeClock, tokens: list[str]) -> CredentialPool:
+    return CredentialPool(tokens, clock=clock, sleep=clock.sleep)
+
+
+def test_token_with_most_headroom_is_used():
+    clock = FakeClock()
+    pool = make_pool(clock, ["a", "b", "c"])
+    for credential, remaining in zip(pool.credentials, [300, 4000, 1200]):
+        credential.scheduler.recordHeaders(
+            {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(clock.now + 600)}
+        )
+    assert pool.acquire(operation="Q").token == "b"
+
+
+def test_parked_token_is_skipped_until_reset():
+    clock = FakeClock()
+    pool = make_pool(clock, ["a", "b"])
+    pool.credentials[0].scheduler.park(120)
+    assert [pool.acquire(operation="Q").token for _ in range(3)] == ["b", "b", "b"]
+    clock.now += 121
+    pool.credentials[1].scheduler.recordHeaders({"X-RateLimit-Remaining": "10"})
+    assert pool.acquire(operation="Q").token == "a"
+
+
+def test_pool_waits_when_every_token_is_parked():
+    clock = FakeClock()
+    pool = make_pool(clock, ["a", "b"])
+    pool.credentials[0].scheduler.park(300)
+    pool.credentials[1].scheduler.park(90)
+    assert pool.acquire(operation="Q").token == "b"
+    assert clock.sleeps == [90]
+
+
+def test_pool_is_built_from_the_environment(monkeypatch):
+    monkeypatch.setenv("GITHUB_API_TOKEN", "single")
+    monkeypatch.setenv("GITHUB_API_TOKENS", "one, two,,three")
+    previous = setCredentialPool(None)
+    try:
+        assert getCredentialPool().tokens == ["one", "two", "three"]
+        monkeypatch.delenv("GITHUB_API_TOKENS")
+        assert getCredentialPool().tokens == ["single"]
+    finally:
+        setCredentialPool(previous)
+
+
+def test_empty_pool_is_rejected():
+    with pytest.raises(ValueError):
+        CredentialPool([])
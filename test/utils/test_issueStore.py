@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+from src.utils.issueStore import IssueStore
+from src.utils.models import Issue, IssueComment, Reaction, ReactionKind, TimelineEvent
+
+start = datetime(2024, 2, 1, 12, tzinfo=timezone.utc)
+
+
+def makeIssue(number: int, **overrides) -> Issue:
+    fields = dict(
+        url=f"https://github.com/org/repo/issues/{number}",
+        number=number,
+        title=f"Task {number}",
+        author="dev1",
+        createdAt=start,
+        closedAt=start + timedelta(days=number),
+        closed=True,
+        closedBy="manager",
+        milestone="Milestone #1",
+        assignees=["dev1"],
+        labels=[],
+        urgency=3,
+        difficulty=2,
+        modifier=None,
+        isLectureTopicTask=False,
+    )
+    fields.update(overrides)
+    return Issue(**fields)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_issues_come_back_exactly_as_stored(tmp_path):
+    store = IssueStore(str(tmp_path / "issues.sqlite3"), maxAge=60)
+    issue = makeIssue(
+        1,
+        assignees=["dev1", "dev2"],
+        labels=["bug", "frontend"],
+        reactions=[Reaction(user_login="dev3", kind=ReactionKind.HOORAY)],
+        comments=[
+            IssueComment(author_login="dev2"),
+            IssueComment(
+                author_login="dev3",
+                reactions=[Reaction(user_login="dev1", kind=ReactionKind.HOORAY)],
+            ),
+        ],
+        timeline=[
+            TimelineEvent(
+                event_type="assigned", actor="manager", created_at=start, assignee="dev1"
+            ),
+            TimelineEvent(
+                event_type="cross_referenced",
+                actor="dev1",
+                created_at=start + timedelta(hours=3),
+                pr_number=7,
+                pr_url="https://github.com/org/repo/pull/7",
+                pr_merged=True,
+            ),
+        ],
+        modifier=-1,
+    )
+    store.replaceIssues("org/team", [issue, makeIssue(2, closedAt=None, closed=False)])
+    assert store.issues("org/team") == [issue, makeIssue(2, closedAt=None, closed=False)]
+
+
+def test_queries_only_return_matching_issues(tmp_path):
+    store = IssueStore(str(tmp_path / "issues.sqlite3"), maxAge=60)
+    store.replaceIssues(
+        "org/team",
+        [
+            makeIssue(1),
+            makeIssue(2, milestone="Milestone #2", assignees=["dev2"]),
+            makeIssue(3, milestone=None),
+            makeIssue(4, isLectureTopicTask=True, assignees=["dev2"]),
+        ],
+    )
+    store.replaceIssues("org/other-team", [makeIssue(5)])
+
+    def numbers(**filters) -> list[int]:
+        return [issue.number for issue in store.issues("org/team", **filters)]
+
+    assert numbers(milestone="Milestone #1") == [1, 4]
+    assert numbers(milestone="Milestone #1", includeWithoutMilestone=True) == [1, 3, 4]
+    assert numbers(assignee="dev2") == [2, 4]
+    assert numbers(closedAfter=start + timedelta(days=2)) == [2, 3, 4]
+    assert numbers(closedBefore=start + timedelta(days=2)) == [1]
+    assert numbers(lectureTopicTasksOnly=True) == [4]
+
+
+def test_milestone_queries_use_the_index(tmp_path):
+    store = IssueStore(str(tmp_path / "issues.sqlite3"), maxAge=60)
+    with store._connect() as connection:
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM issues WHERE team = ? AND milestone = ?",
+            ("org/team", "Milestone #1"),
+        ).fetchall()
+    assert "issues_by_milestone" in " ".join(row["detail"] for row in plan)
+
+
+def test_stored_issues_expire(tmp_path):
+    clock = FakeClock()
+    store = IssueStore(str(tmp_path / "issues.sqlite3"), maxAge=60, clock=clock)
+    assert not store.isFresh("org/team")
+    store.replaceIssues("org/team", [makeIssue(1)])
+    assert store.isFresh("org/team")
+    clock.now += 61
+    assert not store.isFresh("org/team")
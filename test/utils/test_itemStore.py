@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from src.utils.itemStore import ProjectItemStore, itemVersion
+
+
+def item(itemId: str, updatedAt: str, title: str = "Task") -> dict:
+    return {
+        "id": itemId,
+        "updatedAt": updatedAt,
+        "content": {"title": title, "updatedAt": updatedAt},
+    }
+
+
+def test_merge_keeps_unchanged_items_and_replaces_changed_ones(tmp_path):
+    store = ProjectItemStore(str(tmp_path / "store.json"))
+    assert store.isEmpty
+    store.merge(
+        listedIds=["a", "b"],
+        changedItems=[item("a", "2024-01-01"), item("b", "2024-01-01")],
+        syncedAt="2024-01-02",
+    )
+    store.merge(
+        listedIds=["a", "b"],
+        changedItems=[item("b", "2024-01-03", title="Renamed")],
+        syncedAt="2024-01-04",
+    )
+    assert [i["content"]["title"] for i in store.items()] == ["Task", "Renamed"]
+    assert store.versions()["b"] == itemVersion(item("b", "2024-01-03"))
+    assert store.syncedAt == "2024-01-04"
+
+
+def test_removed_items_become_tombstones_until_they_reappear(tmp_path):
+    store = ProjectItemStore(str(tmp_path / "store.json"))
+    store.merge(
+        listedIds=["a", "b"],
+        changedItems=[item("a", "2024-01-01"), item("b", "2024-01-01")],
+        syncedAt="2024-01-02",
+    )
+    assert store.merge(listedIds=["a"], changedItems=[], syncedAt="2024-01-03") == 1
+    assert [i["id"] for i in store.items()] == ["a"]
+    assert store.tombstones["b"]["removedAt"] == "2024-01-03"
+
+    store.merge(listedIds=["a", "b"], changedItems=[item("b", "2024-01-05")])
+    assert [i["id"] for i in store.items()] == ["a", "b"]
+    assert store.tombstones == {}
+
+
+def test_reactions_are_part_of_the_version():
+    before = item("a", "2024-01-01")
+    before["content"]["reactions"] = {"totalCount": 0, "nodes": []}
+    after = item("a", "2024-01-01")
+    # A 🎉 doesn't move the issue's updatedAt
+    after["content"]["reactions"] = {"totalCount": 1, "nodes": [{"user": {"login": "m"}}]}
+    assert itemVersion(before) != itemVersion(after)
+
+
+def test_old_items_are_refetched_and_old_tombstones_dropped(tmp_path):
+    store = ProjectItemStore(str(tmp_path / "store.json"))
+    store.merge(
+        listedIds=["a", "b"],
+        changedItems=[item("a", "2024-01-01"), item("b", "2024-01-01")],
+        syncedAt="2024-01-01T00:00:00+00:00",
+    )
+    store.merge(
+        listedIds=["a"],
+        changedItems=[item("a", "2024-01-01")],
+        syncedAt="2024-01-01T12:00:00+00:00",
+    )
+    assert store.staleIds(now=datetime(2024, 1, 2, 6, tzinfo=timezone.utc)) == set()
+    assert store.staleIds(now=datetime(2024, 1, 3, tzinfo=timezone.utc)) == {"a"}
+
+    store.merge(listedIds=["a"], changedItems=[], syncedAt="2024-01-20T00:00:00+00:00")
+    assert list(store.tombstones) == ["b"]
+    store.merge(listedIds=["a"], changedItems=[], syncedAt="2024-02-15T00:00:00+00:00")
+    assert store.tombstones == {}
+
+
+def test_store_survives_a_reload(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    store = ProjectItemStore.forProject(name="org-Team 1", projectNumber=1, query="q")
+    store.merge(listedIds=["a"], changedItems=[item("a", "2024-01-01")])
+    store.save()
+
+    reloaded = ProjectItemStore.forProject(name="org-Team 1", projectNumber=1, query="q")
+    assert reloaded.items() == store.items()
+    assert reloaded.syncedAt == store.syncedAt
+    # A different item query can't reuse items fetched with the old one
+    assert ProjectItemStore.forProject(
+        name="org-Team 1", projectNumber=1, query="other"
+    ).isEmpty
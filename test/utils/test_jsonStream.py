@@ -0,0 +1,72 @@
+import json
+import random
+from src.utils.jsonStream import JsonArrayStreamer, deepMerge, streamJsonArray
+
+document = {
+    "data": {
+        "organization": {
+            "projectV2": {
+                "title": 'Team "[1]" {a}',
+                "items": {
+                    "nodes": [
+                        {"id": "1", "content": {"title": "a ] b", "labels": ["x", "y"]}},
+                        None,
+                        1500.25,
+                        "text with \\\" quotes",
+                        [1, [2, 3]],
+                        {"id": "6", "fieldValues": {"nodes": []}},
+                    ],
+                    "pageInfo": {"hasNextPage": True, "endCursor": "abc"},
+                },
+            }
+        },
+        "rateLimit": {"cost": 1, "remaining": 4999},
+    }
+}
+path = ("data", "organization", "projectV2", "items", "nodes")
+
+
+def chunked(text: str, sizes: list[int]):
+    position = 0
+    for size in sizes:
+        yield text[position : position + size]
+        position += size
+    yield text[position:]
+
+
+def test_elements_survive_any_chunk_split():
+    text = json.dumps(document)
+    expected = document["data"]["organization"]["projectV2"]["items"]["nodes"]
+    generator = random.Random(3)
+    for _ in range(200):
+        sizes = [generator.randint(1, 12) for _ in range(len(text) // 4)]
+        into: dict = {}
+        assert list(streamJsonArray(chunked(text, sizes), path=path, into=into)) == expected
+        rest = into["data"]["organization"]["projectV2"]["items"]
+        assert rest["nodes"] == []
+        assert rest["pageInfo"] == {"hasNextPage": True, "endCursor": "abc"}
+        assert into["data"]["rateLimit"]["remaining"] == 4999
+
+
+def test_elements_are_returned_as_soon_as_they_arrive():
+    streamer = JsonArrayStreamer(("items",))
+    assert streamer.feed('{"items": [{"id": 1}, {"id"') == [{"id": 1}]
+    assert streamer.feed(": 2}, 1") == [{"id": 2}]
+    assert streamer.feed("5]") == [15]
+    streamer.feed(', "done": true}')
+    assert streamer.finish() == {"items": [], "done": True}
+
+
+def test_a_missing_array_leaves_the_document_intact():
+    into: dict = {}
+    text = json.dumps({"data": {"organization": {"projectV2": None}}})
+    assert list(streamJsonArray(iter([text]), path=path, into=into)) == []
+    assert into == {"data": {"organization": {"projectV2": None}}}
+
+
+def test_deep_merge_keeps_existing_nested_keys():
+    target = {"a": {"b": 1, "c": {"d": 2}}}
+    assert deepMerge(target, {"a": {"c": {"e": 3}}, "f": 4}) == {
+        "a": {"b": 1, "c": {"d": 2, "e": 3}},
+        "f": 4,
+    }
@@ -0,0 +1,249 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from src.getMilestones import getMilestones, getMilestonesBatch
+from src.getProject import getProject, getProjectsBatch
+from src.utils.orgMetadata import OrgDirectory, OrgMetadataCache, setOrgMetadataCache
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    cache = OrgMetadataCache()
+    previous = setOrgMetadataCache(cache)
+    yield cache
+    setOrgMetadataCache(previous)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def new_run(path, clock):
+    """Starts a run scope backed by the directory at path, like a fresh process would."""
+    setOrgMetadataCache(OrgMetadataCache(directory=OrgDirectory(path, clock=clock)))
+
+
+def projects_page(*names):
+    return {
+        "organization": {
+            "projectsV2": {
+                "nodes": [
+                    {"title": name, "number": index, "public": False, "url": f"url/{index}"}
+                    for index, name in enumerate(names, start=1)
+                ],
+                "pageInfo": {"endCursor": None, "hasNextPage": False},
+            }
+        }
+    }
+
+
+def test_entries_are_fetched_once_and_handed_out_as_copies(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ["dev1"]
+
+    members = cache.getOrFetch("members", organization="org", team="t", fetch=fetch)
+    members.append("intruder")
+    assert cache.getOrFetch("members", organization="org", team="t", fetch=fetch) == ["dev1"]
+    assert len(calls) == 1
+
+
+def test_concurrent_coroutines_share_one_lookup(cache):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["Milestone #1"]
+
+    async def lookUpTogether():
+        return await asyncio.gather(
+            *(
+                cache.getOrFetchAsync(
+                    "milestones", organization="org", team="t", fetch=fetch
+                )
+                for _ in range(5)
+            )
+        )
+
+    assert asyncio.run(lookUpTogether()) == [["Milestone #1"]] * 5
+    assert len(calls) == 1
+
+
+def test_failed_lookups_are_not_stored(cache):
+    def fail():
+        raise ConnectionError("502 Bad Gateway")
+
+    with pytest.raises(ConnectionError):
+        cache.getOrFetch("members", organization="org", team="t", fetch=fail)
+    assert not cache.has("members", organization="org", team="t")
+
+
+@patch("src.getProject.runGraphqlQuery")
+def test_projects_are_looked_up_once_per_run(mock_runGraphqlQuery):
+    mock_runGraphqlQuery.return_value = projects_page("Team 1")
+    assert getProject(organization="org", project_name="Team 1").number == 1
+    assert getProjectsBatch(organization="org", project_names=["Team 1"])["Team 1"].number == 1
+    assert getProject(organization="org", project_name="Team 1").number == 1
+    assert mock_runGraphqlQuery.call_count == 1
+
+    # A new run scope looks it up again
+    setOrgMetadataCache(None)
+    getProject(organization="org", project_name="Team 1")
+    assert mock_runGraphqlQuery.call_count == 2
+
+
+@patch("src.getMilestones.runGraphqlQuery")
+def test_batched_milestones_fill_the_cache(mock_runGraphqlQuery):
+    def repositories(title):
+        return {
+            "teams": {
+                "nodes": [
+                    {
+                        "repositories": {
+                            "nodes": [
+                                {
+                                    "milestones": {
+                                        "nodes": [
+                                            {"url": "u", "title": title, "dueOn": "2024-03-01T00:00:00Z"}
+                                        ]
+                                    }
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        }
+
+    mock_runGraphqlQuery.return_value = {
+        "lookup0": repositories("Milestone #1"),
+        "lookup1": repositories("Milestone #2"),
+    }
+    batch = getMilestonesBatch(organization="org", teams=["a", "b"])
+    assert [milestone.title for milestone in batch["b"]] == ["Milestone #2"]
+    assert [milestone.title for milestone in getMilestones(organization="org", team="a")] == [
+        "Milestone #1"
+    ]
+    assert mock_runGraphqlQuery.call_count == 1
+
+
+@patch("src.getMilestones.runGraphqlQuery")
+def test_batched_milestones_leave_out_teams_that_dont_exist(mock_runGraphqlQuery):
+    def repositories(*titles):
+        milestones = [{"url": "u", "title": title, "dueOn": None} for title in titles]
+        return {"repositories": {"nodes": [{"milestones": {"nodes": milestones}}]}}
+
+    mock_runGraphqlQuery.side_effect = [
+        {
+            "lookup0": {"teams": {"nodes": [repositories()]}},
+            "lookup1": {"teams": {"nodes": []}},
+            "lookup2": {"teams": {"nodes": [repositories()]}},
+        },
+        # The misspelled team is looked up on its own, and still isn't found
+        {"organization": {"teams": {"nodes": []}}},
+    ]
+    batch = getMilestonesBatch(organization="org", teams=["a", "typo", "c"])
+    assert list(batch) == ["a", "c"]
+
+
+@patch("src.getProject.runGraphqlQuery")
+def test_batched_projects_leave_out_names_that_dont_exist(mock_runGraphqlQuery):
+    def page(*names):
+        return projects_page(*names)["organization"]
+
+    mock_runGraphqlQuery.side_effect = [
+        {"lookup0": page("a"), "lookup1": page(), "lookup2": page("c")},
+        projects_page(),
+        projects_page(),
+    ]
+    batch = getProjectsBatch(organization="org", project_names=["a", "typo", "c"])
+    assert list(batch) == ["a", "c"]
+    with pytest.raises(ValueError):
+        getProject(organization="org", project_name="typo")
+
+
+@patch("src.getProject.runGraphqlQuery")
+def test_directory_keeps_projects_between_runs(mock_runGraphqlQuery, tmp_path):
+    path = str(tmp_path / "directory.json")
+    clock = FakeClock()
+    mock_runGraphqlQuery.return_value = projects_page("Team 1")
+    new_run(path, clock)
+    assert getProject(organization="org", project_name="Team 1").number == 1
+
+    new_run(path, clock)
+    assert getProjectsBatch(organization="org", project_names=["Team 1"])["Team 1"].number == 1
+    assert mock_runGraphqlQuery.call_count == 1
+
+    # A week later the project is looked up again
+    clock.now += 8 * 24 * 60 * 60
+    new_run(path, clock)
+    getProject(organization="org", project_name="Team 1")
+    assert mock_runGraphqlQuery.call_count == 2
+
+    # And dropping a team's entries makes the next run look it up again
+    assert OrgDirectory(path, clock=clock).invalidate(organization="org", team="Team 1") == 1
+    new_run(path, clock)
+    getProject(organization="org", project_name="Team 1")
+    assert mock_runGraphqlQuery.call_count == 3
+
+
+@patch("src.getProject.runGraphqlQuery")
+def test_directory_remembers_missing_projects_briefly(mock_runGraphqlQuery, tmp_path):
+    path = str(tmp_path / "directory.json")
+    clock = FakeClock()
+    mock_runGraphqlQuery.return_value = projects_page("Team 1")
+    for _ in range(2):
+        new_run(path, clock)
+        with pytest.raises(ValueError, match="Team 2"):
+            getProject(organization="org", project_name="Team 2")
+    assert mock_runGraphqlQuery.call_count == 1
+
+    clock.now += 11 * 60
+    new_run(path, clock)
+    with pytest.raises(ValueError):
+        getProject(organization="org", project_name="Team 2")
+    assert mock_runGraphqlQuery.call_count == 2
+
+
+def test_milestones_are_not_kept_between_runs(tmp_path):
+    directory = OrgDirectory(str(tmp_path / "directory.json"))
+    directory.store("milestones", ["Milestone #1"], organization="org", team="t")
+    directory.store("members", ["dev1"], organization="org", team="t")
+    reopened = OrgDirectory(str(tmp_path / "directory.json"))
+    assert reopened.lookup("members", organization="org", team="t") == ["dev1"]
+    assert not OrgMetadataCache(directory=reopened).missing(
+        "members", organization="org", teams=["t"]
+    )
+    assert OrgMetadataCache(directory=reopened).missing(
+        "milestones", organization="org", teams=["t"]
+    ) == ["t"]
+
+
+def test_directories_sharing_a_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "directory.json")
+    first = OrgDirectory(path)
+    second = OrgDirectory(path)
+    first.store("members", ["dev1"], organization="org", team="Team 1")
+    second.store("members", ["dev2"], organization="org", team="Team 2")
+    first.store("repositories", ["org/repo1"], organization="org", team="Team 1")
+
+    reopened = OrgDirectory(path)
+    assert reopened.lookup("members", organization="org", team="Team 1") == ["dev1"]
+    assert reopened.lookup("members", organization="org", team="Team 2") == ["dev2"]
+    assert reopened.lookup("repositories", organization="org", team="Team 1") == [
+        "org/repo1"
+    ]
+
+    assert second.invalidate(organization="org", team="Team 1") == 2
+    first.store("members", ["dev3"], organization="org", team="Team 3")
+    # The first directory's write doesn't bring back what the second one dropped
+    assert OrgMetadataCache(directory=OrgDirectory(path)).missing(
+        "members", organization="org", teams=["Team 1", "Team 2", "Team 3"]
+    ) == ["Team 1"]
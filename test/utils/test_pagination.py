@@ -0,0 +1,229 @@
+import asyncio
+import threading
+import pytest
+from src.utils.checkpoints import PageCheckpoint
+from src.utils.pageSizes import AdaptivePageSize
+from src.utils.pagination import (
+    paginateConnection,
+    paginateConnectionAsync,
+    prefetchNodes,
+)
+from src.utils.queryRunner import TransientQueryError
+
+
+def make_page(nodes, cursor, has_next):
+    return {
+        "items": {
+            "nodes": nodes,
+            "pageInfo": {"endCursor": cursor, "hasNextPage": has_next},
+        }
+    }
+
+
+pages = {
+    None: make_page([{"id": 1}, {"id": 2}], "c1", True),
+    "c1": make_page([{"id": 3}], "c2", True),
+    "c2": make_page([{"id": 4}], "c3", False),
+}
+
+
+class FakeApi:
+    def __init__(self, fail_on: str | None = "never"):
+        self.fail_on = fail_on
+        self.cursors: list[str | None] = []
+
+    def __call__(self, *, query, variables):
+        cursor = variables.get("after")
+        self.cursors.append(cursor)
+        if cursor == self.fail_on:
+            raise ConnectionError("502 Bad Gateway")
+        return pages[cursor]
+
+
+def paginate(api, checkpoint=None):
+    return paginateConnection(
+        runQuery=api,
+        query="query",
+        variables={"owner": "org"},
+        cursorVariable="after",
+        getConnection=lambda response: response["items"],
+        checkpoint=checkpoint,
+    )
+
+
+def test_all_pages_are_yielded_in_order():
+    api = FakeApi()
+    assert [node["id"] for node in paginate(api)] == [1, 2, 3, 4]
+    assert api.cursors == [None, "c1", "c2"]
+
+
+def test_checkpoint_resumes_from_last_good_cursor(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    checkpoint = PageCheckpoint.forQuery(name="team", query="query", variables={})
+    assert checkpoint is not None
+
+    failing = FakeApi(fail_on="c2")
+    seen = []
+    with pytest.raises(ConnectionError):
+        for node in paginate(failing, checkpoint):
+            seen.append(node["id"])
+    assert seen == [1, 2, 3]
+
+    resumed = FakeApi()
+    assert [node["id"] for node in paginate(resumed, checkpoint)] == [1, 2, 3, 4]
+    # Only the page that failed is requested again
+    assert resumed.cursors == ["c2"]
+
+
+def test_checkpoint_is_cleared_after_completion(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    checkpoint = PageCheckpoint.forQuery(name="team", query="query", variables={})
+    assert checkpoint is not None
+    list(paginate(FakeApi(), checkpoint))
+    assert list(checkpoint.pages()) == []
+
+    api = FakeApi()
+    list(paginate(api, checkpoint))
+    assert api.cursors == [None, "c1", "c2"]
+
+
+def test_checkpoints_are_disabled_without_cache_directory(monkeypatch):
+    monkeypatch.delenv("INSO_CACHE_DIR", raising=False)
+    assert PageCheckpoint.forQuery(name="team", query="query", variables={}) is None
+
+
+class SizedApi:
+    """Serves ten numbered nodes and fails pages larger than `limit`, optionally midway."""
+
+    def __init__(self, limit: int, *, failAfter: int | None = None):
+        self.limit = limit
+        self.failAfter = failAfter
+        self.requests: list[tuple[str | None, int, int | None]] = []
+
+    def __call__(self, *, query, variables, maxTransientRetries=None):
+        cursor, size = variables.get("after"), variables["first"]
+        self.requests.append((cursor, size, maxTransientRetries))
+        start = int(cursor or 0)
+        end = min(10, start + size)
+        if size > self.limit and self.failAfter is None:
+            raise TransientQueryError("502 Bad Gateway")
+        info = {"endCursor": str(end), "hasNextPage": end < 10}
+        return {"items": {"nodes": self.stream(start, end, size), "pageInfo": info}}
+
+    def stream(self, start, end, size):
+        for index in range(start, end):
+            if size > self.limit and index - start == self.failAfter:
+                raise TransientQueryError("Streamed page failed after some nodes")
+            yield {"id": index}
+
+
+def paginate_adaptively(api, pageSize):
+    return paginateConnection(
+        runQuery=api,
+        query="query",
+        variables={},
+        cursorVariable="after",
+        getConnection=lambda response: response["items"],
+        pageSize=pageSize,
+    )
+
+
+def test_failed_pages_are_split_and_grow_back():
+    api = SizedApi(limit=3)
+    pageSize = AdaptivePageSize(variable="first", initial=8, growthStreak=2)
+    assert [node["id"] for node in paginate_adaptively(api, pageSize)] == list(range(10))
+    # Two successful pages in a row double the size again, until it fails again
+    assert api.requests == [
+        (None, 8, 0),
+        (None, 4, 0),
+        (None, 2, 0),
+        ("2", 2, 0),
+        ("4", 4, 0),
+        ("4", 2, 0),
+        ("6", 2, 0),
+        ("8", 4, 0),
+        ("8", 2, 0),
+    ]
+    assert pageSize.safeSize == 2
+
+
+def test_nodes_streamed_before_a_failure_are_not_repeated():
+    api = SizedApi(limit=4, failAfter=3)
+    pageSize = AdaptivePageSize(variable="first", initial=8, growthStreak=10)
+    assert [node["id"] for node in paginate_adaptively(api, pageSize)] == list(range(10))
+    # The first three nodes were handed out before the first page failed
+    assert api.requests == [(None, 8, 0), (None, 4, 0), ("4", 4, 0), ("8", 4, 0)]
+
+
+def test_failures_at_the_smallest_size_are_raised_with_regular_retries():
+    api = SizedApi(limit=0)
+    pageSize = AdaptivePageSize(variable="first", initial=2)
+    with pytest.raises(TransientQueryError):
+        list(paginate_adaptively(api, pageSize))
+    assert api.requests == [(None, 2, 0), (None, 1, None)]
+
+
+def test_page_size_is_remembered_between_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    pageSize = AdaptivePageSize.forQuery(name="team", query="query", variable="first")
+    assert pageSize.size == 100
+    list(paginate_adaptively(SizedApi(limit=30), pageSize))
+
+    again = AdaptivePageSize.forQuery(name="team", query="query", variable="first")
+    assert again.size == 25
+
+
+def test_prefetched_nodes_keep_their_order_and_errors():
+    def nodes():
+        yield from range(5)
+        raise ConnectionError("502 Bad Gateway")
+
+    seen = []
+    with pytest.raises(ConnectionError):
+        for node in prefetchNodes(nodes(), maxBuffered=2):
+            seen.append(node)
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_prefetching_runs_ahead_and_stops_with_the_caller():
+    produced = []
+    closed = threading.Event()
+
+    def nodes():
+        try:
+            for node in range(100):
+                produced.append(node)
+                yield node
+        finally:
+            closed.set()
+
+    prefetched = prefetchNodes(nodes(), maxBuffered=3)
+    assert next(prefetched) == 0
+    prefetched.close()
+    assert closed.wait(timeout=5)
+    # One node taken, three buffered and at most one waiting for room in the buffer
+    assert len(produced) <= 5
+
+
+def test_async_pagination_requests_the_next_page_before_handing_out_the_current_one():
+    requested = []
+
+    async def runQuery(*, query, variables):
+        requested.append(variables.get("after"))
+        return pages[variables.get("after")]
+
+    async def collect():
+        seen = []
+        async for node in paginateConnectionAsync(
+            runQuery=runQuery,
+            query="query",
+            variables={},
+            cursorVariable="after",
+            getConnection=lambda response: response["items"],
+        ):
+            # Let the request for the next page start
+            await asyncio.sleep(0)
+            seen.append((node["id"], len(requested)))
+        return seen
+
+    assert asyncio.run(collect()) == [(1, 2), (2, 2), (3, 3), (4, 3)]
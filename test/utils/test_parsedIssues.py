@@ -0,0 +1,93 @@
+import copy
+import logging
+import pickle
+from unittest.mock import patch
+from src.generateTeamMetrics import parseIssueDicts
+from src.utils.issues import parseIssue
+from src.utils.models import IssueFields
+from src.utils.parsedIssues import ParsedIssueCache
+
+logger = logging.getLogger(__name__)
+
+
+def item(itemId: str, number: int, reactions: list[str] | None = None) -> dict:
+    return {
+        "id": itemId,
+        "updatedAt": "2024-01-01T00:00:00Z",
+        "content": {
+            "url": f"https://github.com/org/repo/issues/{number}",
+            "number": number,
+            "title": f"Task {number}",
+            "author": {"login": "dev1"},
+            "createdAt": "2024-01-01T00:00:00Z",
+            "closed": True,
+            "closedAt": "2024-01-02T00:00:00Z",
+            "updatedAt": "2024-01-02T00:00:00Z",
+            "milestone": {"title": "v1.0"},
+            "assignees": {"nodes": [{"login": "dev1"}]},
+            "labels": {"nodes": []},
+            "reactions": {"nodes": [{"user": {"login": login}} for login in reactions or []]},
+            "comments": {"nodes": []},
+            "timelineItems": {"nodes": [{"actor": {"login": "manager1"}}]},
+        },
+        "Urgency": {"number": 3},
+        "Difficulty": {"number": 2},
+        "Modifier": {"number": 1},
+    }
+
+
+def parseWithCache(path: str, items: list[dict]) -> tuple[list, int]:
+    """Parses items through a cache loaded from `path`, returning the parse count too."""
+    cache = ParsedIssueCache(path)
+    with patch("src.generateTeamMetrics.parseIssue", wraps=parseIssue) as parse:
+        issues = list(parseIssueDicts(items, logger=logger, parsedIssues=cache))
+    cache.save(dropUnused=True)
+    return issues, parse.call_count
+
+
+def test_only_new_and_changed_items_are_parsed_again(tmp_path):
+    path = str(tmp_path / "parsed.pickle")
+    draft = {"id": "I_3", "content": None, "Urgency": None, "Difficulty": None, "Modifier": None}
+    items = [item("I_1", 1), item("I_2", 2), draft]
+    first, parsed = parseWithCache(path, items)
+    assert parsed == 3
+    assert [issue.number for issue in first] == [1, 2]
+
+    again, parsed = parseWithCache(path, copy.deepcopy(items))
+    assert parsed == 0
+    assert again == first
+
+    # A reaction doesn't move the issue's updatedAt, but does change its score
+    changed = [item("I_1", 1), item("I_2", 2, reactions=["dev2"]), item("I_4", 4)]
+    issues, parsed = parseWithCache(path, changed)
+    assert parsed == 2
+    assert issues[1].reactions[0].user_login == "dev2"
+    assert [issue.number for issue in issues] == [1, 2, 4]
+
+
+def test_cached_issues_are_fresh_copies(tmp_path):
+    path = str(tmp_path / "parsed.pickle")
+    parseWithCache(path, [item("I_1", 1)])
+    cache = ParsedIssueCache(path)
+    (issue,) = parseIssueDicts([item("I_1", 1)], logger=logger, parsedIssues=cache)
+    # Hooks change issues in place
+    issue.milestone = "v2.0"
+    (again,) = parseIssueDicts([item("I_1", 1)], logger=logger, parsedIssues=cache)
+    assert again.milestone == "v1.0"
+
+
+def test_items_missing_from_a_full_run_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    cache = ParsedIssueCache.forTeam(org="org", team="team", issueFields=IssueFields.FULL)
+    list(parseIssueDicts([item("I_1", 1), item("I_2", 2)], logger=logger, parsedIssues=cache))
+    cache.save()
+
+    cache = ParsedIssueCache.forTeam(org="org", team="team", issueFields=IssueFields.FULL)
+    list(parseIssueDicts([item("I_2", 2)], logger=logger, parsedIssues=cache))
+    cache.save(dropUnused=True)
+    assert len(ParsedIssueCache(cache.path)) == 1
+
+    # Caches written by another version of the parser are ignored
+    with open(cache.path, mode="wb") as file:
+        pickle.dump({"format": 0, "entries": {"I_2": ("x", None)}}, file)
+    assert len(ParsedIssueCache(cache.path)) == 0
@@ -0,0 +1,113 @@
+import pytest
+from src.getMilestones import get_milestones_query
+from src.utils.queryBatcher import (
+    buildBatchedDocument,
+    runBatchedQuery,
+    splitOperation,
+)
+from src.utils.queryRunner import RequestRejectedError
+from src.utils.rateLimit import RateLimitError
+
+members_query = """
+query QueryTeamMembers($owner: String!, $team: String!) {
+  organization(login: $owner) {
+    teams(query: $team, first: 1) {
+      nodes { members { nodes { login } } }
+    }
+  }
+}
+"""
+
+
+class FakeApi:
+    """Answers batched documents by echoing each alias's variables back."""
+
+    def __init__(self, failing_teams: set[str] | None = None):
+        self.failing_teams = failing_teams or set()
+        self.documents: list[str] = []
+
+    def __call__(self, *, query, variables):
+        self.documents.append(query)
+        teams = {
+            name: value for name, value in variables.items() if name.startswith("team_")
+        }
+        if self.failing_teams & set(teams.values()):
+            raise ConnectionError("Something went wrong")
+        return {
+            f"lookup{name.removeprefix('team_')}": {"team": value}
+            for name, value in teams.items()
+        }
+
+
+def test_split_operation():
+    name, variableTypes, selection = splitOperation(members_query)
+    assert name == "QueryTeamMembers"
+    assert variableTypes == {"owner": "String!", "team": "String!"}
+    assert selection.strip().startswith("organization(login: $owner)")
+    assert selection.strip().endswith("}")
+
+
+def test_split_operation_rejects_anonymous_queries():
+    with pytest.raises(ValueError):
+        splitOperation("{ viewer { login } }")
+
+
+def test_batched_document_renames_variables_per_alias():
+    name, variableTypes, selection = splitOperation(get_milestones_query)
+    document = buildBatchedDocument(
+        name=name, variableTypes=variableTypes, selection=selection, count=2
+    )
+    assert document.startswith(f"query {name}Batch(")
+    assert "$org_0: String!" in document and "$team_1: String!" in document
+    assert "lookup0: organization(login: $org_0)" in document
+    assert "lookup1: organization(login: $org_1)" in document
+    assert document.count("{") == document.count("}")
+
+
+def test_lookups_are_chunked_by_node_budget():
+    api = FakeApi()
+    teams = [f"team{i}" for i in range(5)]
+    results = runBatchedQuery(
+        runQuery=api,
+        query=members_query,
+        lookups={team: {"owner": "org", "team": team} for team in teams},
+        nodesPerLookup=100,
+        maxNodesPerDocument=200,
+    )
+    assert len(api.documents) == 3
+    assert results == {team: {"organization": {"team": team}} for team in teams}
+
+
+def test_failing_lookup_is_isolated():
+    api = FakeApi(failing_teams={"team2"})
+    teams = [f"team{i}" for i in range(4)]
+    results = runBatchedQuery(
+        runQuery=api,
+        query=members_query,
+        lookups={team: {"owner": "org", "team": team} for team in teams},
+    )
+    assert set(results) == {"team0", "team1", "team3"}
+    assert results["team3"] == {"organization": {"team": "team3"}}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        RateLimitError("QueryTeamMembersBatch was still rate limited after 5 retries"),
+        RequestRejectedError("Query failed to run, status code 401\nBad credentials"),
+    ],
+)
+def test_rate_limits_and_rejected_requests_are_not_split(error):
+    calls = []
+
+    def runQuery(*, query, variables):
+        calls.append(query)
+        raise error
+
+    with pytest.raises(type(error)):
+        runBatchedQuery(
+            runQuery=runQuery,
+            query=members_query,
+            lookups={f"team{i}": {"owner": "org", "team": f"team{i}"} for i in range(8)},
+        )
+    assert len(calls) == 1
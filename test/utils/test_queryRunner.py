@@ -0,0 +1,217 @@
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+import requests
+from src.utils import asyncQueryRunner, queryRunner
+from src.utils.asyncQueryRunner import AsyncGraphqlClient
+from src.utils.cassette import CassetteResponse
+from src.utils.credentials import CredentialPool, setCredentialPool
+from src.utils.queryRunner import TransientQueryError, runGraphqlQuery
+from src.utils.transport import setTransport
+
+
+def make_response(status_code=200, json_body=None, headers=None, text=""):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.text = text
+    response.json.return_value = json_body
+    return response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("GITHUB_API_TOKEN", "token")
+    monkeypatch.delenv("GITHUB_API_TOKENS", raising=False)
+    clock = FakeClock()
+    pool = CredentialPool(["token"], clock=clock, sleep=clock.sleep)
+    previous = setCredentialPool(pool)
+    yield pool
+    setCredentialPool(previous)
+
+
+@pytest.fixture
+def transport(monkeypatch, pool):
+    monkeypatch.setattr(queryRunner.time, "sleep", lambda _: None)
+    fake = MagicMock()
+    previous = setTransport(fake)
+    yield fake
+    setTransport(previous)
+
+
+def test_transient_failures_are_retried(transport):
+    transport.post.side_effect = [
+        requests.ConnectionError("connection reset"),
+        make_response(status_code=502),
+        make_response(json_body={"data": {"viewer": {"login": "me"}}}),
+    ]
+    assert runGraphqlQuery(query="query { viewer { login } }") == {
+        "viewer": {"login": "me"}
+    }
+    assert transport.post.call_count == 3
+
+
+def test_transient_failures_give_up_eventually(transport):
+    transport.post.return_value = make_response(status_code=503)
+    with pytest.raises(TransientQueryError):
+        runGraphqlQuery(query="query { viewer { login } }")
+    assert transport.post.call_count == queryRunner.max_transient_retries + 1
+
+
+def test_rate_limited_responses_are_retried(transport, pool):
+    transport.post.side_effect = [
+        make_response(status_code=403, headers={"Retry-After": "1"}, text="secondary rate limit"),
+        make_response(json_body={"errors": [{"type": "RATE_LIMITED"}]}),
+        make_response(
+            json_body={
+                "data": {
+                    "rateLimit": {"cost": 2, "remaining": 10, "resetAt": None},
+                    "viewer": {"login": "me"},
+                }
+            }
+        ),
+    ]
+    assert runGraphqlQuery(query="query Viewer { viewer { login } }") == {
+        "viewer": {"login": "me"}
+    }
+    assert pool.credentials[0].scheduler.expectedCost("Viewer") == 2
+
+
+def test_rate_limited_token_is_parked_for_the_next(transport, pool, monkeypatch):
+    monkeypatch.setenv("GITHUB_API_TOKENS", "first, second")
+    clock = FakeClock()
+    setCredentialPool(CredentialPool(["first", "second"], clock=clock, sleep=clock.sleep))
+    transport.post.side_effect = [
+        make_response(status_code=403, headers={"Retry-After": "60"}, text="rate limit"),
+        make_response(json_body={"data": {"viewer": {"login": "me"}}}),
+    ]
+    runGraphqlQuery(query="query { viewer { login } }")
+    tokens = [
+        call.kwargs["headers"]["Authorization"] for call in transport.post.call_args_list
+    ]
+    assert tokens == ["bearer first", "bearer second"]
+    assert clock.now == 1_000_000.0
+
+
+def test_other_errors_are_raised_immediately(transport):
+    transport.post.return_value = make_response(status_code=401, text="Bad credentials")
+    with pytest.raises(ConnectionError):
+        runGraphqlQuery(query="query { viewer { login } }")
+    assert transport.post.call_count == 1
+
+
+def test_cached_responses_skip_the_network(transport, tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("INSO_RESPONSE_CACHE_MB", "1")
+    transport.post.return_value = make_response(
+        json_body={"data": {"viewer": {"login": "me"}}}
+    )
+    query = "query Viewer { viewer { login } }"
+    assert runGraphqlQuery(query=query) == runGraphqlQuery(query=query)
+    assert transport.post.call_count == 1
+
+
+def test_streamed_lists_are_decoded_while_downloading(transport, pool):
+    body = json.dumps(
+        {
+            "data": {
+                "rateLimit": {"cost": 3, "remaining": 41, "resetAt": None},
+                "viewer": {"items": {"nodes": [{"id": i} for i in range(5)], "total": 5}},
+            }
+        }
+    )
+    transport.post.return_value = CassetteResponse(status_code=200, headers={}, text=body)
+    data = runGraphqlQuery(
+        query="query Items { viewer { items { nodes { id } total } } }",
+        streamPath=("viewer", "items", "nodes"),
+    )
+    nodes = data["viewer"]["items"]["nodes"]
+    assert "total" not in data["viewer"]["items"]
+    assert [node["id"] for node in nodes] == list(range(5))
+    assert data["viewer"]["items"]["total"] == 5
+    assert transport.post.call_args.kwargs["stream"] is True
+    assert pool.credentials[0].scheduler.expectedCost("Items") == 3
+
+
+def test_failed_streams_fall_back_to_a_regular_request(transport):
+    nodes = [{"id": 1}, {"id": 2}]
+    transport.post.side_effect = [
+        CassetteResponse(status_code=200, headers={}, text='{"data": {"viewer": {"items": '),
+        make_response(json_body={"data": {"viewer": {"items": {"nodes": nodes}}}}),
+    ]
+    data = runGraphqlQuery(
+        query="query { viewer { items { nodes { id } } } }",
+        streamPath=("viewer", "items", "nodes"),
+    )
+    assert list(data["viewer"]["items"]["nodes"]) == nodes
+    assert transport.post.call_count == 2
+
+
+def test_github_query_timeouts_are_transient(transport):
+    timeout = make_response(
+        json_body={
+            "data": None,
+            "errors": [
+                {
+                    "message": "Something went wrong while executing your query. This may be the result of a timeout, or it could be a GitHub bug."
+                }
+            ],
+        }
+    )
+    transport.post.side_effect = [
+        timeout,
+        make_response(json_body={"data": {"viewer": {"login": "me"}}}),
+    ]
+    assert runGraphqlQuery(query="query { viewer { login } }") == {
+        "viewer": {"login": "me"}
+    }
+
+    transport.post.reset_mock(side_effect=True)
+    transport.post.return_value = timeout
+    with pytest.raises(TransientQueryError):
+        runGraphqlQuery(query="query { viewer { login } }", maxTransientRetries=0)
+    assert transport.post.call_count == 1
+
+
+def test_async_client_keeps_at_most_max_in_flight_requests_running(monkeypatch):
+    running = 0
+    mostRunning = 0
+    lock = threading.Lock()
+
+    def fakeQuery(**_):
+        nonlocal running, mostRunning
+        with lock:
+            running += 1
+            mostRunning = max(mostRunning, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return {}
+
+    monkeypatch.setattr(asyncQueryRunner, "runGraphqlQuery", fakeQuery)
+    client = AsyncGraphqlClient(maxInFlight=3)
+
+    async def runMany():
+        await asyncio.gather(
+            *(client.run(query="query { viewer { login } }") for _ in range(12))
+        )
+
+    try:
+        asyncio.run(runMany())
+    finally:
+        client.close()
+    assert mostRunning == 3
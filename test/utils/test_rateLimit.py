@@ -0,0 +1,149 @@
+from src.utils.rateLimit import (
+    RateLimitScheduler,
+    addRateLimitField,
+    getOperationName,
+    isRateLimitedError,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(clock: FakeClock, **kwargs) -> RateLimitScheduler:
+    return RateLimitScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestAddRateLimitField:
+    def test_inserted_after_variable_definitions(self):
+        query = "query Q($owner: String!) { organization(login: $owner) { name } }"
+        result = addRateLimitField(query)
+        assert result.index("rateLimit") > result.index(")")
+        assert result.index("rateLimit") < result.index("organization")
+
+    def test_query_without_variables(self):
+        result = addRateLimitField("query { viewer { login } }")
+        assert result.index("rateLimit") < result.index("viewer")
+
+    def test_existing_selection_left_untouched(self):
+        query = "query { rateLimit { cost } viewer { login } }"
+        assert addRateLimitField(query) == query
+
+
+def test_operation_name():
+    assert getOperationName("\nquery QueryProjects($a: Int) { x }") == "QueryProjects"
+    assert getOperationName("{ viewer { login } }") == "anonymous"
+
+
+def test_no_budget_information_never_waits():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    for _ in range(10):
+        scheduler.waitForBudget(operation="Q")
+    assert clock.sleeps == []
+
+
+def test_pauses_until_reset_when_budget_would_hit_reserve():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, reserve=100)
+    scheduler.recordHeaders(
+        {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "120",
+            "X-RateLimit-Reset": str(clock.now + 300),
+        }
+    )
+    scheduler.recordRateLimit(operation="Heavy", rateLimit={"cost": 50})
+    scheduler.waitForBudget(operation="Heavy")
+    assert clock.sleeps == [301]
+
+
+def test_learned_cost_is_reserved_from_budget():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, reserve=0, pacingFraction=0)
+    scheduler.recordHeaders(
+        {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": str(clock.now + 60)}
+    )
+    scheduler.recordRateLimit(operation="Page", rateLimit={"cost": 40})
+    scheduler.waitForBudget(operation="Page")
+    scheduler.waitForBudget(operation="Page")
+    assert scheduler.remaining == 20
+    assert clock.sleeps == []
+
+
+def test_requests_are_paced_when_budget_runs_low():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, reserve=0)
+    scheduler.recordHeaders(
+        {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "100",
+            "X-RateLimit-Reset": str(clock.now + 1000),
+        }
+    )
+    scheduler.waitForBudget(operation="Q")
+    scheduler.waitForBudget(operation="Q")
+    assert len(clock.sleeps) == 1
+    assert clock.sleeps[0] > 0
+
+
+def test_points_per_minute_are_capped():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, pointsPerMinute=100)
+    scheduler.recordRateLimit(operation="Page", rateLimit={"cost": 60})
+    scheduler.waitForBudget(operation="Page")
+    scheduler.waitForBudget(operation="Page")
+    assert clock.sleeps == [60]
+
+
+def test_rate_limit_body_updates_budget():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.recordRateLimit(
+        operation="Q",
+        rateLimit={"cost": 3, "remaining": 4200, "resetAt": "2024-01-01T00:00:00Z"},
+    )
+    assert scheduler.remaining == 4200
+    assert scheduler.expectedCost("Q") == 3
+    assert scheduler.resetAt is not None
+
+
+class TestRetryDelay:
+    def test_secondary_limit_uses_retry_after(self):
+        scheduler = make_scheduler(FakeClock())
+        delay = scheduler.retryDelay(
+            statusCode=403, headers={"Retry-After": "30"}, body="secondary rate limit"
+        )
+        assert delay == 30
+
+    def test_primary_limit_waits_for_reset(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        delay = scheduler.retryDelay(
+            statusCode=403,
+            headers={
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(clock.now + 120),
+            },
+            body="",
+        )
+        assert delay == 120
+
+    def test_other_errors_are_not_rate_limits(self):
+        scheduler = make_scheduler(FakeClock())
+        assert scheduler.retryDelay(statusCode=502, headers={}, body="") is None
+        assert scheduler.retryDelay(statusCode=403, headers={}, body="Forbidden") is None
+
+
+def test_rate_limited_graphql_errors():
+    assert isRateLimitedError([{"type": "RATE_LIMITED", "message": "..."}])
+    assert not isRateLimitedError([{"type": "NOT_FOUND"}])
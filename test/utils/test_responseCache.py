@@ -0,0 +1,75 @@
+import os
+from src.utils.checkpoints import queryFingerprint
+from src.utils.responseCache import ResponseCache, getResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(tmp_path, clock, **kwargs) -> ResponseCache:
+    kwargs.setdefault("maxBytes", 1024 * 1024)
+    return ResponseCache(str(tmp_path), clock=clock, **kwargs)
+
+
+def test_round_trip_and_counts(tmp_path):
+    cache = make_cache(tmp_path, FakeClock())
+    lookup = {"operation": "QueryProjects", "query": "query", "variables": {"a": 1}}
+    assert cache.get(**lookup) is None
+    cache.put(**lookup, data={"organization": {"id": 1}})
+    assert cache.get(**lookup) == {"organization": {"id": 1}}
+    assert cache.get(**lookup | {"variables": {"a": 2}}) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.summary() == "Response cache: 1 hits, 2 misses"
+
+
+def test_entries_expire_per_operation(tmp_path):
+    clock = FakeClock()
+    cache = make_cache(
+        tmp_path, clock, ttlByOperation={"QueryProjects": 3600, "QueryItems": 60}
+    )
+    for operation in ["QueryProjects", "QueryItems"]:
+        cache.put(operation=operation, query=operation, variables=None, data={"x": 1})
+    clock.now += 120
+    assert cache.get(operation="QueryProjects", query="QueryProjects", variables=None)
+    assert cache.get(operation="QueryItems", query="QueryItems", variables=None) is None
+
+
+def test_batched_operations_use_the_base_ttl(tmp_path):
+    cache = make_cache(tmp_path, FakeClock(), ttlByOperation={"QueryProjects": 0})
+    cache.put(operation="QueryProjectsBatch", query="q", variables=None, data={"x": 1})
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = make_cache(tmp_path, FakeClock(), maxBytes=10 * 1024 * 1024)
+    for index in range(4):
+        cache.put(operation="Q", query=f"q{index}", variables=None, data={"x": "x" * 400})
+    for index, lastUsed in enumerate([100, 300, 200, 400]):
+        path = cache._path(queryFingerprint(query=f"q{index}", variables=None))
+        os.utime(path, (lastUsed, lastUsed))
+    entrySize = os.path.getsize(cache._path(queryFingerprint(query="q0", variables=None)))
+    cache.maxBytes = entrySize * 3
+    cache.evict()
+    remaining = [
+        index
+        for index in range(4)
+        if cache.get(operation="Q", query=f"q{index}", variables=None) is not None
+    ]
+    assert remaining == [1, 3]
+
+
+def test_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("INSO_RESPONSE_CACHE_MB", raising=False)
+    assert getResponseCache() is None
+    monkeypatch.setenv("INSO_RESPONSE_CACHE_MB", "5")
+    monkeypatch.setenv("INSO_RESPONSE_CACHE_TTLS", "QueryProjects=5")
+    cache = getResponseCache()
+    assert cache is not None
+    assert cache.maxBytes == 5 * 1024 * 1024
+    assert cache.ttlFor("QueryProjects") == 5
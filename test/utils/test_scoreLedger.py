@@ -0,0 +1,107 @@
+from datetime import datetime
+import logging
+from unittest.mock import MagicMock, patch
+import pytz
+from src.generateTeamMetrics import getMilestoneDataFromIssues
+from src.utils.issues import calculateIssueScores
+from src.utils.models import Issue, IssueComment, Reaction, ReactionKind
+
+
+def issue(number: int, *, assignees: list[str], bonus: bool = False) -> Issue:
+    return Issue(
+        url=f"https://github.com/org/repo/issues/{number}",
+        number=number,
+        title=f"Task {number}",
+        author="dev1",
+        createdAt=datetime(2024, 1, 2, tzinfo=pytz.UTC),
+        closedAt=datetime(2024, 1, 10 + number, tzinfo=pytz.UTC),
+        closed=True,
+        closedBy="manager1",
+        milestone="v1.0",
+        assignees=assignees,
+        labels=["backend"],
+        reactions=[],
+        comments=[
+            IssueComment(
+                author_login="dev2",
+                reactions=[Reaction(user_login="manager1", kind=ReactionKind.HOORAY)]
+                if bonus
+                else [],
+            )
+        ],
+        urgency=2.0,
+        difficulty=3.0,
+        modifier=0.5,
+        isLectureTopicTask=False,
+    )
+
+
+def score(
+    issues: list[Issue], *, logger=None, ledgerScope: str | None = "org-team", **inputs
+):
+    arguments = {
+        "milestone": "v1.0",
+        "members": ["dev1", "dev2", "manager1"],
+        "managers": ["manager1"],
+        "startDate": datetime(2024, 1, 1, tzinfo=pytz.UTC),
+        "endDate": datetime(2024, 2, 1, tzinfo=pytz.UTC),
+        "sprints": 2,
+        "minTasksPerSprint": 0,
+        "useDecay": True,
+        "milestoneGrade": 100,
+        "shouldCountOpenIssues": False,
+        **inputs,
+    }
+    with patch(
+        "src.generateTeamMetrics.calculateIssueScores", wraps=calculateIssueScores
+    ) as calculate:
+        data = getMilestoneDataFromIssues(
+            issues=iter(issues),
+            logger=logger or logging.getLogger(__name__),
+            ledgerScope=ledgerScope,
+            **arguments,
+        )
+    return data, calculate.call_count
+
+
+def test_only_changed_issues_are_rescored(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    issues = [issue(1, assignees=["dev1"]), issue(2, assignees=["dev1", "dev2"])]
+    first, scored = score(issues)
+    assert scored == 2
+    again, scored = score(issues)
+    assert scored == 0
+    assert again == first
+
+    changed = [
+        issue(1, assignees=["dev1"]),
+        issue(2, assignees=["dev2"]),
+        issue(3, assignees=["dev1"]),
+    ]
+    data, scored = score(changed)
+    assert scored == 2
+    assert data == score(changed, ledgerScope=None)[0]
+
+
+def test_changed_scoring_inputs_rescore_everything(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    issues = [issue(1, assignees=["dev1"]), issue(2, assignees=["dev2"])]
+    score(issues)
+    data, scored = score(issues, useDecay=False)
+    assert scored == 2
+    assert data == score(issues, useDecay=False, ledgerScope=None)[0]
+
+
+def test_messages_logged_while_scoring_are_logged_again_for_stored_issues(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setenv("INSO_CACHE_DIR", str(tmp_path))
+    issues = [issue(1, assignees=["dev1"], bonus=True)]
+    score(issues)
+    logger = MagicMock()
+    _, scored = score(issues, logger=logger)
+    assert scored == 0
+    logger.log.assert_any_call(
+        logging.INFO,
+        "Documentation Bonus given to dev2 in [Issue #1](https://github.com/org/repo/issues/1)",
+    )
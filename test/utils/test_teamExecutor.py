@@ -0,0 +1,44 @@
+import threading
+import time
+
+from src.utils.teamExecutor import runForTeams
+
+
+def test_teams_run_concurrently_up_to_the_worker_limit():
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def task(team: str) -> str:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return team.upper()
+
+    teams = [f"team{i}" for i in range(8)]
+    start = time.monotonic()
+    outcome = runForTeams(teams, task, maxWorkers=4)
+    elapsed = time.monotonic() - start
+
+    assert outcome.results == {team: team.upper() for team in teams}
+    assert outcome.errors == {}
+    assert peak == 4
+    # Two waves of four, not eight teams one after another
+    assert elapsed < 0.05 * 8
+
+
+def test_a_failing_team_does_not_stop_the_others():
+    def task(team: str) -> int:
+        if team == "broken":
+            raise ConnectionError("boom")
+        return len(team)
+
+    outcome = runForTeams(["alpha", "broken", "gamma"], task, maxWorkers=2)
+
+    assert outcome.results == {"alpha": 5, "gamma": 5}
+    assert list(outcome.errors) == ["broken"]
+    assert isinstance(outcome.errors["broken"], ConnectionError)